@@ -0,0 +1,108 @@
+"""Benchmark reading the input of Nodes while it is being received.
+
+A thread repeatedly writes new input for every Node, as the IO thread does
+when packets are received, while the host network reads the input of every
+Node in each step.  The time taken by each step is reported for a range of
+numbers of Nodes for both the lock-free exchange through
+:py:class:`~nengo_spinnaker.builder.node.NodeInputBuffer` objects and for a
+dictionary of arrays guarded by a single lock (as was previously used).
+
+Usage::
+
+    $ python benchmarks/benchmark_node_input.py --size 16 --steps 2000
+"""
+import argparse
+import numpy as np
+import threading
+import time
+
+from nengo_spinnaker.builder.node import NodeInputBuffer
+from nengo_spinnaker.utils.realtime import clock
+
+
+class LockedExchange(object):
+    """Exchanges Node input through arrays guarded by a single lock."""
+    def __init__(self, n_nodes, size):
+        self.lock = threading.Lock()
+        self.values = [np.zeros(size) for _ in range(n_nodes)]
+        self.copies = [np.zeros(size) for _ in range(n_nodes)]
+
+    def write(self, node, value):
+        with self.lock:
+            self.values[node][:] = value
+
+    def read(self, node):
+        # The copy is required as the array is modified by the writer
+        with self.lock:
+            np.copyto(self.copies[node], self.values[node])
+        return self.copies[node]
+
+
+class BufferedExchange(object):
+    """Exchanges Node input through lock-free double buffers."""
+    def __init__(self, n_nodes, size):
+        self.buffers = [NodeInputBuffer(size) for _ in range(n_nodes)]
+
+    def write(self, node, value):
+        self.buffers[node].write(value)
+
+    def read(self, node):
+        return self.buffers[node].read()
+
+
+def run(exchange_cls, n_nodes, args):
+    """Get the mean and maximum time taken to read the input of every Node
+    while another thread writes it.
+    """
+    exchange = exchange_cls(n_nodes, args.size)
+    halt = threading.Event()
+
+    def write():
+        value = np.zeros(args.size)
+        while not halt.is_set():
+            for node in range(n_nodes):
+                value[0] += 1.0
+                exchange.write(node, value)
+            time.sleep(args.write_interval)
+
+    writer = threading.Thread(target=write)
+    writer.start()
+    step_times = np.zeros(args.steps)
+    try:
+        for i in range(args.steps):
+            start = clock()
+            for node in range(n_nodes):
+                exchange.read(node)
+            step_times[i] = clock() - start
+    finally:
+        halt.set()
+        writer.join()
+
+    return np.mean(step_times), np.max(step_times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--nodes", type=int, nargs="+",
+                        default=[1, 4, 16, 64, 256],
+                        help="numbers of Nodes receiving input")
+    parser.add_argument("--size", type=int, default=16,
+                        help="size of the input of each Node")
+    parser.add_argument("--steps", type=int, default=2000,
+                        help="number of steps to time")
+    parser.add_argument("--write-interval", type=float, default=0.0001,
+                        help="time between writes of every Node's input")
+    args = parser.parse_args()
+
+    print("{:>6} {:>24} {:>24}".format(
+        "nodes", "locked mean/max (us)", "buffered mean/max (us)"))
+    for n_nodes in args.nodes:
+        results = [run(cls, n_nodes, args) for cls in
+                   (LockedExchange, BufferedExchange)]
+        print("{:>6} {:>24} {:>24}".format(n_nodes, *(
+            "{:.1f} / {:.1f}".format(mean * 1e6, max_ * 1e6)
+            for mean, max_ in results)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+"""Benchmark the Node IO controllers under a simulated packet load.
+
+A separate process sends SDP packets to the host as SDP transmitters on the
+machine would while the host network is simulated in real time.  Each packet
+contains the time at which it was sent, so the age of the input seen by the
+host network indicates how quickly received packets are handled.  The CPU
+time used by the host process and the lateness of the host steps are also
+reported.  Results are only meaningful when the load generator has a CPU to
+itself.
+
+Usage::
+
+    $ python benchmarks/benchmark_node_io.py --nodes 8 --rate 20000
+"""
+import argparse
+import contextlib
+import multiprocessing
+import numpy as np
+from rig.machine_control.packets import SCPPacket
+from rig.place_and_route import Cores
+import socket
+import time
+
+from nengo_spinnaker.builder.connection import NodeTransmissionParameters
+from nengo_spinnaker.bundle import make_system_info
+from nengo_spinnaker.node_io import AsyncioEthernet, Ethernet
+from nengo_spinnaker.operators import SDPReceiver, SDPTransmitter
+from nengo_spinnaker.utils import type_casts as tp
+from nengo_spinnaker.utils.realtime import RealTimeLoop, clock
+
+# Period with which the time contained in packets wraps, this must be
+# representable in S16.15.
+TIME_PERIOD = 60.0
+
+
+class FakeNode(object):
+    """Stands in for a Node which is simulated on the host."""
+    def __init__(self, size):
+        self.size_in = self.size_out = size
+
+
+class FakeController(object):
+    """Stands in for the machine controller while preparing the IO."""
+    initial_host = "localhost"
+
+    @contextlib.contextmanager
+    def __call__(self, **kwargs):
+        yield
+
+    def iptag_set(self, *args):
+        pass
+
+
+class FakeNetlist(object):
+    """Stands in for a netlist containing the SDP receivers and transmitters
+    for the Nodes.
+    """
+    def __init__(self):
+        self.placements = dict()
+        self.allocations = dict()
+
+    def place(self, vertex, x, y, p):
+        self.placements[vertex] = (x, y)
+        self.allocations[vertex] = {Cores: slice(p, p + 1)}
+
+
+def make_io(io_cls, n_nodes, size):
+    """Create and prepare an IO controller for Nodes which both transmit
+    to and receive from the machine.
+    """
+    io = io_cls()
+    netlist = FakeNetlist()
+    nodes = list()
+    for i in range(n_nodes):
+        node = FakeNode(size)
+        nodes.append(node)
+
+        sdp_rx = SDPReceiver()
+        rx_vertex = object()
+        sdp_rx.vertex_connections[rx_vertex] = [
+            (NodeTransmissionParameters(slice(None), None, np.eye(size)),
+             slice(0, size))]
+        netlist.place(rx_vertex, 0, i // 16, i % 16 + 1)
+        io._sdp_receivers[node] = sdp_rx
+
+        sdp_tx = SDPTransmitter(size)
+        sdp_tx._vertex = object()
+        netlist.place(sdp_tx._vertex, 1, i // 16, i % 16 + 1)
+        io._sdp_transmitters[node] = sdp_tx
+
+    io.prepare(None, FakeController(), netlist, make_system_info(1))
+    return io, nodes
+
+
+def generate_load(address, n_nodes, size, rate, duration):
+    """Send packets from every SDP transmitter at a total rate of `rate`
+    packets per second for `duration` seconds.
+    """
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    packets = [
+        SCPPacket(src_x=1, src_y=i // 16, src_cpu=i % 16 + 1, src_port=1,
+                  dest_x=0, dest_y=0, dest_cpu=0, dest_port=0xff, tag=1,
+                  cmd_rc=0, seq=0, arg1=0, arg2=0, arg3=0).bytestring
+        for i in range(n_nodes)
+    ]
+
+    values = np.zeros(size)
+    start = clock()
+    n_sent = 0
+    while clock() - start < duration:
+        # Send the packets which are due
+        n_due = int((clock() - start) * rate)
+        while n_sent < n_due:
+            values[0] = clock() % TIME_PERIOD
+            sock.sendto(packets[n_sent % n_nodes] +
+                        tp.np_to_fix(values).tobytes(), address)
+            n_sent += 1
+        time.sleep(0.0001)
+
+    sock.close()
+
+
+def run(io_cls, args):
+    """Simulate the host network for the given IO controller while packets
+    are received.
+    """
+    io, nodes = make_io(io_cls, args.nodes, args.size)
+    output = np.zeros(args.size)
+    ages = list()
+
+    def step():
+        now = clock() % TIME_PERIOD
+        for node in nodes:
+            sent = io.get_node_input(node)[0]
+            if sent != 0.0:
+                # Packets may arrive while the inputs are read
+                age = (now - sent) % TIME_PERIOD
+                ages.append(age if age < TIME_PERIOD / 2 else 0.0)
+            io.set_node_output(node, output)
+        io.end_step()
+
+    loop = RealTimeLoop(args.dt, spin_time=args.spin_time, sleep=io.wait)
+    generator = multiprocessing.Process(
+        target=generate_load,
+        args=(("localhost", io.in_socket.getsockname()[1]), args.nodes,
+              args.size, args.rate, args.duration + 0.5)
+    )
+    generator.start()
+
+    thread = io.spawn()
+    thread.start()
+    cpu_start = time.process_time()
+    try:
+        loop.run(step, int(args.duration / args.dt))
+    finally:
+        cpu_time = time.process_time() - cpu_start
+        thread.stop()
+        generator.join()
+        io.close()
+
+    ages = np.array(ages or [np.nan])
+    print("{:>16}: CPU {:6.1%}, input age median {:.3f} ms, 99% {:.3f} ms, "
+          "step lateness mean {:.3f} ms, max {:.3f} ms".format(
+              io_cls.__name__, cpu_time / args.duration,
+              np.median(ages) * 1e3, np.percentile(ages, 99) * 1e3,
+              loop.timings.lateness.mean * 1e3,
+              loop.timings.lateness.max * 1e3))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--nodes", type=int, default=8,
+                        help="number of Nodes receiving input")
+    parser.add_argument("--size", type=int, default=16,
+                        help="size of the input of each Node")
+    parser.add_argument("--rate", type=float, default=20000.0,
+                        help="packets received per second")
+    parser.add_argument("--duration", type=float, default=5.0,
+                        help="seconds to simulate with each controller")
+    parser.add_argument("--dt", type=float, default=0.001,
+                        help="timestep of the host network")
+    parser.add_argument("--spin-time", type=float, default=0.0002,
+                        help="time spent spinning before each step")
+    args = parser.parse_args()
+
+    for io_cls in (Ethernet, AsyncioEthernet):
+        run(io_cls, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""Benchmark the Node IO controllers against an emulated SpiNNaker board.
+
+The host network is simulated in real time while a
+:py:class:`~nengo_spinnaker.node_io.emulator.SpiNNakerEmulator` emits packets
+from SDP transmitters and receives the packets sent to SDP receivers.  The
+throughput and latency in each direction are printed and recorded as
+properties of each test (so that they are included in JUnit XML reports and
+may be tracked over time), and the tests fail if many packets are lost or the
+latency is grossly excessive.
+
+Usage::
+
+    $ py.test -s benchmarks/test_emulated_node_io.py --junitxml=io.xml
+"""
+import numpy as np
+from rig.machine_control import MachineController
+from rig.place_and_route import Cores
+import pytest
+
+from nengo_spinnaker.builder.connection import NodeTransmissionParameters
+from nengo_spinnaker.bundle import make_system_info
+from nengo_spinnaker.node_io import AsyncioEthernet, Ethernet
+from nengo_spinnaker.node_io.emulator import SpiNNakerEmulator
+from nengo_spinnaker.operators import SDPReceiver, SDPTransmitter
+from nengo_spinnaker.utils.realtime import RealTimeLoop, clock
+
+N_NODES = 8
+SIZE = 16
+RATE = 5000.0
+DURATION = 2.0
+DT = 0.001
+
+
+class FakeNode(object):
+    """Stands in for a Node which is simulated on the host."""
+    def __init__(self, size):
+        self.size_in = self.size_out = size
+
+
+class FakeNetlist(object):
+    """Stands in for a netlist containing the SDP receivers and transmitters
+    for the Nodes.
+    """
+    def __init__(self):
+        self.placements = dict()
+        self.allocations = dict()
+
+    def place(self, vertex, x, y, p):
+        self.placements[vertex] = (x, y)
+        self.allocations[vertex] = {Cores: slice(p, p + 1)}
+
+
+@pytest.mark.parametrize("io_cls", [Ethernet, AsyncioEthernet])
+def test_emulated_node_io(io_cls, record_property):
+    latencies = {"to_machine": list(), "to_host": list()}
+
+    def record_latency(x, y, p, values):
+        latencies["to_machine"].append(
+            (clock() - values[0]) % emulator.period)
+
+    emulator = SpiNNakerEmulator(sdp_handler=record_latency)
+    emulator.start()
+
+    # Prepare the IO for Nodes which both transmit to and receive from
+    # SDP transmitters and receivers on the emulated board.
+    io = io_cls()
+    netlist = FakeNetlist()
+    nodes = [FakeNode(SIZE) for _ in range(N_NODES)]
+    for i, node in enumerate(nodes):
+        sdp_rx = SDPReceiver()
+        rx_vertex = object()
+        sdp_rx.vertex_connections[rx_vertex] = [
+            (NodeTransmissionParameters(slice(None), None, np.eye(SIZE)),
+             slice(0, SIZE))]
+        netlist.place(rx_vertex, 0, i // 16, i % 16 + 1)
+        io._sdp_receivers[node] = sdp_rx
+
+        sdp_tx = SDPTransmitter(SIZE)
+        sdp_tx._vertex = object()
+        netlist.place(sdp_tx._vertex, 1, i // 16, i % 16 + 1)
+        io._sdp_transmitters[node] = sdp_tx
+        emulator.add_transmitter(1, i // 16, i % 16 + 1, SIZE)
+
+    io.prepare(None, MachineController("localhost"), netlist,
+               make_system_info(1))
+
+    output = np.zeros(SIZE)
+    last_input = [None] * N_NODES
+
+    def step():
+        now = clock() % emulator.period
+        output[0] = now
+        for i, node in enumerate(nodes):
+            sent = io.get_node_input(node)[0]
+            if sent != last_input[i]:
+                last_input[i] = sent
+                latencies["to_host"].append((now - sent) % emulator.period)
+            io.set_node_output(node, output)
+        io.end_step()
+
+    loop = RealTimeLoop(DT, spin_time=0.0, sleep=io.wait)
+    thread = io.spawn()
+    thread.start()
+    try:
+        emulator.rate = RATE
+        loop.run(step, int(DURATION / DT))
+        emulator.rate = 0.0
+        io.wait(0.1)
+    finally:
+        thread.stop()
+        emulator.close()
+        io.close()
+
+    # Record the results
+    n_received = sum(s.n_packets_received for s in io.node_stats.values())
+    results = {
+        "to_machine_packets_per_s": emulator.n_sdp_received / DURATION,
+        "to_machine_latency_median_ms":
+            np.median(latencies["to_machine"]) * 1e3,
+        "to_host_packets_per_s": n_received / DURATION,
+        "to_host_latency_median_ms": np.median(latencies["to_host"]) * 1e3,
+        "to_host_lost": emulator.n_sdp_sent - n_received,
+        "step_lateness_mean_ms": loop.timings.lateness.mean * 1e3,
+    }
+    for name, value in sorted(results.items()):
+        record_property(name, value)
+    print("\n{}: {}".format(io_cls.__name__, ", ".join(
+        "{} {:.3f}".format(k, v) for k, v in sorted(results.items()))))
+
+    # Packets are not lost or delayed excessively
+    assert emulator.n_sdp_received >= 0.95 * io.n_packets_sent
+    assert results["to_host_lost"] <= 0.05 * emulator.n_sdp_sent
+    assert results["to_machine_latency_median_ms"] < 10.0
+    assert results["to_host_latency_median_ms"] < 10.0
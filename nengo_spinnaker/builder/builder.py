@@ -322,6 +322,8 @@ class Model(object):
         load_functions = collections_ext.noneignoringlist()
         before_simulation_functions = collections_ext.noneignoringlist()
         after_simulation_functions = collections_ext.noneignoringlist()
+        prepare_simulation_functions = collections_ext.noneignoringlist()
+        reset_functions = collections_ext.noneignoringlist()
         constraints = collections_ext.flatinsertionlist()
 
         # Prepare to build a list of signal constraints
@@ -335,14 +337,15 @@ class Model(object):
 
             # Otherwise call upon the operator to build vertices for the
             # netlist. The vertices should always be returned as an iterable.
-            vxs, load_fn, pre_fn, post_fn, constraint = op.make_vertices(
-                self, *args, **kwargs
-            )
+            (vxs, load_fn, pre_fn, post_fn, constraint,
+             prepare_fn, reset_fn) = op.make_vertices(self, *args, **kwargs)
             operator_vertices[op] = tuple(vxs)
 
             load_functions.append(load_fn)
             before_simulation_functions.append(pre_fn)
             after_simulation_functions.append(post_fn)
+            prepare_simulation_functions.append(prepare_fn)
+            reset_functions.append(reset_fn)
 
             if constraint is not None:
                 constraints.append(constraint)
@@ -424,6 +427,8 @@ class Model(object):
             load_functions=load_functions,
             before_simulation_functions=before_simulation_functions,
             after_simulation_functions=after_simulation_functions,
+            prepare_simulation_functions=prepare_simulation_functions,
+            reset_functions=reset_functions,
             signal_id_constraints=signal_id_constraints
         )
 
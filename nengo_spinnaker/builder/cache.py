@@ -0,0 +1,218 @@
+"""Caching of built models and their netlists.
+
+Building a large network and converting it into a netlist can take a
+considerable amount of time.  The functions in this module allow the result of
+:py:meth:`~nengo_spinnaker.builder.Model.build`, the removal of passthrough
+Nodes and :py:meth:`~nengo_spinnaker.builder.Model.make_netlist` to be stored
+on disk and restored when the same network is simulated again.
+
+Networks are identified by a fingerprint of the type and parameters of every
+object they contain, the SpiNNaker specific configuration and the build
+parameters.  Functions are fingerprinted by their byte-code, constants,
+default arguments, closures and the global variables they refer to.  Networks
+without a seed, or which refer to objects that cannot be fingerprinted (e.g.,
+callable objects which cannot be pickled), are never cached.
+"""
+import hashlib
+import logging
+from nengo.processes import Process
+import six
+
+from ..utils.cache import describe, dumps, loads, UndescribableError
+
+logger = logging.getLogger(__name__)
+
+
+def get_network_objects(network):
+    """Get a list of the objects in a network which may be referred to by a
+    built model.
+
+    The order of the list is determined only by the order in which objects
+    were added to the network and so is stable between separate constructions
+    of the same network.
+    """
+    objects = [network]
+    objects.extend(network.all_networks)
+
+    for ens in network.all_ensembles:
+        objects.extend((ens, ens.neurons))
+
+    for node in network.all_nodes:
+        objects.append(node)
+        if callable(node.output) or isinstance(node.output, Process):
+            objects.append(node.output)
+
+    for conn in network.all_connections:
+        objects.append(conn)
+        if conn.function is not None:
+            objects.append(conn.function)
+
+        # Add the learning rules of the connection
+        rules = conn.learning_rule
+        if isinstance(rules, dict):
+            rules = [rules[k] for k in sorted(rules)]
+        elif not isinstance(rules, list):
+            rules = [rules]
+        objects.extend(r for r in rules if r is not None)
+
+    objects.extend(network.all_probes)
+    return objects
+
+
+def get_model_cache_key(network, *args):
+    """Get a key which identifies the model which will be built from the given
+    network and build arguments, or None if the build is not deterministic or
+    the network cannot be fingerprinted.
+
+    Parameters
+    ----------
+    network : :py:class:`nengo.Network`
+        The network which is to be built.
+    *args :
+        Further arguments (e.g., dt, machine timestep, number of steps, IO
+        controller) which affect the result of building the network.
+    """
+    if network.seed is None:
+        logger.info("Not caching the model as the network has no seed")
+        return None
+
+    fingerprint = get_network_fingerprint(network, *args)
+    if fingerprint is None:
+        logger.info("Not caching the model as the network cannot be "
+                    "fingerprinted")
+    return fingerprint
+
+
+def get_network_fingerprint(network, *args):
+    """Get a fingerprint of the type and parameters of every object in a
+    network, its SpiNNaker specific configuration and the given build
+    arguments, or None if any of these cannot be described.
+    """
+    objects = get_network_objects(network)
+    index = {id(obj): i for i, obj in enumerate(objects)}
+
+    # Fingerprint each object, the SpiNNaker specific configuration and the
+    # build arguments.
+    fingerprint = hashlib.sha1()
+    try:
+        for obj in objects:
+            fingerprint.update(describe(obj, index, top=True).encode("utf-8"))
+        fingerprint.update(
+            _describe_config(network.config, index).encode("utf-8"))
+        fingerprint.update(describe(args, index).encode("utf-8"))
+    except UndescribableError as err:
+        logger.info("The network cannot be fingerprinted: %s", err)
+        return None
+
+    return fingerprint.hexdigest()
+
+
+def get_model_state(network, model, io_controller, netlist):
+    """Get the state of a built model, its IO controller and its netlist.
+
+    Only parameters of objects in the original network are kept; any other
+    objects were created during the build and cannot be referred to again.
+    The state may be pickled with :py:func:`~nengo_spinnaker.utils.cache.\
+dumps`, replacing the objects returned by :py:func:`~.get_network_objects`
+    with placeholders, and restored with :py:func:`~.set_model_state`.
+    """
+    ids = set(id(obj) for obj in get_network_objects(network))
+    return {
+        "params": {k: v for k, v in six.iteritems(model.params)
+                   if id(k) in ids},
+        "seeds": {k: v for k, v in six.iteritems(model.seeds)
+                  if id(k) in ids},
+        "connection_map": model.connection_map,
+        "object_operators": model.object_operators,
+        "extra_operators": model.extra_operators,
+        "io_controller": io_controller.get_build_state(),
+        "netlist": netlist,
+    }
+
+
+def set_model_state(state, network, model, io_controller):
+    """Restore a model and its IO controller to a state returned by
+    :py:func:`~.get_model_state` and return the netlist.
+    """
+    model.config = network.config
+    model.params.update(state["params"])
+    model.seeds.update(state["seeds"])
+    model.connection_map = state["connection_map"]
+    model.object_operators = state["object_operators"]
+    model.extra_operators = state["extra_operators"]
+    io_controller.set_build_state(state["io_controller"])
+
+    return state["netlist"]
+
+
+def store_built_model(cache, key, network, model, io_controller, netlist):
+    """Store a built model and its netlist in the cache.
+
+    Must be called after the netlist has been constructed but *before* it is
+    placed and routed.
+    """
+    state = get_model_state(network, model, io_controller, netlist)
+
+    # Pickle the state, replacing references to objects in the network and
+    # to the keyspaces with placeholders.
+    try:
+        data = dumps(state, get_network_objects(network) + [model.keyspaces])
+    except Exception as err:
+        logger.warning("Model could not be cached: %s", err)
+        return
+
+    cache.put(key, data)
+
+
+def load_built_model(cache, key, network, model, io_controller):
+    """Restore a built model from the cache.
+
+    If the cache contains a model for the given key then `model` and
+    `io_controller` are updated to match the cached model and the netlist is
+    returned; otherwise None is returned and neither is modified.
+    """
+    data = cache.get(key)
+    if data is None:
+        logger.info("Model cache miss (%s)", key)
+        return None
+
+    try:
+        state = loads(data, get_network_objects(network) + [model.keyspaces])
+    except Exception as err:
+        logger.warning("Cached model could not be loaded: %s", err)
+        return None
+
+    logger.info("Model cache hit (%s)", key)
+
+    # Restore the model and the IO controller
+    return set_model_state(state, network, model, io_controller)
+
+
+def _describe_config(config, index):
+    """Get a string which describes the parameters in a config which can't be
+    determined from the objects themselves (e.g., SpiNNaker specific
+    parameters).
+    """
+    descriptions = list()
+    for key, params in six.iteritems(config.params):
+        if isinstance(key, type):
+            # Describe all the (default) values for the class
+            values = {p: getattr(params, p) for p in params.params}
+        elif id(key) in index:
+            # Describe only the extra parameters which have been set for the
+            # instance.
+            clsparams = config[type(key)]
+            values = {p: getattr(params, p) for p in clsparams.extra_params
+                      if params in clsparams.get_param(p)}
+
+            # Instances are added to the config whenever it is accessed
+            # (e.g., while building), only those with parameters matter.
+            if not values:
+                continue
+        else:
+            continue  # pragma: no cover
+
+        descriptions.append("{}: {}".format(describe(key, index),
+                                            describe(values, index)))
+
+    return ", ".join(sorted(descriptions))
@@ -50,6 +50,21 @@ class ConnectionMap(object):
             )
         )
 
+    def __getstate__(self):
+        # The nested defaultdicts can't be pickled, so convert them into
+        # dictionaries.
+        return {
+            source: {port: dict(signals) for port, signals in
+                     iteritems(port_signals)}
+            for source, port_signals in iteritems(self._connections)
+        }
+
+    def __setstate__(self, state):
+        self.__init__()
+        for source, port_signals in iteritems(state):
+            for port, signals in iteritems(port_signals):
+                self._connections[source][port].update(signals)
+
     def add_connection(self, source_object, source_port, signal_parameters,
                        transmission_parameters, sink_object, sink_port,
                        reception_parameters):
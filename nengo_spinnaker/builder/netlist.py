@@ -3,12 +3,39 @@ import collections
 
 class netlistspec(collections.namedtuple(
         "netlistspec", "vertices, load_function, before_simulation_function, "
-                       "after_simulation_function, constraints")):
-    """Specification of how an operator should be added to a netlist."""
+                       "after_simulation_function, constraints, "
+                       "prepare_simulation_function, reset_function")):
+    """Specification of how an operator should be added to a netlist.
+
+    Attributes
+    ----------
+    vertices : [vertex, ...]
+        Vertices which implement the operator.
+    load_function : `fn(netlist, controller)`
+        Function to load the operator to the machine.
+    before_simulation_function : `fn(netlist, simulator, n_steps)`
+        Function to prepare the machine for a simulation.
+    after_simulation_function : `fn(netlist, simulator, n_steps)`
+        Function to retrieve data from the machine after a simulation.  May
+        return a further function (accepting no arguments) to process the
+        retrieved data, this may be called while the machine is simulating.
+    constraints :
+        Additional constraints on placement.
+    prepare_simulation_function : \
+            `fn(netlist, simulator, start_step, n_steps)`
+        Function to precompute, without communicating with the machine, any
+        data required by a future simulation.  This may be called while the
+        machine is simulating.
+    reset_function : `fn(netlist, controller)`
+        Function to restore any state held in the memory of the machine to
+        that which was present immediately after loading.
+    """
     def __new__(cls, vertices, load_function=None,
                 before_simulation_function=None,
-                after_simulation_function=None, constraints=None):
+                after_simulation_function=None, constraints=None,
+                prepare_simulation_function=None, reset_function=None):
         return super(netlistspec, cls).__new__(
             cls, vertices, load_function, before_simulation_function,
-            after_simulation_function, constraints
+            after_simulation_function, constraints,
+            prepare_simulation_function, reset_function
         )
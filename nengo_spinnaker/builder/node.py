@@ -1,8 +1,11 @@
+import ctypes
+import functools
+import multiprocessing
 import nengo
 from nengo.processes import Process
 from nengo.utils.builder import full_transform
 import numpy as np
-import threading
+import time
 
 from .connection import (PassthroughNodeTransmissionParameters,
                          NodeTransmissionParameters)
@@ -10,6 +13,7 @@ from nengo_spinnaker.builder.builder import ObjectPort, spec, Model
 from nengo_spinnaker.builder.model import InputPort, OutputPort
 from nengo_spinnaker.operators import Filter, ValueSink, ValueSource
 from nengo_spinnaker.utils.config import getconfig
+from nengo_spinnaker.utils.probe_data import ProbeRingBuffer
 
 
 class NodeIOController(object):
@@ -46,10 +50,11 @@ class NodeIOController(object):
     the model which should be simulated on the host, and can be used to perform
     communication between SpiNNaker and the host. Subclasses should also
     implement :py:meth:`~.set_node_output` for setting Node values and should
-    write received node inputs into :py:attr:`~.node_inputs`, a dictionary with
-    Nodes as the keys and Numpy arrays as the values using the
-    :py:attr:`~.node_inputs_lock`.  Subclasses should override
-    :py:meth:`~.prepare` if they need access to a netlist.
+    write received node inputs into :py:attr:`~.node_input`, a dictionary with
+    Nodes as the keys and :py:class:`~.NodeInputBuffer` objects as the values,
+    from at most one thread.  Subclasses should override
+    :py:meth:`~.prepare` if they need access to a netlist and may override
+    :py:meth:`~.end_step` to transmit the outputs of a step together.
 
     Finally, subclasses should implement a `spawn` method, which returns a
     thread which manages IO.  This thread must have a `stop` method which
@@ -65,6 +70,10 @@ class NodeIOController(object):
         Map of passthrough Nodes to the operators which simulate them on
         SpiNNaker, this is exposed so that some passthrough Nodes may be
         optimised out.
+    node_stats : {Node: NodeIOStats, ...}
+        Statistics of the IO performed for each Node (see
+        :py:mod:`nengo_spinnaker.node_io.telemetry`), if the IO controller
+        records them.
     """
 
     def __init__(self):
@@ -80,10 +89,13 @@ class NodeIOController(object):
         self._input_nodes = dict()
         self._output_nodes = dict()
 
-        # Cached node inputs
-        self.node_input_lock = threading.Lock()
+        # Buffers through which received node inputs are exchanged with the
+        # host network.
         self.node_input = dict()
 
+        # Statistics of the IO performed for each Node
+        self.node_stats = dict()
+
     @property
     def builder_kwargs(self):
         """Keyword arguments that can be used with the standard model builder.
@@ -95,6 +107,33 @@ class NodeIOController(object):
             "extra_probe_builders": {nengo.Node: self.build_node_probe},
         }
 
+    def indefinite_builder_kwargs(self, n_probe_steps):
+        """Keyword arguments that can be used with the standard model builder
+        when the model will be simulated indefinitely.
+
+        Memory on the machine can hold neither the output of an aperiodic
+        function of time nor an unbounded recording, so aperiodic function of
+        time Nodes are simulated on the host and the values of probed
+        Ensembles and Nodes are streamed to the host, where the most recent
+        `n_probe_steps` samples of each are kept in a
+        :py:class:`~nengo_spinnaker.utils.probe_data.ProbeRingBuffer`.  Other
+        probes are not supported.
+        """
+        probe_builder = functools.partial(self.build_streamed_probe,
+                                          n_steps=n_probe_steps)
+
+        kwargs = self.builder_kwargs
+        kwargs["extra_builders"] = {
+            nengo.Node: functools.partial(self.build_node, indefinite=True),
+        }
+        kwargs["extra_probe_builders"] = {
+            nengo.Node: probe_builder,
+            nengo.Ensemble: probe_builder,
+            nengo.ensemble.Neurons: build_unsupported_probe,
+            nengo.connection.LearningRule: build_unsupported_probe,
+        }
+        return kwargs
+
     def _add_node(self, node):
         """Add a Node to the host network."""
         if node not in self._added_nodes:
@@ -107,13 +146,80 @@ class NodeIOController(object):
             self.host_network.add(connection)
             self._added_conns.add(connection)
 
-    def build_node(self, model, node):
-        """Modify the model to build the Node."""
+    def _add_output_node(self, node):
+        """Add a Node and an OutputNode which will transmit its output to
+        SpiNNaker to the host network.
+        """
+        self._add_node(node)
+        output_node = self._output_nodes[node] = OutputNode(node, self)
+        nengo.Connection(node, output_node, synapse=None)
+
+    def _add_input_node(self, node):
+        """Add an InputNode which will provide the input to a Node from
+        SpiNNaker to the host network.
+        """
+        input_node = self._input_nodes[node] = InputNode(node, self)
+        nengo.Connection(input_node, node, synapse=None)
+
+    def get_build_state(self):
+        """Get the state of the IO controller after a model has been built.
+
+        The returned state may be pickled (with suitable handling of the
+        objects in the original network) and passed to
+        :py:meth:`~.set_build_state` to restore a new IO controller to the
+        same state without rebuilding the model.  Subclasses which store
+        additional state during the build should extend both methods.
+        """
+        return {
+            "nodes": [n for n in self.host_network.nodes if
+                      n in self._added_nodes],
+            "connections": [c for c in self.host_network.connections if
+                            c in self._added_conns],
+            "input_nodes": [n for n in self.host_network.nodes if
+                            n in self._input_nodes],
+            "output_nodes": [n for n in self.host_network.nodes if
+                             n in self._output_nodes],
+            "f_of_t_nodes": self._f_of_t_nodes,
+            "passthrough_nodes": self.passthrough_nodes,
+        }
+
+    def set_build_state(self, state):
+        """Restore the IO controller to a state returned by
+        :py:meth:`~.get_build_state`.
+        """
+        self._f_of_t_nodes = state["f_of_t_nodes"]
+        self.passthrough_nodes = state["passthrough_nodes"]
+
+        # Rebuild the host network
+        with self.host_network:
+            for node in state["nodes"]:
+                self._add_node(node)
+
+            for node in state["input_nodes"]:
+                self._add_input_node(node)
+
+            for node in state["output_nodes"]:
+                self._add_output_node(node)
+
+            for conn in state["connections"]:
+                self._add_connection(conn)
+
+    def build_node(self, model, node, indefinite=False):
+        """Modify the model to build the Node.
+
+        If `indefinite` is True then only function of time Nodes which are
+        periodic (or constant) are simulated on the machine.
+        """
         f_of_t = node.size_in == 0 and (
             not callable(node.output) or
             getconfig(model.config, node, "function_of_time", False)
         )
 
+        if (f_of_t and indefinite and
+                (callable(node.output) or isinstance(node.output, Process))):
+            f_of_t = getconfig(model.config, node,
+                               "function_of_time_period") is not None
+
         if node.output is None:
             # If the Node is a passthrough Node then create a new filter object
             # for it.
@@ -150,6 +256,42 @@ class NodeIOController(object):
                                 seed=seed, add_to_container=False)
         model.make_connection(conn)
 
+    def build_streamed_probe(self, model, probe, n_steps):
+        """Modify the model to build a Probe whose data is streamed to the
+        host and stored in a ring buffer of `n_steps` samples.
+        """
+        if isinstance(probe.target, nengo.Ensemble):
+            if probe.attr != "decoded_output":
+                raise NotImplementedError(
+                    "SpiNNaker does not support probing '{}' on "
+                    "Ensembles.".format(probe.attr)
+                )
+            kwargs = {"solver": probe.solver}
+        else:
+            kwargs = {}
+
+        # Create a Node to record the probed values on the host
+        probe_node = ProbeNode(probe, n_steps, model.dt,
+                               add_to_container=False)
+        with self.host_network:
+            self._add_node(probe_node)
+
+        # Connect the target of the probe to the recording Node
+        seed = model.seeds[probe]
+        conn = nengo.Connection(probe.target, probe_node,
+                                synapse=probe.synapse, seed=seed,
+                                add_to_container=False, **kwargs)
+
+        if (isinstance(probe.target, nengo.Node) and
+                probe.target not in self.passthrough_nodes):
+            # Nodes which are not passthrough Nodes can be evaluated on the
+            # host so the connection is simulated entirely on the host.
+            with self.host_network:
+                self._add_node(probe.target)
+                self._add_connection(conn)
+        else:
+            model.make_connection(conn)
+
     def get_node_source(self, model, cn):
         """Get the source for a connection originating from a Node."""
         if cn.pre_obj in self.passthrough_nodes:
@@ -182,12 +324,7 @@ class NodeIOController(object):
             with self.host_network:
                 # Create the output Node if necessary
                 if cn.pre_obj not in self._output_nodes:
-                    self._add_node(cn.pre_obj)
-                    self._output_nodes[cn.pre_obj] = \
-                        OutputNode(cn.pre_obj, self)
-
-                    output_node = self._output_nodes[cn.pre_obj]
-                    nengo.Connection(cn.pre_obj, output_node, synapse=None)
+                    self._add_output_node(cn.pre_obj)
 
             # Return a specification that describes how the signal should
             # be represented on SpiNNaker.
@@ -231,11 +368,7 @@ class NodeIOController(object):
 
                 # Create the input node AND connection if necessary
                 if cn.post_obj not in self._input_nodes:
-                    self._input_nodes[cn.post_obj] = \
-                        InputNode(cn.post_obj, self)
-
-                    input_node = self._input_nodes[cn.post_obj]
-                    nengo.Connection(input_node, cn.post_obj, synapse=None)
+                    self._add_input_node(cn.post_obj)
 
             # Return a specification that describes how the signal should
             # be represented on SpiNNaker.
@@ -250,12 +383,17 @@ class NodeIOController(object):
         """
         raise NotImplementedError
 
-    def prepare(self, model, controller, netlist):
+    def prepare(self, model, controller, netlist, system_info=None):
         """Prepare the Node controller to work with the given model, netlist
-        and machine controller.
+        and machine controller, `system_info` describes the machine the
+        netlist was placed on.
         """
         pass
 
+    def get_node_input(self, node):
+        """Get the most recent input received for a Node."""
+        return self.node_input[node].read()
+
     def set_node_output(self, node, value):  # pragma: no cover
         """Transmit the value output by a Node.
 
@@ -263,6 +401,28 @@ class NodeIOController(object):
         """
         raise NotImplementedError
 
+    def end_step(self):
+        """Called once every Node has produced its output for a step of the
+        host simulation, IO controllers may use this to transmit the outputs
+        gathered during the step together.
+        """
+        pass
+
+    def wait(self, duration):
+        """Wait for `duration` seconds between steps of the host simulation.
+
+        IO controllers which perform IO on the thread simulating the host
+        network (rather than in the thread returned by :py:meth:`~.spawn`)
+        may override this to perform IO while waiting.
+        """
+        time.sleep(duration)
+
+    def get_metrics(self):
+        """Get a dictionary of counts describing the IO performed so far,
+        e.g., the number of packets sent.
+        """
+        return dict()
+
     def spawn(self):  # pragma: no cover
         """Get a new thread which will handle IO for a period of simulation
         time.
@@ -306,6 +466,98 @@ def build_node_transmission_parameters(model, conn):
         return PassthroughNodeTransmissionParameters(transform)
 
 
+def build_unsupported_probe(model, probe):
+    """Probe builder for probes which cannot be built when simulating
+    indefinitely.
+    """
+    raise NotImplementedError(
+        "Probing '{}' of {} is not supported when simulating "
+        "indefinitely.".format(probe.attr, probe.target)
+    )
+
+
+class NodeInputBuffer(object):
+    """Exchanges the input of a Node between the thread which receives it and
+    the thread which simulates the host network without locking.
+
+    The receiving thread writes each new value into the :py:attr:`~.back`
+    buffer and then calls :py:meth:`~.flip` to publish it.  Readers copy the
+    front buffer and retry if it was flipped while they were copying, which
+    can only happen if the receiving thread wrote a complete new value during
+    the copy.  Only a single thread may write to the buffer.
+
+    After :py:meth:`~.share` has been called values may also be exchanged
+    with processes forked from the current process.
+
+    Parameters
+    ----------
+    size : int
+        Size of the input of the Node.
+    """
+    def __init__(self, size):
+        self._buffers = (np.zeros(size), np.zeros(size))
+        self._sequence = np.zeros(1, dtype=np.int64)
+        self._value = np.zeros(size)
+        self._value_sequence = 0
+
+    @property
+    def sequence(self):
+        """Number of values which have been published."""
+        return int(self._sequence[0])
+
+    def share(self):
+        """Move the published values into memory which is shared with
+        processes subsequently forked from the current process.
+        """
+        size = self._value.size
+        memory = np.frombuffer(
+            multiprocessing.RawArray(ctypes.c_double, 2 * size + 1))
+        memory[:size] = self._buffers[0]
+        memory[size:2 * size] = self._buffers[1]
+        self._buffers = (memory[:size], memory[size:2 * size])
+
+        # The sequence number is stored in the final element
+        sequence = memory[2 * size:].view(np.int64)
+        sequence[:] = self._sequence
+        self._sequence = sequence
+
+    @property
+    def front(self):
+        """Most recently published value, which must not be modified."""
+        return self._buffers[self.sequence & 1]
+
+    @property
+    def back(self):
+        """Buffer into which the next value should be written."""
+        return self._buffers[~self.sequence & 1]
+
+    def flip(self):
+        """Publish the value written into the back buffer."""
+        self._sequence[0] += 1
+
+    def write(self, value):
+        """Write and publish a new value."""
+        self.back[:] = value
+        self.flip()
+
+    def read(self):
+        """Get a copy of the most recently published value.
+
+        The returned array is owned by the buffer and is only changed by
+        subsequent calls to :py:meth:`~.read`.
+        """
+        sequence = self.sequence
+        while sequence != self._value_sequence:
+            np.copyto(self._value, self._buffers[sequence & 1])
+            self._value_sequence = sequence
+
+            # Copy again if the buffer was flipped (and hence may have been
+            # written to) while it was being copied.
+            sequence = self.sequence
+
+        return self._value
+
+
 class InputNode(nengo.Node):
     """Node which queries the IO controller for the input to a Node from."""
     def __init__(self, node, controller):
@@ -313,14 +565,13 @@ class InputNode(nengo.Node):
         self.size_out = node.size_in
         self.target = node
         self.controller = controller
-        controller.node_input[node] = np.zeros(self.size_out)
+        controller.node_input[node] = NodeInputBuffer(self.size_out)
 
     def output(self, t):
         """This should ask the controller for the input value for the target
         Node.
         """
-        with self.controller.node_input_lock:
-            return self.controller.node_input[self.target]
+        return self.controller.get_node_input(self.target)
 
 
 class OutputNode(nengo.Node):
@@ -338,3 +589,38 @@ class OutputNode(nengo.Node):
         target.
         """
         self.controller.set_node_output(self.target, value)
+
+
+class ProbeNode(nengo.Node):
+    """Node which records the values it receives on behalf of a Probe.
+
+    Attributes
+    ----------
+    probe : :py:class:`nengo.Probe`
+        Probe whose data is recorded.
+    buffer : :py:class:`~nengo_spinnaker.utils.probe_data.ProbeRingBuffer`
+        Buffer holding the most recently recorded values.
+    """
+    def __init__(self, probe, n_steps, dt):
+        self.size_in = probe.size_in
+        self.size_out = 0
+        self.probe = probe
+
+        # Compute the sample period
+        if probe.sample_every is None:
+            self.sample_every = 1
+        else:
+            self.sample_every = int(np.round(probe.sample_every / dt))
+
+        self.buffer = ProbeRingBuffer(n_steps)
+        self.reset()
+
+    def reset(self):
+        """Restart sampling, the buffer is emptied separately."""
+        self._step = 0
+
+    def output(self, t, value):
+        """Record the value if it should be sampled."""
+        if self._step % self.sample_every == 0:
+            self.buffer.append(value[np.newaxis])
+        self._step += 1
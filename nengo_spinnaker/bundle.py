@@ -0,0 +1,649 @@
+"""Bundles of models which have been compiled ahead of time.
+
+Building a model, placing and routing it, minimising its routing tables and
+generating the data for every vertex takes far longer than loading the result
+onto a SpiNNaker machine.  A bundle contains everything required to load a
+model which has been built against a description of a machine:
+
+ - the placed and routed netlist and the built model,
+ - the keyspaces assigned to every net,
+ - the minimised routing tables,
+ - images of the SDRAM written by the load functions of the netlist.
+
+Bundles are compiled with :py:meth:`~nengo_spinnaker.Simulator.compile` (or
+the ``nengo_spinnaker_compile`` script) and loaded with
+:py:meth:`~nengo_spinnaker.Simulator.from_bundle`, which only allocates memory,
+writes the images, loads the routing tables and starts the applications.
+
+SDRAM images are rendered by running the load functions against an
+:py:class:`~.ImageController` rather than a machine.  The addresses of the
+memory allocated on the machine are not known until the bundle is loaded, so
+the images are rendered twice with the allocations at different addresses:
+any word which differs between the renderings is a pointer and is adjusted
+(relocated) when the images are written to the machine.
+
+Bundles refer to the objects in the network from which they were compiled
+(e.g., Nodes simulated on the host and probes) by their position in the
+network, so the same network must be constructed (but need not be built)
+before a bundle is loaded.  The network is fingerprinted to ensure that the
+bundle and the network match.
+"""
+import bisect
+import collections
+import contextlib
+import logging
+import numpy as np
+import pickle
+from rig.geometry import (spinn5_eth_coords, spinn5_local_eth_coord,
+                          standard_system_dimensions)
+from rig.links import Links
+from rig.machine_control.consts import AppState
+from rig.machine_control.machine_controller import (ChipInfo, MemoryIO,
+                                                    SystemInfo)
+from rig.place_and_route import Cores
+from six import iteritems, itervalues
+import struct
+
+from .builder.cache import (get_model_state, get_network_objects,
+                            set_model_state)
+from .utils.cache import dumps, get_versions_string, loads
+from .utils.timings import Timings
+
+logger = logging.getLogger(__name__)
+
+# Version of the bundle format, bundles of other versions cannot be loaded
+BUNDLE_VERSION = 1
+
+# SDRAM addresses in this range are aliases of addresses 0x10000000 lower
+# which bypass the write buffer.
+_UNBUFFERED_SDRAM = (0x70000000, 0x80000000)
+
+
+class BundleError(Exception):
+    """Raised when a bundle cannot be loaded."""
+
+
+class SDRAMAllocation(object):
+    """A block of SDRAM allocated, and the data written into it, while
+    rendering the images of a bundle.
+
+    Attributes
+    ----------
+    index : int
+        Index of the allocation amongst all those made while rendering.
+    x, y : int
+        Chip on which the memory is allocated.
+    size : int
+        Size of the block in bytes.
+    tag : int
+        Tag with which the block is allocated.
+    clear : bool
+        Whether the block is cleared when it is allocated.
+    address : int
+        Address of the block when the images were rendered.
+    chunks : [(offset, bytes), ...]
+        Data written into the block, unwritten memory is left untouched.
+    relocations : :py:class:`numpy.ndarray`
+        Offsets of words in the block which contain pointers and the index of
+        the allocation to which they point.
+    """
+    def __init__(self, index, x, y, size, tag, clear, address):
+        self.index = index
+        self.x = x
+        self.y = y
+        self.size = size
+        self.tag = tag
+        self.clear = clear
+        self.address = address
+
+        self.data = bytearray(size)
+        self.written = list()  # (start, stop) of every write
+        self.chunks = list()
+        self.relocations = np.zeros((0, 2), dtype=np.uint32)
+
+    def get_written_ranges(self):
+        """Get the sorted and merged ranges of the block which have been
+        written.
+        """
+        ranges = list()
+        for start, stop in sorted(self.written):
+            if ranges and start <= ranges[-1][1]:
+                ranges[-1][1] = max(ranges[-1][1], stop)
+            else:
+                ranges.append([start, stop])
+        return [tuple(r) for r in ranges]
+
+    def get_words(self):
+        """Get the data in the block as little-endian words."""
+        data = self.data + bytearray(-len(self.data) % 4)
+        return np.frombuffer(bytes(data), dtype="<u4")
+
+    def compact(self):
+        """Keep only the written ranges of the block."""
+        self.chunks = [(start, bytes(self.data[start:stop])) for start, stop
+                       in self.get_written_ranges()]
+        self.data = None
+        self.written = None
+
+    def get_relocated_chunks(self, offsets):
+        """Get the chunks of data with each pointer adjusted.
+
+        Parameters
+        ----------
+        offsets : :py:class:`numpy.ndarray`
+            Amount to add to pointers into each allocation.
+        """
+        for start, data in self.chunks:
+            data = bytearray(data)
+            for offset, target in self.relocations:
+                i = int(offset) - start
+                if 0 <= i <= len(data) - 4:
+                    pointer, = struct.unpack_from("<I", data, i)
+                    struct.pack_into(
+                        "<I", data, i,
+                        int(pointer + offsets[target]) & 0xffffffff)
+            yield start, bytes(data)
+
+
+class ImageController(object):
+    """Stand-in for a :py:class:`~rig.machine_control.MachineController`
+    which records the SDRAM allocated and written by the load functions of a
+    netlist instead of communicating with a machine.
+
+    Once the images have been written to a machine (see :py:meth:`~.load`)
+    the controller forwards every call to the controller for the machine,
+    translating addresses within the rendered allocations into the addresses
+    of the memory allocated on the machine.  Consequently the memory views
+    and addresses held by the netlist remain valid.
+
+    Parameters
+    ----------
+    shift : bool
+        If True then every allocation is placed a multiple of 4 bytes
+        further from the address at which it would otherwise be placed, the
+        multiple being 1 more than the index of the allocation.  Comparing
+        the images rendered with and without a shift reveals the pointers
+        they contain.
+    """
+    base_address = 0x60000000
+
+    def __init__(self, shift=False):
+        self.allocations = list()
+        self._shift = shift
+        self._next_address = dict()  # (x, y) -> next unshifted address
+        self._chip_allocations = collections.defaultdict(lambda: ([], []))
+        self._contexts = list()
+
+        # Controller and addresses of the machine once the images are loaded
+        self._target = None
+        self._offsets = None
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        state["_chip_allocations"] = None
+        state["_contexts"] = list()
+        state["_target"] = None
+        state["_offsets"] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._chip_allocations = collections.defaultdict(lambda: ([], []))
+        for allocation in self.allocations:
+            self._add_allocation(allocation)
+
+    def __getattr__(self, name):
+        # Any call which doesn't involve SDRAM is forwarded to the machine
+        target = self.__dict__.get("_target")
+        if target is None or name.startswith("_"):
+            raise AttributeError(
+                "{!r} has no attribute {!r} (images are not loaded onto a "
+                "machine)".format(type(self).__name__, name))
+        return getattr(target, name)
+
+    @contextlib.contextmanager
+    def __call__(self, **kwargs):
+        """Set default arguments (e.g., `x` and `y`) for calls made within a
+        `with` block, as for the machine controller.
+        """
+        self._contexts.append(kwargs)
+        try:
+            if self._target is not None:
+                with self._target(**kwargs):
+                    yield
+            else:
+                yield
+        finally:
+            self._contexts.pop()
+
+    def _get_default(self, name, value, default=None):
+        """Get the value of an argument, taking it from the current context
+        if it was not given.
+        """
+        if value is not None:
+            return value
+
+        for context in reversed(self._contexts):
+            if name in context:
+                return context[name]
+
+        if default is None:
+            raise TypeError("{} must be specified".format(name))
+        return default
+
+    def _add_allocation(self, allocation):
+        starts, allocations = self._chip_allocations[(allocation.x,
+                                                      allocation.y)]
+        i = bisect.bisect(starts, allocation.address)
+        starts.insert(i, allocation.address)
+        allocations.insert(i, allocation)
+
+    def _find(self, address, x, y):
+        """Find the rendered allocation containing an address.
+
+        Returns
+        -------
+        (:py:class:`~.SDRAMAllocation`, offset) or None
+            The allocation and the offset of the address within it.
+        """
+        candidates = [address]
+        if _UNBUFFERED_SDRAM[0] <= address < _UNBUFFERED_SDRAM[1]:
+            candidates.append(address - 0x10000000)
+
+        starts, allocations = self._chip_allocations[(x, y)]
+        for candidate in candidates:
+            i = bisect.bisect(starts, candidate) - 1
+            if i >= 0:
+                allocation = allocations[i]
+                offset = candidate - allocation.address
+                if offset < allocation.size:
+                    return allocation, offset
+
+        return None
+
+    def _translate(self, address, x, y):
+        """Translate a rendered address into an address on the machine."""
+        found = self._find(address, x, y)
+        if found is None:
+            return address
+
+        allocation, _ = found
+        return int(address + self._offsets[allocation.index]) & 0xffffffff
+
+    def sdram_alloc(self, size, tag=0, x=None, y=None, app_id=None,
+                    clear=False):
+        """Allocate a block of SDRAM and return its address."""
+        x = self._get_default("x", x)
+        y = self._get_default("y", y)
+
+        if self._target is not None:
+            return self._target.sdram_alloc(size, tag, x, y, clear=clear)
+
+        # Allocate the memory immediately after any previous allocation on
+        # the chip, keeping the memory word aligned.
+        address = self._next_address.get((x, y), self.base_address)
+        self._next_address[(x, y)] = address + size + (-size % 4)
+        if self._shift:
+            address += 4 * (len(self.allocations) + 1)
+
+        allocation = SDRAMAllocation(len(self.allocations), x, y, size, tag,
+                                     clear, address)
+        self.allocations.append(allocation)
+        self._add_allocation(allocation)
+        return address
+
+    def sdram_alloc_as_filelike(self, size, tag=0, x=None, y=None,
+                                app_id=None, clear=False):
+        """Allocate a block of SDRAM and return a file-like view of it."""
+        x = self._get_default("x", x)
+        y = self._get_default("y", y)
+        address = self.sdram_alloc(size, tag, x, y, app_id, clear)
+        return MemoryIO(self, x, y, address, address + size)
+
+    def write(self, address, data, x=None, y=None, p=None):
+        """Write data into SDRAM."""
+        x = self._get_default("x", x)
+        y = self._get_default("y", y)
+        p = self._get_default("p", p, 0)
+
+        if self._target is not None:
+            return self._target.write(self._translate(address, x, y), data,
+                                      x, y, p)
+
+        allocation, offset = self._find_rendered(address, len(data), x, y)
+        allocation.data[offset:offset + len(data)] = data
+        allocation.written.append((offset, offset + len(data)))
+
+    def read(self, address, length, x=None, y=None, p=None):
+        """Read data from SDRAM."""
+        x = self._get_default("x", x)
+        y = self._get_default("y", y)
+        p = self._get_default("p", p, 0)
+
+        if self._target is not None:
+            return self._target.read(self._translate(address, x, y), length,
+                                     x, y, p)
+
+        allocation, offset = self._find_rendered(address, length, x, y)
+        return bytes(allocation.data[offset:offset + length])
+
+    def sdram_free(self, ptr, x=None, y=None):
+        """Free a block of SDRAM."""
+        x = self._get_default("x", x)
+        y = self._get_default("y", y)
+
+        if self._target is None:
+            raise NotImplementedError(
+                "Memory cannot be freed while rendering images")
+        return self._target.sdram_free(self._translate(ptr, x, y), x, y)
+
+    def _find_rendered(self, address, length, x, y):
+        found = self._find(address, x, y)
+        if found is None or found[1] + length > found[0].size:
+            raise ValueError(
+                "Access to {} bytes at 0x{:08x} on chip ({}, {}) is not "
+                "within allocated SDRAM".format(length, address, x, y))
+        return found
+
+    def load(self, controller, timings=None):
+        """Allocate the memory on a machine and write the images into it.
+
+        Subsequent calls are forwarded to `controller`.
+        """
+        if timings is None:
+            timings = Timings()
+
+        with timings.time("allocate_sdram"):
+            addresses = np.array([
+                controller.sdram_alloc(a.size, a.tag, a.x, a.y,
+                                       clear=a.clear)
+                for a in self.allocations
+            ], dtype=np.int64)
+
+        self._offsets = addresses - np.array(
+            [a.address for a in self.allocations], dtype=np.int64)
+        self._target = controller
+
+        with timings.time("write_sdram_images"):
+            for allocation, address in zip(self.allocations, addresses):
+                for start, data in allocation.get_relocated_chunks(
+                        self._offsets):
+                    controller.write(int(address) + start, data,
+                                     allocation.x, allocation.y)
+
+        timings.count("n_sdram_allocations", len(self.allocations))
+
+
+def render_images(netlist, timings=None):
+    """Render the data written by the load functions of a placed and routed
+    netlist.
+
+    The load functions are called twice, the state they leave in the netlist
+    refers to the returned controller.
+
+    Returns
+    -------
+    :py:class:`~.ImageController`
+    """
+    if timings is None:
+        timings = Timings()
+
+    with timings.time("render/unshifted"):
+        unshifted = ImageController()
+        netlist.load_data(unshifted)
+
+    with timings.time("render/shifted"):
+        images = ImageController(shift=True)
+        netlist.load_data(images)
+
+    # Compare the renderings to find the pointers
+    with timings.time("render/relocate"):
+        if len(images.allocations) != len(unshifted.allocations):
+            raise BundleError("Load functions did not allocate the same "
+                              "memory when called again")
+
+        shifts = np.array([a.address - b.address for a, b in
+                           zip(images.allocations, unshifted.allocations)])
+        for a, b in zip(images.allocations, unshifted.allocations):
+            if ((a.x, a.y, a.size, a.tag) != (b.x, b.y, b.size, b.tag) or
+                    a.get_written_ranges() != b.get_written_ranges()):
+                raise BundleError("Load functions did not write the same "
+                                  "memory when called again")
+
+            words, other = a.get_words(), b.get_words()
+            offsets = np.flatnonzero(words != other)
+            deltas = (words[offsets] - other[offsets]).astype(np.int64)
+            targets = deltas // 4 - 1
+            if np.any((targets < 0) | (targets >= len(shifts)) |
+                      (deltas % 4 != 0)) or \
+                    np.any(shifts[targets.clip(0, len(shifts) - 1)] !=
+                           deltas):
+                raise BundleError(
+                    "Data written to chip ({}, {}) depends on the address "
+                    "of memory other than by containing pointers".format(
+                        a.x, a.y))
+
+            a.relocations = np.column_stack(
+                (offsets * 4, targets)).astype(np.uint32)
+
+        for allocation in images.allocations:
+            allocation.compact()
+
+    return images
+
+
+def make_system_info(n_boards):
+    """Construct a description of an ideal machine of SpiNN-5 boards, i.e.,
+    one in which every chip, core and link is working.
+
+    Multiple boards are assumed to be allocated in triads forming a torus,
+    as they are by spalloc.
+    """
+    if n_boards == 1:
+        width = height = 8
+        wrap_around = False
+    else:
+        width, height = standard_system_dimensions(
+            n_boards + (-n_boards % 3))
+        wrap_around = True
+
+    def exists(x, y):
+        if wrap_around:
+            return True
+        return 0 <= x < width and 0 <= y < height and x - y <= 4 and y - x <= 3
+
+    ethernet_chips = set(spinn5_eth_coords(width, height))
+    chips = dict()
+    for x in range(width):
+        for y in range(height):
+            if not exists(x, y):
+                continue
+
+            links = set(
+                link for link in Links if
+                exists(*(a + b for a, b in zip((x, y), link.to_vector())))
+            )
+            chips[(x, y)] = ChipInfo(
+                num_cores=18,
+                core_states=[AppState.run] + [AppState.idle] * 17,
+                working_links=links,
+                largest_free_sdram_block=100 * 2**20,
+                largest_free_sram_block=2**16,
+                largest_free_rtr_mc_block=1023,
+                ethernet_up=(x, y) in ethernet_chips,
+                ip_address=None,
+                local_ethernet_chip=spinn5_local_eth_coord(x, y,
+                                                           width, height),
+            )
+
+    return SystemInfo(width, height, chips)
+
+
+class Bundle(object):
+    """A compiled model.
+
+    Attributes
+    ----------
+    dt : float
+    period : float or None
+    timescale : float
+        Parameters of the simulator for which the model was compiled.
+    n_boards : int or None
+        Number of boards in the machine for which the model was compiled, or
+        None if it was compiled for a specific machine.
+    fingerprint : str or None
+        Fingerprint of the network (see
+        :py:func:`~nengo_spinnaker.builder.cache.get_network_fingerprint`), or
+        None if the network could not be fingerprinted.
+    routing_tables : {(x, y): [RoutingTableEntry, ...], ...}
+        Minimised routing tables.
+    state : bytes
+        Pickled state of the built model, its IO controller and the netlist
+        (including the :py:class:`~.ImageController` containing the SDRAM
+        images), references to objects in the network are replaced by
+        placeholders.
+    versions : str
+        Versions of the software which compiled the bundle.
+    """
+    def __init__(self, dt, period, timescale, n_boards, fingerprint,
+                 routing_tables, state, versions=None):
+        self.dt = dt
+        self.period = period
+        self.timescale = timescale
+        self.n_boards = n_boards
+        self.fingerprint = fingerprint
+        self.routing_tables = routing_tables
+        self.state = state
+        self.versions = get_versions_string() if versions is None else versions
+
+    @classmethod
+    def from_model(cls, network, model, io_controller, netlist, system_info,
+                   dt, period, timescale, n_boards, fingerprint,
+                   timings=None):
+        """Compile a bundle from a placed and routed netlist."""
+        if timings is None:
+            timings = Timings()
+
+        routing_tables = netlist.get_routing_tables(system_info, timings)
+        netlist.images = render_images(netlist, timings)
+
+        with timings.time("pickle_bundle"):
+            state = dumps(
+                get_model_state(network, model, io_controller, netlist),
+                get_network_objects(network)
+            )
+
+        return cls(dt, period, timescale, n_boards, fingerprint,
+                   routing_tables, state)
+
+    def restore(self, network, model, io_controller):
+        """Restore the model and IO controller and return the netlist.
+
+        The images of the netlist are stored in its `images` attribute.
+        """
+        state = loads(self.state, get_network_objects(network))
+        netlist = set_model_state(state, network, model, io_controller)
+        model.keyspaces = netlist.keyspaces
+        return netlist
+
+    def check_machine(self, netlist, system_info):
+        """Check that the netlist of the bundle may be loaded onto a
+        machine.
+
+        Raises
+        ------
+        BundleError
+            If any core, link or routing table entry required by the bundle
+            is not available.
+        """
+        def fail(message, *args):
+            raise BundleError(
+                (message + ", the bundle must be compiled for this "
+                 "machine").format(*args))
+
+        # Check that the cores are available
+        for vertex, (x, y) in iteritems(netlist.placements):
+            if (x, y) not in system_info:
+                fail("Chip ({}, {}) is not working", x, y)
+
+            cores = netlist.allocations[vertex][Cores]
+            states = system_info[(x, y)].core_states
+            for p in range(cores.start, cores.stop):
+                if p >= len(states) or states[p] is not AppState.idle:
+                    fail("Core ({}, {}, {}) is not available", x, y, p)
+
+        # Check that the routing tables fit and that the links they route
+        # packets along are working.
+        for (x, y), table in iteritems(self.routing_tables):
+            if (x, y) not in system_info:
+                fail("Chip ({}, {}) is not working", x, y)
+
+            chip = system_info[(x, y)]
+            if len(table) > chip.largest_free_rtr_mc_block:
+                fail("The routing table of chip ({}, {}) has {} entries but "
+                     "only {} are free", x, y, len(table),
+                     chip.largest_free_rtr_mc_block)
+
+            for entry in table:
+                for route in entry.route:
+                    if route.is_link and \
+                            Links(int(route)) not in chip.working_links:
+                        fail("Link {} of chip ({}, {}) is not working",
+                             Links(int(route)).name, x, y)
+
+        # Check that the memory is available
+        sdram = collections.defaultdict(int)
+        for allocation in netlist.images.allocations:
+            sdram[(allocation.x, allocation.y)] += allocation.size
+        for (x, y), size in iteritems(sdram):
+            if size > system_info[(x, y)].largest_free_sdram_block:
+                fail("Chip ({}, {}) has insufficient free SDRAM", x, y)
+
+    def load(self, controller, netlist, timings=None):
+        """Load the bundle onto a machine.
+
+        Returns
+        -------
+        :py:class:`~.ImageController`
+            Controller which must be used to communicate with the machine
+            for the remainder of the simulation.
+        """
+        if timings is None:
+            timings = Timings()
+
+        timings.count("n_routing_entries",
+                      sum(len(t) for t in itervalues(self.routing_tables)))
+        with timings.time("load_routing_tables"):
+            controller.load_routing_tables(self.routing_tables)
+
+        netlist.images.load(controller, timings)
+
+        with timings.time("load_application"):
+            netlist._load_executables(controller)
+
+        return netlist.images
+
+    def save(self, filename):
+        """Save the bundle to a file."""
+        with open(filename, "wb") as f:
+            pickle.dump((BUNDLE_VERSION, self.__dict__), f,
+                        pickle.HIGHEST_PROTOCOL)
+
+    @classmethod
+    def load_file(cls, filename):
+        """Load a bundle from a file."""
+        with open(filename, "rb") as f:
+            version, state = pickle.load(f)
+
+        if version != BUNDLE_VERSION:
+            raise BundleError("Bundle format version {} is not supported "
+                              "(expected {})".format(version, BUNDLE_VERSION))
+
+        bundle = cls.__new__(cls)
+        bundle.__dict__.update(state)
+
+        if bundle.versions != get_versions_string():
+            logger.warning("Bundle was compiled with %s but %s is in use",
+                           bundle.versions, get_versions_string())
+
+        return bundle
@@ -1,6 +1,7 @@
 """Nengo/SpiNNaker specific configuration."""
 import nengo
-from nengo.params import BoolParam, DictParam, NumberParam, Parameter
+from nengo.params import (BoolParam, DictParam, EnumParam, IntParam,
+                          NumberParam, Parameter)
 from rig import place_and_route as par
 
 from nengo_spinnaker.node_io import Ethernet
@@ -40,12 +41,52 @@ def add_spinnaker_params(config):
     _set_param(config[Simulator], "node_io", Parameter, default=Ethernet)
     _set_param(config[Simulator], "node_io_kwargs", DictParam, default={})
 
+    # Overlap host processing with simulation when running for more than one
+    # period.
+    _set_param(config[Simulator], "pipelined_runs", BoolParam, default=False)
+
+    # Determine how the host network keeps pace with the machine: whether late
+    # steps are executed as soon as possible or skipped, and how long before
+    # each step to stop sleeping and start spinning.
+    _set_param(config[Simulator], "host_step_policy", EnumParam,
+               default="catch_up", values=("catch_up", "skip"))
+    _set_param(config[Simulator], "host_spin_time", NumberParam,
+               default=1e-4, low=0.0)
+
+    # Simulate the host network in a separate process, exchanging Node values
+    # with the IO controller through shared memory.
+    _set_param(config[Simulator], "host_process", BoolParam, default=False)
+
+    # Allocate and boot the machine while the model is being built, the
+    # number of boards to allocate with spalloc is estimated from the network
+    # unless it is given.
+    _set_param(config[Simulator], "allocate_during_build", BoolParam,
+               default=False)
+    _set_param(config[Simulator], "n_boards", IntParam,
+               default=None, low=1, optional=True)
+
+    # Time to wait at synchronisation barriers (in addition to the expected
+    # length of any simulation) before assuming that cores have failed.
+    _set_param(config[Simulator], "sync_timeout", NumberParam,
+               default=10.0, low=0.0, low_open=True)
+
+    # Number of the most recent samples kept by each probe when simulating
+    # indefinitely (i.e., with period=None).
+    _set_param(config[Simulator], "indefinite_probe_steps", IntParam,
+               default=10000, low=1)
+
     # Add function_of_time parameters to Nodes
     _set_param(config[nengo.Node], "function_of_time", BoolParam,
                default=False)
     _set_param(config[nengo.Node], "function_of_time_period",
                NumberParam, default=None, optional=True)
 
+    # Add a parameter controlling the transmission of values to Nodes from the
+    # machine.  The period (in seconds) between packets defaults to that of
+    # the IO controller if it is None.
+    _set_param(config[nengo.Node], "transmission_period", NumberParam,
+               default=None, low=0.0, optional=True)
+
     # Add optimisation control parameters to (passthrough) Nodes. None means
     # that a heuristic will be used to determine if the passthrough Node should
     # be removed.
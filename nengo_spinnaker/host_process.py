@@ -0,0 +1,260 @@
+"""Simulate the host network in a separate process.
+
+The network simulated on the host and the IO thread which exchanges Node
+values with the machine normally share the interpreter lock, so Nodes which
+take a long time to compute delay the handling of received packets (and vice
+versa).  When the ``host_process`` config option is set the host network is
+instead simulated by a worker process forked from the simulator once it has
+been built.  The IO controller remains in the simulator's process and Node
+values are exchanged with the worker through
+:py:class:`~nengo_spinnaker.builder.node.NodeInputBuffer` objects in shared
+memory:
+
+- Inputs received by the IO controller are read by the worker without
+  locking.
+- The outputs of the Nodes simulated by the worker are written to shared
+  buffers, after each step in which outputs were written the worker notifies
+  the simulator's process (through a pipe) which transmits them.
+
+The simulator's process only controls the machine and the worker, and
+handles probed data.  Consequently any state changed by Node functions during
+a simulation is changed in the worker process, not in the simulator's
+process.  Probe data recorded on the host is returned to the simulator's
+process after each simulation.
+"""
+import collections
+import multiprocessing
+import os
+import select
+import traceback
+
+from .builder.node import InputNode, NodeInputBuffer, OutputNode
+from .utils.realtime import RealTimeLoop
+
+
+class HostProcess(object):
+    """Simulates the host network of a simulator in a forked worker process.
+
+    Parameters
+    ----------
+    simulator : :py:class:`~nengo_spinnaker.Simulator`
+        Simulator whose host network should be simulated, the IO controller
+        of the simulator must perform its IO in the thread returned by its
+        `spawn` method.
+    """
+    def __init__(self, simulator):
+        # The worker must be forked so that it inherits the built simulator
+        try:
+            context = multiprocessing.get_context("fork")
+        except AttributeError:  # pragma: no cover
+            context = multiprocessing  # Python 2 always forks
+        except ValueError:
+            raise ValueError("The host_process config option requires "
+                             "processes to be forked, which is not "
+                             "supported on this platform")
+
+        self.simulator = simulator
+        io_controller = simulator.io_controller
+
+        # Move the inputs of the Nodes into shared memory and create shared
+        # buffers for the outputs of the Nodes.
+        for node_input in io_controller.node_input.values():
+            node_input.share()
+
+        self.node_output = collections.OrderedDict()
+        for node in io_controller.host_network.all_nodes:
+            if isinstance(node, OutputNode):
+                self.node_output[node.target] = NodeInputBuffer(node.size_in)
+                self.node_output[node.target].share()
+        self._sequences = {node: 0 for node in self.node_output}
+
+        # Create the pipes used to control the worker and to be notified of
+        # new outputs and then start the worker.
+        self._notify_in, self._notify_out = os.pipe()
+        self._conn, worker_conn = multiprocessing.Pipe()
+        self._stop_event = multiprocessing.Event()
+
+        self.process = context.Process(
+            target=_HostProcessWorker(self, worker_conn).serve,
+            name="HostProcess"
+        )
+        self.process.daemon = True
+        self.process.start()
+        worker_conn.close()
+
+    def run(self, steps):
+        """Simulate the host network for `steps` steps (or until
+        :py:meth:`~.stop` is called if `steps` is None) while transmitting the
+        outputs of its Nodes, and return the number of steps simulated.
+
+        The host step timings and the data recorded by probes on the host are
+        updated in the simulator.
+        """
+        self._stop_event.clear()
+        self._conn.send(("run", (steps, )))
+
+        # Transmit outputs whenever notified until the simulation finishes
+        while True:
+            readable, _, _ = select.select(
+                [self._conn, self._notify_in], [], [])
+            if self._notify_in in readable:
+                os.read(self._notify_in, 4096)
+                self._transmit()
+
+            if self._conn in readable:
+                break
+
+        self._transmit()
+        steps_elapsed, host_step_timings, probe_buffers = self._result()
+
+        # Use the data recorded by the worker
+        sim = self.simulator
+        sim.host_step_timings = host_step_timings
+        for node, buffer in zip(sim._probe_nodes, probe_buffers):
+            node.buffer = buffer
+            sim.data.attach(node.probe, buffer)
+
+        return steps_elapsed
+
+    def stop(self):
+        """Stop a simulation started by :py:meth:`~.run` with `steps` None,
+        this may be called from any thread.
+        """
+        self._stop_event.set()
+
+    def reset(self, seed=None):
+        """Reset the host network and the data recorded by probes on the
+        host.
+        """
+        self._conn.send(("reset", (seed, )))
+        self._result()
+
+    def close(self):
+        """Stop the worker process."""
+        if self._conn.closed:
+            return  # Already closed
+
+        if self.process.is_alive():
+            try:
+                self._conn.send(("close", ()))
+            except IOError:  # pragma: no cover
+                pass
+            self.process.join(1.0)
+            if self.process.is_alive():  # pragma: no cover
+                self.process.terminate()
+                self.process.join()
+
+        self._conn.close()
+        os.close(self._notify_in)
+        os.close(self._notify_out)
+
+    def _transmit(self):
+        """Transmit any new outputs of the host network."""
+        io_controller = self.simulator.io_controller
+        for node, node_output in self.node_output.items():
+            sequence = node_output.sequence
+            if sequence != self._sequences[node]:
+                self._sequences[node] = sequence
+                io_controller.set_node_output(node, node_output.read())
+        io_controller.end_step()
+
+    def _result(self):
+        """Get the result of a command, re-raising any error which occurred
+        in the worker.
+        """
+        status, result = self._conn.recv()
+        if status == "error":
+            raise Exception("Error in the host network process:\n" + result)
+        return result
+
+
+class _HostProcessWorker(object):
+    """Serves the commands sent to the worker process, this is used after the
+    process has been forked.
+    """
+    def __init__(self, host_process, conn):
+        self.host_process = host_process
+        self.conn = conn
+
+    def serve(self):
+        """Perform the commands sent to the worker until it is closed."""
+        sim = self.host_process.simulator
+        self.host_process._conn.close()
+        os.close(self.host_process._notify_in)
+
+        # The Nodes of the host network use the shared buffers rather than
+        # the IO controller, which is used by the simulator's process.
+        io = _WorkerIO(sim.io_controller.node_input,
+                       self.host_process.node_output,
+                       self.host_process._notify_out)
+        for node in sim.io_controller.host_network.all_nodes:
+            if isinstance(node, (InputNode, OutputNode)):
+                node.controller = io
+        sim.io_controller = io
+
+        while True:
+            command, args = self.conn.recv()
+            if command == "close":
+                break
+
+            try:
+                result = getattr(self, command)(*args)
+            except Exception:
+                self.conn.send(("error", traceback.format_exc()))
+            else:
+                self.conn.send(("ok", result))
+
+    def run(self, steps):
+        """Simulate the host network in real time."""
+        sim = self.host_process.simulator
+        stop_event = self.host_process._stop_event
+        loop = RealTimeLoop(sim.dt / sim.timescale, sim.host_step_policy,
+                            sim.host_spin_time, sim.host_step_timings)
+
+        def step():
+            if stop_event.is_set():
+                loop.stop()
+            sim._step_host()
+
+        sim._host_loop = loop
+        try:
+            loop.run(step, steps)
+        finally:
+            sim._host_loop = None
+
+        return (loop.steps_elapsed, sim.host_step_timings,
+                [node.buffer for node in sim._probe_nodes])
+
+    def reset(self, seed):
+        """Reset the host network."""
+        sim = self.host_process.simulator
+        sim.data.clear()
+        sim._reset_host(seed)
+
+
+class _WorkerIO(object):
+    """Exchanges the Node values of the host network simulated by the worker
+    process through shared buffers.
+    """
+    def __init__(self, node_input, node_output, notify_fd):
+        self.node_input = node_input
+        self.node_output = node_output
+        self.notify_fd = notify_fd
+        self._changed = False
+
+    def get_node_input(self, node):
+        """Get the most recent input received for a Node."""
+        return self.node_input[node].read()
+
+    def set_node_output(self, node, value):
+        """Publish the output of a Node."""
+        self.node_output[node].write(value)
+        self._changed = True
+
+    def end_step(self):
+        """Notify the simulator's process if any outputs were published
+        during the step.
+        """
+        if self._changed:
+            self._changed = False
+            os.write(self.notify_fd, b"\0")
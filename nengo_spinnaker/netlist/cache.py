@@ -0,0 +1,198 @@
+"""Caching of the results of placing and routing netlists.
+
+Placing and routing a large netlist, and subsequently allocating keys and
+cluster IDs, can take a long time.  Since the same netlist is often simulated
+repeatedly on the same SpiNNaker machine the results are stored on disk,
+identified by a fingerprint of the netlist, the machine and the place and route
+functions, and restored when the same netlist is placed and routed again.
+"""
+import hashlib
+import logging
+from six import iteritems, itervalues
+
+from nengo_spinnaker.netlist import key_allocation, utils
+from nengo_spinnaker.utils.cache import (describe, dumps, loads,
+                                         qualified_name, UndescribableError)
+
+logger = logging.getLogger(__name__)
+
+
+def get_place_and_route_cache_key(netlist, system_info, *args):
+    """Get a key which identifies the result of placing and routing a netlist
+    onto a SpiNNaker machine.
+
+    Parameters
+    ----------
+    netlist : :py:class:`~nengo_spinnaker.netlist.Netlist`
+        Netlist which is to be placed and routed, must not yet have been
+        placed and routed.
+    system_info : \
+            :py:class:`~rig.machine_control.MachineController.SystemInfo`
+        Description of the machine onto which the netlist will be placed and
+        routed.
+    *args :
+        Further arguments (e.g., place and route functions and their keyword
+        arguments) which affect the result of placing and routing.
+
+    Returns
+    -------
+    str or None
+        The key, or None if the netlist or arguments cannot be described (in
+        which case the result should not be cached).
+    """
+    try:
+        return _get_place_and_route_fingerprint(netlist, system_info, *args)
+    except UndescribableError as err:
+        logger.info("Not caching place and route results: %s", err)
+        return None
+
+
+def _get_place_and_route_fingerprint(netlist, system_info, *args):
+    """Fingerprint a netlist, the machine and the place and route arguments.
+    """
+    vertices, signals, operators = _get_netlist_objects(netlist)
+    index = {id(obj): i for i, obj in
+             enumerate(vertices + signals + operators)}
+
+    # Describe the vertices, the operators to which they belong, the nets
+    # which connect them and the constraints upon placement and key
+    # allocation.
+    fingerprint = hashlib.sha1()
+    for vertex in vertices:
+        fingerprint.update(describe(
+            (type(vertex), vertex.application, vertex.resources), index
+        ).encode("utf-8"))
+
+    fingerprint.update(describe(
+        [vxs for vxs in itervalues(netlist.operator_vertices)], index
+    ).encode("utf-8"))
+
+    for signal in signals:
+        net = netlist.nets[signal]
+        fingerprint.update(describe(
+            (index.get(id(signal.source)), signal.width, signal.weight,
+             repr(signal.keyspace), net.sources, net.sinks, net.weight),
+            index
+        ).encode("utf-8"))
+
+    fingerprint.update(describe(
+        [(qualified_name(type(c)), vars(c)) for c in netlist.constraints],
+        index
+    ).encode("utf-8"))
+    fingerprint.update(
+        describe(netlist.signal_id_constraints, index).encode("utf-8"))
+
+    # Describe the machine
+    fingerprint.update(describe(
+        (system_info.width, system_info.height, dict(system_info))
+    ).encode("utf-8"))
+
+    # Describe the remaining arguments, the place and route functions are
+    # identified by their qualified names.
+    fingerprint.update(describe(
+        [qualified_name(arg) if callable(arg) else arg for arg in args], index
+    ).encode("utf-8"))
+
+    return fingerprint.hexdigest()
+
+
+def store_place_and_route(cache, key, netlist, derived_nets, signal_ids):
+    """Store the result of placing and routing a netlist in the cache.
+
+    Parameters
+    ----------
+    derived_nets : {NMNet: {(x, y): :py:class:`~rig.netlist.Net`, ...}, ...}
+        Map from nets in the netlist to the nets which were routed, as
+        returned by :py:func:`~nengo_spinnaker.netlist.utils.\
+get_nets_for_routing`.
+    signal_ids : {Signal: int, ...}
+        Connection IDs assigned to signals, as returned by
+        :py:func:`~nengo_spinnaker.netlist.key_allocation.\
+allocate_signal_keyspaces`.
+    """
+    vertices, signals, _ = _get_netlist_objects(netlist)
+    signal_indices = {s: i for i, s in enumerate(signals)}
+
+    state = {
+        "placements": [netlist.placements[v] for v in vertices],
+        "allocations": [netlist.allocations[v] for v in vertices],
+        "clusters": [v.cluster for v in vertices],
+        "routes": [
+            {xy: netlist.routes[net] for xy, net in
+             iteritems(derived_nets[netlist.nets[signal]])}
+            for signal in signals
+        ],
+        "signal_ids": sorted((signal_indices[s], i) for s, i in
+                             iteritems(signal_ids)),
+    }
+
+    # Routing trees refer to their sink vertices, these are replaced with
+    # placeholders.
+    try:
+        data = dumps(state, vertices)
+    except Exception as err:
+        logger.warning("Place and route results could not be cached: %s",
+                       err)
+        return
+
+    cache.put(key, data)
+
+
+def load_place_and_route(cache, key, netlist):
+    """Restore the result of placing and routing a netlist from the cache.
+
+    If the cache contains an entry for the given key then the placements,
+    allocations, routes, signal keyspaces and cluster IDs of the netlist are
+    restored and the map from nets in the netlist to the nets which were routed
+    is returned; otherwise None is returned and the netlist is not modified.
+    """
+    data = cache.get(key)
+    if data is None:
+        logger.info("Place and route cache miss (%s)", key)
+        return None
+
+    vertices, signals, _ = _get_netlist_objects(netlist)
+    try:
+        state = loads(data, vertices)
+    except Exception as err:
+        logger.warning("Cached place and route results could not be "
+                       "loaded: %s", err)
+        return None
+
+    logger.info("Place and route cache hit (%s)", key)
+
+    # Restore the placements and allocations
+    netlist.placements = dict(zip(vertices, state["placements"]))
+    netlist.allocations = dict(zip(vertices, state["allocations"]))
+
+    # Reconstruct the nets which were routed and restore their routes
+    vertices_resources = {v: v.resources for v in vertices}
+    derived_nets = utils.get_nets_for_routing(
+        vertices_resources, netlist.nets, netlist.placements,
+        netlist.allocations
+    )[-1]
+
+    netlist.routes = dict()
+    for signal, routes in zip(signals, state["routes"]):
+        for xy, net in iteritems(derived_nets[netlist.nets[signal]]):
+            netlist.routes[net] = routes[xy]
+
+    # Restore the keyspaces and the cluster IDs
+    key_allocation.assign_signal_keyspaces(
+        {signals[s]: i for s, i in state["signal_ids"]}, netlist.keyspaces
+    )
+
+    for vertex, cluster in zip(vertices, state["clusters"]):
+        vertex.cluster = cluster
+
+    return derived_nets
+
+
+def _get_netlist_objects(netlist):
+    """Get lists of the vertices, signals and operators in a netlist in a
+    stable order.
+    """
+    vertices = list(netlist.vertices)
+    signals = list(netlist.nets)
+    operators = list(netlist.operator_vertices)
+    return vertices, signals, operators
@@ -7,6 +7,15 @@ logger = logging.getLogger(__name__)
 
 
 def allocate_signal_keyspaces(signal_routes, signal_id_constraints, keyspaces):
+    """Assign keyspaces to all signals which do not already have one.
+
+    Returns
+    -------
+    {Signal: int, ...}
+        Map from signals to the connection IDs they were assigned, may be
+        passed to :py:func:`~.assign_signal_keyspaces` to repeat the
+        assignment.
+    """
     # Filter signals and routes to be only those without a keyspace
     signal_routes = {signal: routes for signal, routes in
                      iteritems(signal_routes) if
@@ -16,16 +25,25 @@ def allocate_signal_keyspaces(signal_routes, signal_id_constraints, keyspaces):
     signal_ids = assign_mn_net_ids(signal_routes, signal_id_constraints)
 
     # Assign keyspaces to the signals
+    assign_signal_keyspaces(signal_ids, keyspaces)
+
+    if (signal_ids):
+        logger.info("%u signals assigned %u IDs", len(signal_ids),
+                    max(itervalues(signal_ids)) + 1)
+
+    return signal_ids
+
+
+def assign_signal_keyspaces(signal_ids, keyspaces):
+    """Assign keyspaces to signals using previously determined connection
+    IDs.
+    """
     for signal, i in iteritems(signal_ids):
         signal.keyspace = keyspaces["nengo"](connection_id=i)
 
         # Expand the keyspace to fit the required indices
         signal.keyspace(index=signal.width - 1)
 
-    if (signal_ids):
-        logger.info("%u signals assigned %u IDs", len(signal_ids),
-                    max(itervalues(signal_ids)) + 1)
-
 
 def assign_mn_net_ids(nets_routes, prior_constraints=None):
     """Assign identifiers to multiple-source multicast nets such that
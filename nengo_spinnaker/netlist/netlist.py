@@ -14,6 +14,10 @@ from rig.machine_control.utils import sdram_alloc_for_vertices
 from six import iteritems, itervalues
 
 from nengo_spinnaker.netlist import key_allocation, utils
+from nengo_spinnaker.netlist.cache import (get_place_and_route_cache_key,
+                                           load_place_and_route,
+                                           store_place_and_route)
+from nengo_spinnaker.utils.timings import Timings, function_name
 
 logger = logging.getLogger(__name__)
 
@@ -42,7 +46,16 @@ class Netlist(object):
     after_simulation_functions : [`fn(netlist, simulator, n_steps)`, ...]
         List of functions which will be called to clean the executables after a
         number of simulation steps.  Each must accept a netlist, the simulator
-        and a number of simulation steps.
+        and a number of simulation steps and may return a function, accepting
+        no arguments, which completes processing of the retrieved data.
+    prepare_simulation_functions : \
+            [`fn(netlist, simulator, start_step, n_steps)`, ...]
+        List of functions which will be called to precompute data for a future
+        simulation.  These must not communicate with the machine and may be
+        called while it is simulating.
+    reset_functions : [`fn(netlist, controller)`, ...]
+        List of functions which will be called to restore any state held in
+        the memory of the machine when the application is reset.
     placements : {vertex: (x, y), ...}
         Map from vertices to the chips on which they are placed.
     allocations : {vertex: {resource: allocation, ...}, ...}
@@ -56,7 +69,9 @@ class Netlist(object):
     def __init__(self, nets, operator_vertices, keyspaces, constraints=list(),
                  load_functions=list(), before_simulation_functions=list(),
                  after_simulation_functions=list(),
-                 signal_id_constraints=dict()):
+                 signal_id_constraints=dict(),
+                 prepare_simulation_functions=list(),
+                 reset_functions=list()):
         # Store given parameters
         self.nets = nets
         self.operator_vertices = operator_vertices
@@ -65,6 +80,8 @@ class Netlist(object):
         self.load_functions = list(load_functions)
         self.before_simulation_functions = list(before_simulation_functions)
         self.after_simulation_functions = list(after_simulation_functions)
+        self.prepare_simulation_functions = list(prepare_simulation_functions)
+        self.reset_functions = list(reset_functions)
         self.signal_id_constraints = signal_id_constraints
 
         # Create containers for the attributes that are filled in by place and
@@ -91,7 +108,9 @@ class Netlist(object):
                         allocate=place_and_route.allocate,
                         allocate_kwargs={},
                         route=place_and_route.route,
-                        route_kwargs={}):
+                        route_kwargs={},
+                        cache=None,
+                        timings=None):
         """Place and route the netlist onto the given SpiNNaker machine.
 
         Parameters
@@ -116,6 +135,63 @@ class Netlist(object):
             Router function. Must support the interface defined by Rig.
         route_kwargs : dict
             Keyword arguments for the router function.
+        cache : :py:class:`~nengo_spinnaker.utils.cache.FileCache` or None
+            If provided, the results of placing and routing are restored from
+            this cache when the same netlist has previously been placed and
+            routed onto the same machine, and are otherwise stored in it.
+        timings : :py:class:`~nengo_spinnaker.utils.timings.Timings` or None
+            If provided, the time taken by each phase of placing and routing
+            is recorded in this object.
+        """
+        if timings is None:
+            timings = Timings()
+
+        # Attempt to restore the results of placing and routing from the cache
+        cache_key = None
+        derived_nets = None
+        if cache is not None:
+            with timings.time("load_place_and_route_cache"):
+                cache_key = get_place_and_route_cache_key(
+                    self, system_info, place, place_kwargs, allocate,
+                    allocate_kwargs, route, route_kwargs
+                )
+                if cache_key is not None:
+                    derived_nets = load_place_and_route(cache, cache_key,
+                                                        self)
+
+        if derived_nets is None:
+            derived_nets, signal_ids = self._place_and_route(
+                system_info, place, place_kwargs, allocate, allocate_kwargs,
+                route, route_kwargs, timings
+            )
+
+            # Store the results in the cache
+            if cache_key is not None:
+                store_place_and_route(cache, cache_key, self, derived_nets,
+                                      signal_ids)
+
+        with timings.time("allocate_keys"):
+            # Get a map from the nets we will route with to keyspaces
+            self.net_keyspaces = utils.get_net_keyspaces(
+                self.placements, self.nets, derived_nets)
+
+            # Fix all keyspaces
+            self.keyspaces.assign_fields()
+
+        timings.count("n_cores", self.n_cores)
+        timings.count("n_chips", len(set(itervalues(self.placements))))
+        timings.count("n_nets", len(self.net_keyspaces))
+
+    def _place_and_route(self, system_info, place, place_kwargs, allocate,
+                         allocate_kwargs, route, route_kwargs, timings):
+        """Place and route the netlist and assign keyspaces and cluster IDs.
+
+        Returns
+        -------
+        {NMNet: {(x, y): :py:class:`~rig.netlist.Net`, ...}, ...}
+            Map from nets to the derived nets which were routed.
+        {Signal: int, ...}
+            Connection IDs assigned to signals.
         """
         # Generate a Machine and set of core-reserving constraints to prevent
         # the use of non-idle cores.
@@ -129,11 +205,13 @@ class Netlist(object):
 
         # Perform placement and allocation
         place_nets = list(utils.get_nets_for_placement(itervalues(self.nets)))
-        self.placements = place(vertices_resources, place_nets, machine,
-                                constraints, **place_kwargs)
-        self.allocations = allocate(vertices_resources, place_nets, machine,
-                                    constraints, self.placements,
-                                    **allocate_kwargs)
+        with timings.time("place"):
+            self.placements = place(vertices_resources, place_nets, machine,
+                                    constraints, **place_kwargs)
+        with timings.time("allocate"):
+            self.allocations = allocate(vertices_resources, place_nets,
+                                        machine, constraints, self.placements,
+                                        **allocate_kwargs)
 
         # Get the nets for routing
         (route_nets,
@@ -145,9 +223,10 @@ class Netlist(object):
 
         # Finally, route all nets using the extended resource dictionary,
         # placements and allocations.
-        self.routes = route(vertices_resources, route_nets, machine,
-                            constraints, extended_placements,
-                            extended_allocations, **route_kwargs)
+        with timings.time("route"):
+            self.routes = route(vertices_resources, route_nets, machine,
+                                constraints, extended_placements,
+                                extended_allocations, **route_kwargs)
 
         # Assign keyspaces based on the placement
         signal_routes = collections.defaultdict(collections.deque)
@@ -155,55 +234,130 @@ class Netlist(object):
             for net in itervalues(derived_nets[nmnet]):
                 signal_routes[signal].append(self.routes[net])
 
-        key_allocation.allocate_signal_keyspaces(signal_routes,
-                                                 self.signal_id_constraints,
-                                                 self.keyspaces)
-
-        # Assign cluster IDs based on the placement and the routing
-        key_allocation.assign_cluster_ids(self.operator_vertices,
-                                          signal_routes,
-                                          self.placements)
+        with timings.time("allocate_keys"):
+            signal_ids = key_allocation.allocate_signal_keyspaces(
+                signal_routes, self.signal_id_constraints, self.keyspaces)
 
-        # Get a map from the nets we will route with to keyspaces
-        self.net_keyspaces = utils.get_net_keyspaces(
-            self.placements, self.nets, derived_nets)
+            # Assign cluster IDs based on the placement and the routing
+            key_allocation.assign_cluster_ids(self.operator_vertices,
+                                              signal_routes,
+                                              self.placements)
 
-        # Fix all keyspaces
-        self.keyspaces.assign_fields()
+        return derived_nets, signal_ids
 
-    def load_application(self, controller, system_info):
+    def load_application(self, controller, system_info, timings=None):
         """Load the netlist to a SpiNNaker machine.
 
         Parameters
         ----------
         controller : :py:class:`~rig.machine_control.MachineController`
             Controller to use to communicate with the machine.
+        timings : :py:class:`~nengo_spinnaker.utils.timings.Timings` or None
+            If provided, the time taken by each phase of loading (including
+            each load function) is recorded in this object.
         """
-        # Build and load the routing tables, first by building a mapping from
-        # nets to keys and masks.
-        logger.debug("Loading routing tables")
+        if timings is None:
+            timings = Timings()
+
+        # Build and load the routing tables
+        routing_tables = self.get_routing_tables(system_info, timings)
+        with timings.time("load_routing_tables"):
+            controller.load_routing_tables(routing_tables)
+
+        # Allocate memory and write the data for each vertex
+        self.load_data(controller, timings)
+
+        # Load the applications onto the machine
+        with timings.time("load_application"):
+            self._load_executables(controller)
+
+    def get_routing_tables(self, system_info, timings=None):
+        """Get the minimised routing tables for the placed and routed
+        netlist.
+
+        Returns
+        -------
+        {(x, y): [:py:class:`~rig.routing_table.RoutingTableEntry`, ...], ...}
+        """
+        if timings is None:
+            timings = Timings()
+
+        # Build a mapping from nets to keys and masks.
+        logger.debug("Building routing tables")
         net_keys = {n: (ks.get_value(tag=self.keyspaces.routing_tag),
                         ks.get_mask(tag=self.keyspaces.routing_tag))
                     for n, ks in iteritems(self.net_keyspaces)}
 
-        routing_tables = routing_tree_to_tables(self.routes, net_keys)
-        target_lengths = build_routing_table_target_lengths(system_info)
-        routing_tables = minimise_tables(routing_tables, target_lengths)
+        with timings.time("minimise_routing_tables"):
+            routing_tables = routing_tree_to_tables(self.routes, net_keys)
+            target_lengths = build_routing_table_target_lengths(system_info)
+            routing_tables = minimise_tables(routing_tables, target_lengths)
+
+        timings.count("n_routing_entries",
+                      sum(len(t) for t in itervalues(routing_tables)))
+        return routing_tables
+
+    def load_data(self, controller, timings=None):
+        """Allocate memory to each vertex and call each load function to
+        write the data for the vertices into memory.
 
-        controller.load_routing_tables(routing_tables)
+        `controller` need not communicate with a machine, it may instead
+        record the allocations and writes (see
+        :py:class:`~nengo_spinnaker.bundle.ImageController`).
+        """
+        if timings is None:
+            timings = Timings()
 
         # Assign memory to each vertex as required
         logger.debug("Assigning application memory")
-        self.vertices_memory = sdram_alloc_for_vertices(
-            controller, self.placements, self.allocations
-        )
+        with timings.time("allocate_sdram"):
+            self.vertices_memory = sdram_alloc_for_vertices(
+                controller, self.placements, self.allocations
+            )
 
         # Call each loading function in turn
         logger.debug("Loading data")
         for fn in self.load_functions:
+            with timings.time("load/" + function_name(fn)):
+                fn(self, controller)
+
+    def reset_application(self, controller, timeout=5.0):
+        """Return the application loaded to a SpiNNaker machine to the state
+        it was in immediately after it was loaded.
+
+        The executables are stopped and reloaded, the routing tables and the
+        data written into memory by the load functions are left in place.
+        Only state which is held in memory (rather than copied out of it when
+        the executables start) is rewritten by the reset functions.
+
+        Parameters
+        ----------
+        controller : :py:class:`~rig.machine_control.MachineController`
+            Controller to use to communicate with the machine.
+        timeout : float
+            Time to wait for the executables to stop.
+        """
+        # Stop the executables without freeing the resources they were
+        # allocated.
+        logger.debug("Stopping application executables")
+        controller.send_signal("exit")
+        n_exited = controller.wait_for_cores_to_reach_state(
+            "exit", self.n_cores, timeout=timeout)
+        if n_exited != self.n_cores:
+            raise Exception("Only {} of {} cores stopped when resetting the "
+                            "application.".format(n_exited, self.n_cores))
+
+        # Restore any state held in memory
+        logger.debug("Resetting data")
+        for fn in self.reset_functions:
             fn(self, controller)
 
-        # Load the applications onto the machine
+        # Reload the executables, which will reinitialise themselves from the
+        # data in memory.
+        self._load_executables(controller)
+
+    def _load_executables(self, controller):
+        """Load the application executables onto the machine."""
         logger.debug("Loading application executables")
         vertices_applications = {v: v.application for v in self.vertices
                                  if v.application is not None}
@@ -214,22 +368,54 @@ class Netlist(object):
 
     def before_simulation(self, simulator, n_steps):
         """Prepare the objects in the netlist for a simulation of a given
-        number of steps.
+        number of steps, or of indefinite length if `n_steps` is None.
         """
-        # Write into memory the duration of the simulation
+        # Write into memory the duration of the simulation, the applications
+        # run indefinitely if this is UINT32_MAX.
+        n_ticks = 0xffffffff if n_steps is None else n_steps
         for vertex in self.vertices:
             x, y = self.placements[vertex]
             p = self.allocations[vertex][Cores].start
-            simulator.controller.write_vcpu_struct_field("user1", n_steps,
+            simulator.controller.write_vcpu_struct_field("user1", n_ticks,
                                                          x, y, p)
 
         # Call all the "before simulation" functions
         for fn in self.before_simulation_functions:
             fn(self, simulator, n_steps)
 
-    def after_simulation(self, simulator, n_steps):
+    def prepare_simulation(self, simulator, start_step, n_steps):
+        """Precompute the data required for a future simulation of a given
+        number of steps starting at the given step.
+
+        This does not communicate with the machine and so may be called while
+        the machine is simulating.
+        """
+        for fn in self.prepare_simulation_functions:
+            fn(self, simulator, start_step, n_steps)
+
+    def after_simulation(self, simulator, n_steps, timings=None):
         """Retrieve data from the objects in the netlist after a simulation of
         a given number of steps.
+
+        If `timings` (a
+        :py:class:`~nengo_spinnaker.utils.timings.Timings`) is provided then
+        the time taken by each function is recorded in it.
+
+        Returns
+        -------
+        [`fn()`, ...]
+            Functions which must be called to complete processing of the
+            retrieved data, these do not communicate with the machine and so
+            may be called while the machine is simulating.
         """
+        if timings is None:
+            timings = Timings()
+
+        finalisers = list()
         for fn in self.after_simulation_functions:
-            fn(self, simulator, n_steps)
+            with timings.time("after_simulation/" + function_name(fn)):
+                finaliser = fn(self, simulator, n_steps)
+            if finaliser is not None:
+                finalisers.append(finaliser)
+
+        return finalisers
@@ -1 +1,7 @@
 from .ethernet import Ethernet
+from .telemetry import NodeIOStats, RoundTripProbe
+
+try:
+    from .asyncio_ethernet import AsyncioEthernet
+except ImportError:  # pragma: no cover
+    pass  # asyncio is not available before Python 3.4
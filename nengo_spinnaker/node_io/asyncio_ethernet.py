@@ -0,0 +1,101 @@
+"""Ethernet Node IO driven by an :py:mod:`asyncio` event loop.
+
+To use the event loop IO controller with a network::
+
+    nengo_spinnaker.add_spinnaker_params(network.config)
+    network.config[nengo_spinnaker.Simulator].node_io = AsyncioEthernet
+    network.config[nengo_spinnaker.Simulator].node_io_kwargs = {"loop": loop}
+
+Rather than receiving packets in a separate thread the event loop is run by
+the simulator while it waits for the deadline of each step of the host
+network.  Packets are handled as soon as they arrive and any other tasks
+scheduled on the loop (e.g., timers or IO with other devices) are run
+alongside the simulation, without requiring extra threads.  Consequently the
+simulator must not be run from within a coroutine executing on the same loop.
+
+Packets are transmitted through datagram endpoints.  Datagram endpoints read
+a single packet per iteration of the event loop, which cannot keep up with
+the rate at which SDP transmitters may send packets, so packets are received
+by readers which read every waiting packet whenever a socket is readable.
+"""
+import asyncio
+
+from .ethernet import Ethernet, NodeInputReceiver
+
+
+class AsyncioEthernet(Ethernet):
+    """Ethernet implementation of SpiNNaker to host Node communication which
+    performs IO using an :py:mod:`asyncio` event loop.
+    """
+    def __init__(self, transmission_period=0.01, loop=None):
+        """Create a new event loop based Node communicator.
+
+        Parameters
+        ----------
+        transmission_period : float
+            Period between transmitting SDP packets from SpiNNaker to the host
+            in seconds.
+        loop : :py:class:`asyncio.AbstractEventLoop` or None
+            Event loop to use, if None then the default event loop is used.
+        """
+        super(AsyncioEthernet, self).__init__(transmission_period)
+        self.loop = loop if loop is not None else asyncio.get_event_loop()
+        self._readers = list()
+
+    def prepare(self, model, controller, netlist, system_info=None):
+        """Prepare for simulation given the placed netlist and the machine
+        controller.
+        """
+        super(AsyncioEthernet, self).prepare(model, controller, netlist,
+                                             system_info)
+
+        # Receive packets whenever an input socket is readable and create an
+        # endpoint to transmit packets to each Ethernet connected chip.
+        for in_socket in self.in_sockets.values():
+            self.loop.add_reader(in_socket,
+                                 NodeInputReceiver(self, in_socket))
+            self._readers.append(in_socket)
+
+        for xy, out_socket in list(self._out_transports.items()):
+            self._out_transports[xy], _ = self.loop.run_until_complete(
+                self.loop.create_datagram_endpoint(
+                    asyncio.DatagramProtocol, sock=out_socket)
+            )
+
+    def wait(self, duration):
+        """Run the event loop for `duration` seconds."""
+        # NOTE `loop.create_future` is not available before Python 3.5.2
+        done = asyncio.Future(loop=self.loop)
+        self.loop.call_later(duration, done.set_result, None)
+        self.loop.run_until_complete(done)
+
+    def spawn(self):
+        """Get an object which is started and stopped with each simulation,
+        no thread is required as IO is performed by the event loop.
+        """
+        return _EventLoopIO()
+
+    def close(self):
+        """Close the endpoints and sockets used by the Node IO."""
+        if not self.loop.is_closed():
+            for in_socket in self._readers:
+                self.loop.remove_reader(in_socket)
+
+            for transport in self._out_transports.values():
+                transport.close()
+
+            if self._out_transports and not self.loop.is_running():
+                # Run the loop once to allow the transports to finish closing
+                self.loop.call_soon(self.loop.stop)
+                self.loop.run_forever()
+
+        super(AsyncioEthernet, self).close()
+
+
+class _EventLoopIO(object):
+    """Stand-in for the IO thread of the threaded IO controllers."""
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
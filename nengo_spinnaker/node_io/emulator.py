@@ -0,0 +1,251 @@
+"""Local stand-in for a SpiNNaker machine for testing and benchmarking Node IO.
+
+:py:class:`~.SpiNNakerEmulator` listens for SCP and SDP packets on the
+loopback interface as the Ethernet connected chip of a board would.  Packets
+addressed to the SDP receivers of a model (those sent by
+:py:meth:`~nengo_spinnaker.node_io.Ethernet.set_node_output`) are decoded and
+counted, IP tags may be set with the SCP commands sent by
+:py:meth:`rig.machine_control.MachineController.iptag_set` and packets are
+emitted to the host as SDP transmitters would emit them, at a configurable
+rate and width.  For example::
+
+    with SpiNNakerEmulator() as emulator:
+        emulator.start()
+
+        controller = MachineController("localhost")
+        io = Ethernet()
+        ...
+        io.prepare(model, controller, netlist, system_info)
+
+        emulator.add_transmitter(1, 0, 3, width=16)
+        emulator.rate = 10000.0
+
+Nothing is simulated: the emulator is intended to exercise the host-side of
+the Node IO without hardware.
+"""
+import errno
+import numpy as np
+from rig.machine_control.consts import (
+    SCP_PORT, SCPCommands, SCPReturnCodes, IPTagCommands)
+from rig.machine_control.packets import SCPPacket
+import select
+import socket
+import struct
+import threading
+
+from ..utils import type_casts as tp
+from ..utils.realtime import clock
+
+_SCP_MAX_LENGTH = 512
+_SCP_DATA_OFFSET = 26
+
+# The tag with which SDP transmitters send packets to the host
+_SDP_TRANSMITTER_TAG = 1
+
+
+class SpiNNakerEmulator(object):
+    """Emulates the SCP and SDP behaviour of a SpiNNaker board which is
+    exchanging Node values with the host.
+
+    Parameters
+    ----------
+    hostname : str
+        Address on which to listen for packets.
+    port : int
+        Port on which to listen for packets.
+    sdp_handler : callable or None
+        If given, called with `(x, y, p, values)` for every packet sent to an
+        SDP receiver (where `values` are those contained in the packet), from
+        the thread started by :py:meth:`~.start`.
+    period : float
+        Period with which the time contained in transmitted packets wraps,
+        this must be representable in S16.15.
+
+    Attributes
+    ----------
+    rate : float
+        Number of packets per second emitted by the SDP transmitters
+        altogether.
+    iptags : {int: (str, int), ...}
+        Address and port to which packets with each IP tag are sent.
+    sdp_values : {(x, y, p): :py:class:`numpy.ndarray`, ...}
+        Most recent values received by each SDP receiver core.
+    n_sdp_received : int
+        Number of packets received for SDP receivers.
+    n_sdp_sent : int
+        Number of packets emitted by SDP transmitters.
+    n_sdp_dropped : int
+        Number of packets which could not be emitted by SDP transmitters
+        because their IP tag was not set.
+    """
+    def __init__(self, hostname="localhost", port=SCP_PORT, sdp_handler=None,
+                 period=60.0):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind((hostname, port))
+        self.sock.setblocking(False)
+
+        # Avoid dropping packets sent by the host while packets are emitted,
+        # so that losses may be attributed to the host.
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 1 << 20)
+
+        self.sdp_handler = sdp_handler
+        self.period = period
+        self.rate = 0.0
+
+        self.iptags = dict()
+        self.sdp_values = dict()
+        self._transmitters = list()
+        self.n_sdp_received = 0
+        self.n_sdp_sent = 0
+        self.n_sdp_dropped = 0
+
+        self._halt = threading.Event()
+        self._thread = None
+
+    def add_transmitter(self, x, y, p, width):
+        """Emit packets as an SDP transmitter on core `(x, y, p)` receiving
+        `width` values would.
+
+        The first value of each packet is the time (as given by
+        :py:func:`~nengo_spinnaker.utils.realtime.clock`, modulo
+        :py:attr:`~.period`) at which it was sent, the remaining values are
+        zero.
+        """
+        header = SCPPacket(
+            src_x=x, src_y=y, src_cpu=p, src_port=1,
+            dest_x=0, dest_y=0, dest_cpu=0, dest_port=0xff,
+            tag=_SDP_TRANSMITTER_TAG, cmd_rc=0, seq=0, arg1=0, arg2=0, arg3=0
+        ).bytestring
+        self._transmitters.append((header, np.zeros(width)))
+
+    def start(self):
+        """Start handling and emitting packets in a new thread."""
+        self._halt.clear()
+        self._thread = threading.Thread(target=self._run,
+                                        name="SpiNNakerEmulator")
+        self._thread.start()
+
+    def stop(self):
+        """Stop handling and emitting packets."""
+        if self._thread is not None:
+            self._halt.set()
+            self._thread.join()
+            self._thread = None
+
+    def close(self):
+        """Stop the emulator and close its socket."""
+        self.stop()
+        self.sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _run(self):
+        """Handle received packets and emit packets at the required rate."""
+        schedule = None
+        while not self._halt.is_set():
+            # Restart the schedule of packets whenever the rate or the
+            # transmitters are changed.
+            if schedule != (self.rate, len(self._transmitters)):
+                schedule = (self.rate, len(self._transmitters))
+                rate = self.rate if self._transmitters else 0.0
+                start = clock()
+                n_emitted = 0
+
+            # Wait until a packet arrives or the next packet is due
+            timeout = 0.01
+            if rate > 0.0:
+                timeout = min(max(start + (n_emitted + 1) / rate - clock(),
+                                  0.0), timeout)
+            readable, _, _ = select.select([self.sock], [], [], timeout)
+            if readable:
+                self._receive()
+
+            # Emit every packet which is due
+            if rate > 0.0:
+                n_due = int((clock() - start) * rate)
+                while n_emitted < n_due:
+                    self._transmit(n_emitted)
+                    n_emitted += 1
+
+    def _receive(self):
+        """Handle every packet waiting to be received."""
+        while True:
+            try:
+                data, address = self.sock.recvfrom(_SCP_MAX_LENGTH)
+            except IOError as e:
+                if e.errno in (errno.EAGAIN, errno.EWOULDBLOCK):
+                    return
+                raise
+
+            packet = SCPPacket.from_bytestring(data)
+            if packet.dest_cpu == 0 and packet.dest_port == 0:
+                self._handle_scp(packet, address)
+            else:
+                self._handle_sdp(packet, data)
+
+    def _handle_scp(self, packet, address):
+        """Respond to an SCP command sent to the monitor processor, only
+        commands which manipulate IP tags are supported.
+        """
+        rc = SCPReturnCodes.ok
+        if packet.cmd_rc == SCPCommands.iptag:
+            command, tag = packet.arg1 >> 16, packet.arg1 & 0xff
+            if command == IPTagCommands.set:
+                # As on SpiNNaker, packets with a tag addressing 0.0.0.0 are
+                # sent to the host which set the tag.
+                ip_address = socket.inet_ntoa(struct.pack("<I", packet.arg3))
+                if ip_address == "0.0.0.0":
+                    ip_address = address[0]
+                self.iptags[tag] = (ip_address, packet.arg2)
+            elif command == IPTagCommands.clear:
+                self.iptags.pop(tag, None)
+            else:
+                rc = SCPReturnCodes.arg
+        else:
+            rc = SCPReturnCodes.cmd
+
+        response = SCPPacket(
+            reply_expected=False, tag=0xff,
+            dest_port=packet.src_port, dest_cpu=packet.src_cpu,
+            dest_x=packet.src_x, dest_y=packet.src_y,
+            src_port=0, src_cpu=0, src_x=packet.dest_x, src_y=packet.dest_y,
+            cmd_rc=int(rc), seq=packet.seq, arg1=None, arg2=None, arg3=None,
+            data=b""
+        )
+        self.sock.sendto(response.bytestring, address)
+
+    def _handle_sdp(self, packet, data):
+        """Record the values sent to an SDP receiver core, the first argument
+        of the packet is the index of the first value it contains.
+        """
+        values = tp.fix_to_np(
+            np.frombuffer(data, dtype=np.int32, offset=_SCP_DATA_OFFSET))
+        core = (packet.dest_x, packet.dest_y, packet.dest_cpu)
+        end = packet.arg1 + values.size
+        core_values = self.sdp_values.get(core)
+        if core_values is None or core_values.size < end:
+            core_values = np.zeros(end) if core_values is None else \
+                np.concatenate((core_values, np.zeros(end - core_values.size)))
+            self.sdp_values[core] = core_values
+        core_values[packet.arg1:end] = values
+        self.n_sdp_received += 1
+
+        if self.sdp_handler is not None:
+            self.sdp_handler(core[0], core[1], core[2], values)
+
+    def _transmit(self, n):
+        """Emit the `n`th packet, the SDP transmitters take turns."""
+        header, values = self._transmitters[n % len(self._transmitters)]
+
+        address = self.iptags.get(_SDP_TRANSMITTER_TAG)
+        if address is None:
+            self.n_sdp_dropped += 1
+            return
+
+        values[0] = clock() % self.period
+        self.sock.sendto(header + tp.np_to_fix(values).tobytes(), address)
+        self.n_sdp_sent += 1
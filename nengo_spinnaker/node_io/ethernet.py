@@ -1,17 +1,44 @@
 import collections
+import errno
 import numpy as np
 from rig.machine_control.consts import SCP_PORT
+from rig.geometry import shortest_torus_path_length, to_xyz
 from rig.machine_control.packets import SCPPacket
 from rig.place_and_route import Cores
-from six import iteritems
+import select
+from six import iteritems, itervalues
 import socket
+import struct
 import threading
 
 from ..builder.builder import spec, ObjectPort
 from ..builder.model import InputPort, OutputPort
-from ..builder.node import NodeIOController
+from ..builder.node import NodeIOController, NodeInputBuffer
 from ..operators import SDPReceiver, SDPTransmitter
 from ..utils import type_casts as tp
+from ..utils.config import getconfig
+from ..utils.realtime import clock
+from .telemetry import NodeIOStats
+
+# Source core and chip of an SCP packet; the chip is given as (x << 8) | y.
+_SCP_SOURCE = struct.Struct("<5xB2xH")
+
+# Offset of the data in an SCP packet received from the machine
+_SCP_DATA_OFFSET = 26
+
+# Maximum size of an SCP packet received from the machine
+_SCP_MAX_LENGTH = 512
+
+
+def _source_index(x, y, p):
+    """Get the index used to identify packets received from a core."""
+    return (((x << 8) | y) << 5) | p
+
+
+def _get_source_index(packet):
+    """Get the index of the core which sent an SCP packet."""
+    src_port_cpu, src_xy = _SCP_SOURCE.unpack_from(packet)
+    return (src_xy << 5) | (src_port_cpu & 0x1f)
 
 
 class Ethernet(NodeIOController):
@@ -24,7 +51,8 @@ class Ethernet(NodeIOController):
         ----------
         transmission_period : float
             Period between transmitting SDP packets from SpiNNaker to the host
-            in seconds.
+            in seconds, this may be overridden for each Node with the
+            `transmission_period` config parameter.
         """
         super(Ethernet, self).__init__()
 
@@ -33,17 +61,40 @@ class Ethernet(NodeIOController):
         self._sdp_receivers = dict()
         self._sdp_transmitters = dict()
 
-        # Node -> [(Connection, (x, y, p), ...]
-        self._node_outgoing = collections.defaultdict(list)
+        # Node -> NodeOutput computing the payloads for its connections
+        self._node_outgoing = dict()
+
+        # (x, y, p) -> ([(packet header, payload), ...], Ethernet chip,
+        # [NodeIOStats]) for every SDP receiver core and the set of cores whose
+        # payloads have changed during this step.
+        self._core_packets = dict()
+        self._pending_cores = set()
 
-        # (x, y, p) -> Node
+        # Count of packets and steps for which outgoing packets were sent, and
+        # of received packets which were not from a SDP transmitter or could
+        # not be received because of socket errors.
+        self.n_packets_sent = 0
+        self.n_steps = 0
+        self.n_unknown_packets = 0
+        self.n_receive_errors = 0
+
+        # Source index of (x, y, p) -> (Node, input array, NodeIOStats)
         self._node_incoming = dict()
 
-        # Sockets
+        # Sockets, those for the chip through which the machine is contacted
+        # are created now and those for other Ethernet connected chips when
+        # the controller is prepared.
         self._hostname = None
         self.in_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
         self.out_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
 
+        # (x, y) of Ethernet connected chip -> socket on which packets from
+        # the chip are received, object used to transmit packets to the chip
+        # and the address of the chip.
+        self.in_sockets = collections.OrderedDict()
+        self._out_transports = dict()
+        self._addresses = dict()
+
     def get_spinnaker_source_for_node(self, model, connection):
         """Get the source for a connection originating from a Node.
 
@@ -66,67 +117,210 @@ class Ethernet(NodeIOController):
         Arguments and return type are as for
         :py:attr:`~nengo_spinnaker.builder.Model.sink_getters`.
         """
-        # Create a new SDPTransmitter if there isn't already one for the Node
-        if connection.post_obj not in self._sdp_transmitters:
-            transmitter = SDPTransmitter(connection.post_obj.size_in)
-            self._sdp_transmitters[connection.post_obj] = transmitter
+        # Create a new SDPTransmitter if there isn't already one for the Node,
+        # the Node may override the transmission period of the controller.
+        node = connection.post_obj
+        if node not in self._sdp_transmitters:
+            period = getconfig(model.config, node, "transmission_period")
+            if period is None:
+                period = self.transmission_period
+
+            transmitter = SDPTransmitter(node.size_in, period)
+            self._sdp_transmitters[node] = transmitter
             model.extra_operators.append(transmitter)
 
         return spec(ObjectPort(self._sdp_transmitters[connection.post_obj],
                                InputPort.standard))
 
-    def prepare(self, model, controller, netlist):
+    def get_build_state(self):
+        """Get the state of the IO controller after a model has been built."""
+        state = super(Ethernet, self).get_build_state()
+        state["sdp_receivers"] = self._sdp_receivers
+        state["sdp_transmitters"] = self._sdp_transmitters
+        return state
+
+    def set_build_state(self, state):
+        """Restore the IO controller to a state returned by
+        :py:meth:`~.get_build_state`.
+        """
+        super(Ethernet, self).set_build_state(state)
+        self._sdp_receivers = state["sdp_receivers"]
+        self._sdp_transmitters = state["sdp_transmitters"]
+
+    def prepare(self, model, controller, netlist, system_info=None):
         """Prepare for simulation given the placed netlist and the machine
         controller.
+
+        Packets are exchanged with each SDP receiver and transmitter through
+        the Ethernet connected chip nearest to it, so an IP tag is set and a
+        pair of sockets used for every Ethernet connected chip.  If
+        `system_info` is not given it is requested from the controller.
         """
-        # Store the hostname
-        # TODO Store a map of (x, y) to hostname
+        # Get the address of every Ethernet connected chip, the chip through
+        # which the machine was contacted is addressed using the same
+        # hostname.
         self._hostname = controller.initial_host
-
-        # Set up the IP tag (will need to do this for each ethernet connected
-        # chip that we expect to use).
-        self.in_socket.bind(('', 0))
-        with controller(x=0, y=0):
-            controller.iptag_set(1, *self.in_socket.getsockname())
-
-        # Build a map of Node to outgoing connections and SDP receivers
+        if system_info is None:
+            system_info = controller.get_system_info()
+
+        hostnames = collections.OrderedDict([((0, 0), self._hostname)])
+        for xy, ip_address in sorted(system_info.ethernet_connected_chips()):
+            if ip_address is not None and xy not in hostnames:
+                hostnames[xy] = ip_address
+
+        # Set up the IP tag and sockets for each Ethernet connected chip
+        for i, ((x, y), hostname) in enumerate(iteritems(hostnames)):
+            if i == 0:
+                in_socket, out_socket = self.in_socket, self.out_socket
+            else:
+                in_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+                out_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+            in_socket.bind(('', 0))
+            with controller(x=x, y=y):
+                controller.iptag_set(1, *in_socket.getsockname())
+
+            self.in_sockets[(x, y)] = in_socket
+            self._out_transports[(x, y)] = out_socket
+            self._addresses[(x, y)] = (hostname, SCP_PORT)
+
+        def get_ethernet_chip(x, y):
+            """Get the Ethernet connected chip nearest to a chip."""
+            if len(hostnames) == 1:
+                return (0, 0)
+
+            return min(hostnames, key=lambda e: shortest_torus_path_length(
+                to_xyz(e), to_xyz((x, y)),
+                system_info.width, system_info.height
+            ))
+
+        # Group the slices of the outgoing connections of each Node by the SDP
+        # receiver core which will transmit them.
+        core_connections = collections.defaultdict(list)
         for node, sdp_rx in iteritems(self._sdp_receivers):
-            for transmission_params, vertex in \
-                    iteritems(sdp_rx.connection_vertices):
+            for vertex, connections in \
+                    iteritems(sdp_rx.vertex_connections):
                 # Get the placement and core
                 x, y = netlist.placements[vertex]
                 p = netlist.allocations[vertex][Cores].start
+                core_connections[(x, y, p)].extend(
+                    (node, transmission_params, rows) for
+                    transmission_params, rows in connections
+                )
+        node_connections = collections.defaultdict(list)
+
+        # The values of all the connections of a core are laid out one after
+        # another and sent in as few SDP packets as possible, the first
+        # argument of each packet is the offset of its values.  The headers
+        # of the packets are constructed now and each Node writes its output
+        # into a slice of the payload of the core.
+        max_values = SDPReceiver.max_dimensions_per_packet
+        for (x, y, p), connections in iteritems(core_connections):
+            payload = np.zeros(sum(rows.stop - rows.start for _, _, rows in
+                                   connections), dtype=np.int32)
+            packets = [
+                (SCPPacket(dest_port=1, dest_cpu=p, dest_x=x, dest_y=y,
+                           cmd_rc=0, arg1=offset, arg2=0, arg3=0,
+                           data=b"").bytestring,
+                 payload[offset:offset + max_values])
+                for offset in range(0, payload.size, max_values)
+            ]
+            self._core_packets[(x, y, p)] = (
+                packets, get_ethernet_chip(x, y),
+                [self._get_node_stats(node) for node in
+                 collections.OrderedDict.fromkeys(n for n, _, _ in
+                                                  connections)]
+            )
+
+            offset = 0
+            for node, transmission_params, rows in connections:
+                size = rows.stop - rows.start
+                node_connections[node].append(
+                    (transmission_params, rows,
+                     payload[offset:offset + size], (x, y, p))
+                )
+                offset += size
 
-                # Store this transmission parameters to (x, y, p) map
-                self._node_outgoing[node].append((transmission_params,
-                                                  (x, y, p)))
+        # Compile the computation of the outputs of every Node
+        for node, connections in iteritems(node_connections):
+            self._node_outgoing[node] = NodeOutput(connections)
 
         # Build a map of (x, y, p) to Node for incoming values
         for node, sdp_tx in iteritems(self._sdp_transmitters):
-            # Get the placement and core
+            # Get the placement and core and direct the packets sent by the
+            # core to the nearest Ethernet connected chip.
             x, y = netlist.placements[sdp_tx._vertex]
             p = netlist.allocations[sdp_tx._vertex][Cores].start
+            sdp_tx.ethernet_chip = get_ethernet_chip(x, y)
 
-            # Store this mapping (x, y, p) -> Node
-            self._node_incoming[(x, y, p)] = node
+            # Store the mapping from (x, y, p) to the Node and the buffer
+            # into which values received for the Node are written.
+            if node not in self.node_input:
+                self.node_input[node] = NodeInputBuffer(node.size_in)
+            self._node_incoming[_source_index(x, y, p)] = (
+                node, self.node_input[node], self._get_node_stats(node))
+
+    def _get_node_stats(self, node):
+        """Get the IO statistics for a Node."""
+        if node not in self.node_stats:
+            self.node_stats[node] = NodeIOStats()
+        return self.node_stats[node]
 
     def set_node_output(self, node, value):
-        """Transmit the value output by a Node."""
-        # Build an SDP packet to transmit for each outgoing connection for the
-        # node
-        for transmission_params, (x, y, p) in self._node_outgoing[node]:
-            # Apply the pre-slice, the connection function and the transform.
-            c_value = value[transmission_params.pre_slice]
-            if transmission_params.function is not None:
-                c_value = transmission_params.function(c_value)
-            c_value = np.dot(transmission_params.transform, c_value)
-
-            # Transmit the packet
-            data = bytes(tp.np_to_fix(c_value).data)
-            packet = SCPPacket(dest_port=1, dest_cpu=p, dest_x=x, dest_y=y,
-                               cmd_rc=0, arg1=0, arg2=0, arg3=0, data=data)
-            self.out_socket.sendto(packet.bytestring,
-                                   (self._hostname, SCP_PORT))
+        """Store the value output by a Node, the value is transmitted at the
+        end of the step.
+        """
+        output = self._node_outgoing.get(node)
+        if output is not None:
+            output(value)
+            self._pending_cores.update(output.cores)
+
+    def end_step(self):
+        """Transmit the SDP packets for each core whose payload was changed
+        during the step.
+        """
+        for core in self._pending_cores:
+            packets, ethernet_chip, stats = self._core_packets[core]
+            for header, payload in packets:
+                data = header + payload.tobytes()
+                try:
+                    self._out_transports[ethernet_chip].sendto(
+                        data, self._addresses[ethernet_chip])
+                except IOError:
+                    for node_stats in stats:
+                        node_stats.n_send_errors += 1
+                    continue
+
+                self.n_packets_sent += 1
+                for node_stats in stats:
+                    node_stats.n_packets_sent += 1
+                    node_stats.n_bytes_sent += len(data)
+
+        self.n_steps += 1
+        self._pending_cores.clear()
+
+    @property
+    def packets_per_step(self):
+        """Mean number of SDP packets transmitted to the machine per step."""
+        return self.n_packets_sent / float(self.n_steps or 1)
+
+    def get_metrics(self):
+        """Get counts describing the IO performed so far."""
+        return {"n_packets_sent": self.n_packets_sent,
+                "packets_per_step": self.packets_per_step,
+                "n_packets_received": sum(
+                    s.n_packets_received for s in itervalues(self.node_stats)),
+                "n_unknown_packets": self.n_unknown_packets,
+                "n_send_errors": sum(
+                    s.n_send_errors for s in itervalues(self.node_stats)),
+                "n_receive_errors": self.n_receive_errors}
+
+    def get_node_input(self, node):
+        """Get the most recent input received for a Node."""
+        stats = self.node_stats.get(node)
+        if stats is not None:
+            stats.record_read(clock())
+        return self.node_input[node].read()
 
     def spawn(self):
         """Get a new thread which will manage transmitting and receiving Node
@@ -138,44 +332,203 @@ class Ethernet(NodeIOController):
         """Close the sockets used by the ethernet Node IO."""
         self.in_socket.close()
         self.out_socket.close()
+        for in_socket in itervalues(self.in_sockets):
+            in_socket.close()
+        for out_transport in itervalues(self._out_transports):
+            out_transport.close()
+
+
+class NodeOutput(object):
+    """Precompiled computation of the fixed point values transmitted for the
+    outgoing connections of a Node.
+
+    Connections which share a pre-slice and a function are grouped so that
+    the values for every connection in the group are computed with a single
+    matrix multiplication by the stacked transforms of the group.  The values
+    for all connections are then converted to fixed point together and copied
+    into the payloads of the packets which will transmit them.
+
+    Attributes
+    ----------
+    cores : [(x, y, p), ...]
+        Cores whose payloads are written by the Node.
+    """
+    def __init__(self, connections):
+        """Create a new Node output pipeline.
+
+        Parameters
+        ----------
+        connections : [(transmission_params, rows, payload, (x, y, p)), ...]
+            Transmission parameters of each connection, the slice of the rows
+            of its transform transmitted by the core (x, y, p) and the slice
+            of the payload of the core into which the values of those rows
+            should be written.  Connections split across several cores
+            appear once for each core.
+        """
+        # Group the connections by pre-slice and function
+        groups = list()  # [(pre_slice, function, [(transform, payload)])]
+        for transmission_params, rows, payload, _ in connections:
+            pre_slice = transmission_params.pre_slice
+            function = transmission_params.function
+            transform = np.array(transmission_params.transform,
+                                 dtype=float)[rows]
+
+            for g_pre_slice, g_function, members in groups:
+                if (g_function is function and
+                        _same_pre_slice(g_pre_slice, pre_slice)):
+                    members.append((transform, payload))
+                    break
+            else:
+                groups.append((pre_slice, function, [(transform, payload)]))
+
+        # Stack the transforms of each group and assign each connection a
+        # range of rows in the buffer of values.
+        self._groups = list()
+        self._targets = list()
+        offset = 0
+        for pre_slice, function, members in groups:
+            transform = np.vstack([t for t, _ in members])
+            self._groups.append((pre_slice, function, transform,
+                                 slice(offset, offset + transform.shape[0])))
+
+            for t, payload in members:
+                self._targets.append((payload,
+                                      slice(offset, offset + t.shape[0])))
+                offset += t.shape[0]
+
+        self._values = np.zeros(offset)
+        self._scale = 2.0 ** tp.np_to_fix.n_frac
+        self.cores = sorted(set(core for _, _, _, core in connections))
+
+    def __call__(self, value):
+        """Compute the values of every connection given the output of the
+        Node and write them into the payloads.
+        """
+        values = self._values
+        for pre_slice, function, transform, rows in self._groups:
+            c_value = value[pre_slice]
+            if function is not None:
+                c_value = np.asarray(function(c_value), dtype=float)
+                c_value = c_value.reshape(-1)
+            np.dot(transform, c_value, out=values[rows])
+
+        # Convert to saturated fixed point values (as done by
+        # `tp.np_to_fix`), the values are truncated when they are written
+        # into the payloads.
+        values *= self._scale
+        np.clip(values, tp.np_to_fix.min_value, tp.np_to_fix.max_value,
+                out=values)
+        for payload, rows in self._targets:
+            payload[:] = values[rows]
+
+
+def _same_pre_slice(a, b):
+    """Determine whether two pre-slices select the same elements."""
+    if isinstance(a, slice) or isinstance(b, slice):
+        return a == b
+    return np.array_equal(a, b)
 
 
 class EthernetThread(threading.Thread):
     """Thread which handles transmitting and receiving IO values."""
-    def __init__(self, ethernet_handler):
+    def __init__(self, ethernet_handler, timeout=0.01):
         # Initialise the thread
         super(EthernetThread, self).__init__(name="EthernetIO")
 
         # Set up internal references
         self.halt = False
         self.handler = ethernet_handler
-        self.in_sock = ethernet_handler.in_socket
-        self.in_sock.settimeout(0.0001)
+        self.receivers = {
+            in_socket: NodeInputReceiver(ethernet_handler, in_socket)
+            for in_socket in itervalues(ethernet_handler.in_sockets)
+        }
+        self.timeout = timeout
 
     def run(self):
+        in_sockets = list(self.receivers)
         while not self.halt:
-            # Read as many packets from the socket as we can
-            while True:
-                try:
-                    data = self.in_sock.recv(512)
-                except IOError:
-                    break  # No more to read
-
-                # Unpack the data, and store it as the input for the
-                # appropriate Node.
-                packet = SCPPacket.from_bytestring(data)
-                values = tp.fix_to_np(
-                    np.frombuffer(packet.data, dtype=np.int32)
-                )
-
-                # Get the Node
-                node = self.handler._node_incoming[(packet.src_x,
-                                                    packet.src_y,
-                                                    packet.src_cpu)]
-                with self.handler.node_input_lock:
-                    self.handler.node_input[node] = values[:]
+            # Wait for packets to arrive on any socket
+            readable, _, _ = select.select(in_sockets, [], [], self.timeout)
+            for in_socket in readable:
+                self.receivers[in_socket]()
 
     def stop(self):
         """Stop the thread from running."""
         self.halt = True
         self.join()
+
+
+class NodeInputReceiver(object):
+    """Receives packets from SDP transmitters and writes the values they
+    contain into the input buffers of the appropriate Nodes.
+
+    Packets are received in batches: every waiting packet is read into a
+    preallocated ring of buffers before the values they contain are written.
+    The values are exchanged with the host network through
+    :py:class:`~nengo_spinnaker.builder.node.NodeInputBuffer` objects, so
+    every receiver of an IO controller must be called from the same thread.
+    """
+    def __init__(self, ethernet_handler, in_socket, n_buffers=32):
+        self.handler = ethernet_handler
+        self.in_sock = in_socket
+        self.in_sock.setblocking(False)
+
+        # Buffers into which packets are received, the length of the packet
+        # in each buffer and a view of the data of each buffer as words.
+        self._buffers = [bytearray(_SCP_MAX_LENGTH) for _ in range(n_buffers)]
+        self._lengths = [0] * n_buffers
+        self._words = [
+            np.frombuffer(buf, dtype=np.int32, offset=_SCP_DATA_OFFSET,
+                          count=(_SCP_MAX_LENGTH - _SCP_DATA_OFFSET) // 4)
+            for buf in self._buffers
+        ]
+        self._scale = 2.0 ** -tp.fix_to_np.n_frac
+
+    def __call__(self):
+        """Receive and publish all waiting packets."""
+        n_packets = len(self._buffers)
+        while n_packets == len(self._buffers):
+            n_packets = self._receive()
+            self._publish(n_packets)
+
+    def _receive(self):
+        """Read as many packets as are waiting (or as will fit in the ring of
+        buffers) and return the number read.
+        """
+        n_packets = 0
+        while n_packets < len(self._buffers):
+            try:
+                self._lengths[n_packets] = \
+                    self.in_sock.recv_into(self._buffers[n_packets])
+            except IOError as e:
+                if e.errno not in (errno.EAGAIN, errno.EWOULDBLOCK):
+                    self.handler.n_receive_errors += 1
+                break  # No more to read
+            n_packets += 1
+
+        return n_packets
+
+    def _publish(self, n_packets):
+        """Write the values from the received packets into the input buffers
+        of the appropriate Nodes.
+        """
+        node_incoming = self.handler._node_incoming
+        now = clock()
+        for buf, length, words in zip(self._buffers[:n_packets],
+                                      self._lengths, self._words):
+            # Get the input buffer for the Node from the source of the packet.
+            incoming = node_incoming.get(_get_source_index(buf))
+            if incoming is None:
+                self.handler.n_unknown_packets += 1
+                continue  # Not from a SDP transmitter
+
+            # Write the values into the back buffer, retaining the most
+            # recent values of any elements missing from the packet, and
+            # then publish them.
+            _, node_input, stats = incoming
+            values = node_input.back
+            n_words = min(values.size, (length - _SCP_DATA_OFFSET) // 4)
+            np.multiply(words[:n_words], self._scale, out=values[:n_words])
+            values[n_words:] = node_input.front[n_words:]
+            node_input.flip()
+            stats.record_received(length, now)
@@ -0,0 +1,132 @@
+"""Statistics of the IO performed between the host and SpiNNaker.
+
+The IO controller keeps a :py:class:`~.NodeIOStats` for each Node simulated on
+the host, these are available (and updated while simulating) as
+:py:attr:`nengo_spinnaker.Simulator.node_io_stats`.
+
+The latency of the full host to SpiNNaker to host loop may be measured by
+adding a :py:class:`~.RoundTripProbe` to a network before it is simulated::
+
+    probe = RoundTripProbe(network)
+    with nengo_spinnaker.Simulator(network) as sim:
+        sim.run(10.0)
+    print(probe.latency.mean)
+"""
+import nengo
+
+from ..utils.realtime import TimingHistogram, clock
+
+
+class NodeIOStats(object):
+    """Counts of the IO performed for a Node.
+
+    Attributes
+    ----------
+    n_packets_sent : int
+        Number of packets containing output of the Node sent to the machine.
+    n_bytes_sent : int
+        Number of bytes in the packets sent to the machine.
+    n_send_errors : int
+        Number of packets which could not be sent because of socket errors.
+    n_packets_received : int
+        Number of packets containing input for the Node received from the
+        machine.
+    n_bytes_received : int
+        Number of bytes in the packets received from the machine.
+    last_received : float or None
+        Time (as given by :py:func:`~nengo_spinnaker.utils.realtime.clock`)
+        at which the most recent input was received.
+    input_wait : :py:class:`~nengo_spinnaker.utils.realtime.TimingHistogram`
+        How long each received input waited before it was read by the host
+        network, inputs which were replaced before they were read are not
+        included.
+    """
+    def __init__(self):
+        self.n_packets_sent = 0
+        self.n_bytes_sent = 0
+        self.n_send_errors = 0
+        self.n_packets_received = 0
+        self.n_bytes_received = 0
+        self.last_received = None
+        self.input_wait = TimingHistogram()
+        self._unread = False
+
+    @property
+    def newest_input_age(self):
+        """Time (in seconds) since the most recent input was received, or
+        None if no input has been received.
+        """
+        if self.last_received is None:
+            return None
+        return clock() - self.last_received
+
+    def record_received(self, n_bytes, now):
+        """Record the receipt of a packet containing input for the Node."""
+        self.n_packets_received += 1
+        self.n_bytes_received += n_bytes
+        self.last_received = now
+        self._unread = True
+
+    def record_read(self, now):
+        """Record the host network reading the input of the Node."""
+        if self._unread:
+            self.input_wait.record(now - self.last_received)
+            self._unread = False
+
+    def __repr__(self):
+        return ("<{} sent={} received={} errors={} input_wait={!r}>".format(
+            type(self).__name__, self.n_packets_sent,
+            self.n_packets_received, self.n_send_errors, self.input_wait))
+
+
+class RoundTripProbe(object):
+    """Measures the latency of the loop from the host through SpiNNaker and
+    back to the host.
+
+    A Node simulated on the host outputs the time at which it is executed, the
+    value is sent through a pass through Node (which is simulated on
+    SpiNNaker) to a Node simulated on the host which records how long each new
+    value took to return.  The latency includes the delays introduced by the
+    transmission period of the IO controller.
+
+    Parameters
+    ----------
+    network : :py:class:`nengo.Network`
+        Network to which the probe should be added.
+
+    Attributes
+    ----------
+    latency : :py:class:`~nengo_spinnaker.utils.realtime.TimingHistogram`
+        Round-trip latency of each value which returned to the host.
+    """
+    # Period with which the time sent through SpiNNaker wraps, this must be
+    # representable in S16.15.
+    period = 60.0
+
+    def __init__(self, network):
+        self.latency = TimingHistogram()
+        self._last = None
+
+        with network:
+            self.stamp = nengo.Node(self._stamp, label="round trip stamp")
+            self.loopback = nengo.Node(size_in=1, label="round trip loopback")
+            self.echo = nengo.Node(self._echo, size_in=1,
+                                   label="round trip echo")
+            nengo.Connection(self.stamp, self.loopback, synapse=None)
+            nengo.Connection(self.loopback, self.echo, synapse=None)
+
+    def _stamp(self, t):
+        """Get the time at which the value was output."""
+        return clock() % self.period
+
+    def _echo(self, t, x):
+        """Record the latency of each new value."""
+        value = x[0]
+        if value != self._last and value != 0.0:
+            self._last = value
+            self.latency.record((clock() - value) % self.period)
+
+    def reset(self):
+        """Remove all recorded latencies."""
+        self.latency.clear()
+        self._last = None
@@ -8,6 +8,7 @@ appropriate sized slices.
 
 import collections
 import enum
+import functools
 import itertools
 import math
 from nengo.base import ObjView
@@ -123,9 +124,9 @@ class EnsembleLIF(object):
 
         size_out = decoders.shape[0]
 
-        ens_regions[Regions.decoders] = regions.MatrixRegion(
-            tp.np_to_fix(decoders / model.dt),
-            sliced_dimension=regions.MatrixPartitioning.rows)
+        self.decoders = decoders
+        ens_regions[Regions.decoders] = self._make_decoder_region(
+            decoders, model.dt)
 
         ens_regions[Regions.keys] = regions.KeyspacesRegion(
             output_keys,
@@ -301,29 +302,11 @@ class EnsembleLIF(object):
                     % l_rule_type
                 )
 
-        # Create encoders region
-        ens_regions[Regions.encoders] = regions.MatrixRegion(
-            tp.np_to_fix(encoders_with_gain),
-            sliced_dimension=regions.MatrixPartitioning.rows)
-
-        # Tile direct input across all encoder copies (used for learning)
-        tiled_direct_input = np.tile(
-            self.direct_input,
-            encoders_with_gain.shape[1] // self.ensemble.size_in)
-
-        # Combine the direct input with the bias before converting to S1615 and
-        # creating the region.
-        bias_with_di = params.bias + np.dot(encoders_with_gain,
-                                            tiled_direct_input)
-        assert bias_with_di.ndim == 1
-        ens_regions[Regions.bias] = regions.MatrixRegion(
-            tp.np_to_fix(bias_with_di),
-            sliced_dimension=regions.MatrixPartitioning.rows)
-
-        # Convert the gains to S1615 before creating the region
-        ens_regions[Regions.gain] = regions.MatrixRegion(
-            tp.np_to_fix(params.gain),
-            sliced_dimension=regions.MatrixPartitioning.rows)
+        # Create the encoder, bias and gain regions
+        self.n_encoder_copies = (encoders_with_gain.shape[1] //
+                                 self.ensemble.size_in)
+        ens_regions.update(self._make_neuron_regions(
+            encoders_with_gain, params.bias, params.gain))
 
         # Create modulatory filter and routing regions
         ens_regions[Regions.modulatory_filters] =\
@@ -467,7 +450,90 @@ class EnsembleLIF(object):
         # Return the vertices and callback methods
         return netlistspec(vertices, self.load_to_machine,
                            after_simulation_function=self.after_simulation,
-                           constraints=constraints)
+                           constraints=constraints,
+                           reset_function=self.reset)
+
+    def _make_neuron_regions(self, encoders_with_gain, bias, gain):
+        """Create the regions containing the encoders, biases and gains of the
+        neurons.
+        """
+        # Tile direct input across all encoder copies (used for learning)
+        tiled_direct_input = np.tile(self.direct_input, self.n_encoder_copies)
+
+        # Combine the direct input with the bias before converting to S1615 and
+        # creating the region.
+        bias_with_di = bias + np.dot(encoders_with_gain, tiled_direct_input)
+        assert bias_with_di.ndim == 1
+
+        return {
+            Regions.encoders: regions.MatrixRegion(
+                tp.np_to_fix(encoders_with_gain),
+                sliced_dimension=regions.MatrixPartitioning.rows),
+            Regions.bias: regions.MatrixRegion(
+                tp.np_to_fix(bias_with_di),
+                sliced_dimension=regions.MatrixPartitioning.rows),
+            Regions.gain: regions.MatrixRegion(
+                tp.np_to_fix(gain),
+                sliced_dimension=regions.MatrixPartitioning.rows),
+        }
+
+    @staticmethod
+    def _make_decoder_region(decoders, dt):
+        """Create the region containing the decoders."""
+        return regions.MatrixRegion(
+            tp.np_to_fix(decoders / dt),
+            sliced_dimension=regions.MatrixPartitioning.rows)
+
+    def set_parameters(self, model, bias=None, gain=None, decoders=None):
+        """Change the parameters of an ensemble which has been loaded to the
+        machine.
+
+        The new parameters are written into the memory of the machine, they
+        will take effect when the application is next started (see
+        :py:meth:`~nengo_spinnaker.netlist.Netlist.reset_application`).
+
+        Parameters
+        ----------
+        bias : array or None
+            New bias for each neuron, or None to use the built biases.
+        gain : array or None
+            New gain for each neuron, or None to use the built gains.  The
+            encoders are rescaled to reflect the new gains.
+        decoders : array or None
+            New (size_out x n_neurons) matrix of decoders for the outgoing
+            connections, as constructed by :py:func:`~.get_decoders_and_keys`,
+            or None to use the built decoders.
+
+        Raises
+        ------
+        ValueError
+            If any of the new parameters would change the amount of memory
+            used by the ensemble.
+        """
+        params = model.params[self.ensemble]
+        bias = _check_parameter("bias", params.bias, bias)
+        gain = _check_parameter("gain", params.gain, gain)
+        decoders = _check_parameter("decoders", self.decoders, decoders)
+
+        # Build the new regions
+        encoders_with_gain = np.tile(
+            params.encoders * (gain / self.ensemble.radius)[:, np.newaxis],
+            (1, self.n_encoder_copies)
+        )
+        new_regions = self._make_neuron_regions(encoders_with_gain, bias,
+                                                gain)
+        new_regions[Regions.decoders] = self._make_decoder_region(decoders,
+                                                                  model.dt)
+
+        # Replace and rewrite only those regions which have changed
+        for key, region in iteritems(new_regions):
+            if np.array_equal(region.matrix, self.regions[key].matrix):
+                continue
+
+            self.regions[key] = region
+            for cluster in self.clusters:
+                for vertex in cluster.vertices:
+                    vertex.rewrite_region(key)
 
     def get_signal_constraints(self):
         """Return a set of constraints on which signal parameters may share the
@@ -546,6 +612,13 @@ class EnsembleLIF(object):
         for cluster in self.clusters:
             cluster.load_to_machine(netlist, controller)
 
+    def reset(self, netlist, controller):
+        """Clear the memory shared between the cores simulating the
+        ensemble.
+        """
+        for cluster in self.clusters:
+            cluster.reset(controller)
+
     def after_simulation(self, netlist, simulator, n_steps):
         # If profiling is enabled then get the profiler data
         if self.profiled:
@@ -558,19 +631,40 @@ class EnsembleLIF(object):
                     cl.get_profiler_data()
                 ))
 
-        # Retrieve probe data
+        # Read the recorded data from the machine, it is converted into probe
+        # data by the returned function.
+        recordings = dict()
+        for region, recorded in ((Regions.spike_recording, self.record_spikes),
+                                 (Regions.voltage_recording,
+                                  self.record_voltages),
+                                 (Regions.encoder_recording,
+                                  self.record_encoders)):
+            if recorded:
+                recordings[region] = [
+                    (vx, vx.read_probe_data(region, n_steps))
+                    for cl in self.clusters for vx in cl.vertices
+                ]
+
+        return functools.partial(self._store_probe_data, simulator,
+                                 recordings, n_steps)
+
+    def _store_probe_data(self, simulator, recordings, n_steps):
+        """Convert recorded data into probe data and store it in the
+        simulator.
+        """
         # If spikes were recorded then get the spikes
         if self.record_spikes:
             # Create an empty matrix of the correct size
             spikes = np.zeros((n_steps, self.ensemble.n_neurons),
                               dtype=np.bool)
 
-            # For each cluster read back the spike data
-            for cl in self.clusters:
-                # For each neuron slice copy in the spike data
-                for neurons, data in cl.get_spike_data(n_steps):
-                    neurons_stop = neurons.start + data.shape[1]
-                    spikes[:, neurons.start:neurons_stop] = data
+            # For each neuron slice copy in the spike data
+            for vx, data in recordings[Regions.spike_recording]:
+                neurons = vx.neuron_slice
+                data = vx.decode_probe_data(Regions.spike_recording, data,
+                                            n_steps)
+                neurons_stop = neurons.start + data.shape[1]
+                spikes[:, neurons.start:neurons_stop] = data
 
             # Recast the data as floats
             spike_vals = np.zeros((n_steps, self.ensemble.n_neurons))
@@ -581,11 +675,10 @@ class EnsembleLIF(object):
             # Create an empty matrix of the correct size
             voltages = np.zeros((n_steps, self.ensemble.n_neurons))
 
-            # For each cluster read back the voltage data
-            for cl in self.clusters:
-                # For each neuron slice copy in the voltage data
-                for neurons, data in cl.get_voltage_data(n_steps):
-                    voltages[:, neurons] = data
+            # For each neuron slice copy in the voltage data
+            for vx, data in recordings[Regions.voltage_recording]:
+                voltages[:, vx.neuron_slice] = vx.decode_probe_data(
+                    Regions.voltage_recording, data, n_steps)
 
         # If (learnt) encoders were recorded
         if self.record_encoders:
@@ -595,11 +688,10 @@ class EnsembleLIF(object):
                 self.ensemble.n_neurons,
                 self.learnt_enc_dims))
 
-            # For each cluster read back the encoder data
-            for cl in self.clusters:
-                # For each neuron slice copy in the encoder data
-                for neurons, data in cl.get_encoder_data(n_steps):
-                    encoders[:, neurons] = data
+            # For each neuron slice copy in the encoder data
+            for vx, data in recordings[Regions.encoder_recording]:
+                encoders[:, vx.neuron_slice] = vx.decode_probe_data(
+                    Regions.encoder_recording, data, n_steps)
 
         # Store the data associated with probes
         for p in self.local_probes:
@@ -623,11 +715,8 @@ class EnsembleLIF(object):
             elif p.attr == "scaled_encoders":
                 probe_data = encoders[::sample_every, neuron_slice, :]
 
-            # Store the probe data
-            if p in simulator.data:
-                # Append the new probe data to the existing probe data
-                probe_data = np.vstack((simulator.data[p], probe_data))
-            simulator.data[p] = probe_data
+            # Append the new probe data to the existing probe data
+            simulator.data.append(p, probe_data)
 
 
 class EnsembleCluster(object):
@@ -748,6 +837,14 @@ class EnsembleCluster(object):
 
             sema_spikes = sema_input + 1  # 2nd byte
 
+        # Store the location and size of the shared memory so that it may be
+        # cleared when the application is reset.
+        self.shared_memory = (x, y, [
+            (shared_input_vector, self.size_in*4),
+            (shared_spikes_vector, spike_bytes),
+            (sema_input, 4),
+        ] + [(addr, self.size_in*4) for addr in shared_learnt_input_vector])
+
         # Load each slice in turn, passing references to the shared memory
         for vertex in self.vertices:
             vertex.load_to_machine(
@@ -755,6 +852,13 @@ class EnsembleCluster(object):
                 shared_spikes_vector, sema_input, sema_spikes
             )
 
+    def reset(self, controller):
+        """Clear the shared memory to the state it was in after loading."""
+        x, y, blocks = self.shared_memory
+        with controller(x=x, y=y):
+            for address, n_bytes in blocks:
+                controller.write(address, b"\x00" * n_bytes)
+
     def get_profiler_data(self):
         """Retrieve the profiler data from the simulation."""
         for vertex in self.vertices:
@@ -765,23 +869,6 @@ class EnsembleCluster(object):
             # Get the data and yield a new entry
             yield key, vertex.get_profiler_data()
 
-    def get_spike_data(self, n_steps):
-        """Retrieve the spike data from the simulation."""
-        for vertex in self.vertices:
-            # Get the data and yield a new entry
-            yield vertex.neuron_slice, vertex.get_spike_data(n_steps)
-
-    def get_voltage_data(self, n_steps):
-        """Retrieve the voltage data from the simulation."""
-        for vertex in self.vertices:
-            # Get the data and yield a new entry
-            yield vertex.neuron_slice, vertex.get_voltage_data(n_steps)
-
-    def get_encoder_data(self, n_steps):
-        """Retrieved (learnt) encoder data from the simulation."""
-        for vertex in self.vertices:
-            yield vertex.neuron_slice, vertex.get_encoder_data(n_steps)
-
 
 class EnsembleSlice(Vertex):
     """Represents a single instance of the Ensemble APLX."""
@@ -901,6 +988,17 @@ class EnsembleSlice(Vertex):
             # Perform the write
             region.write_subregion_to_file(mem, *args, **kwargs)
 
+    def rewrite_region(self, key):
+        """Rewrite a region which has already been written into memory."""
+        # Vertices which have not been loaded have nothing to rewrite
+        if not hasattr(self, "region_memory"):
+            return
+
+        args, kwargs = self.region_arguments[key]
+        mem = self.region_memory[key]
+        mem.seek(0)
+        self.regions[key].write_subregion_to_file(mem, *args, **kwargs)
+
     def get_profiler_data(self):
         """Retrieve profiler data from the simulation."""
         # Get the profiler output memory block
@@ -913,13 +1011,20 @@ class EnsembleSlice(Vertex):
 
     def get_probe_data(self, region_name, n_steps):
         """Retrieve probed data from the simulation."""
-        # Get the memory block
-        mem = self.region_memory[region_name]
-        mem.seek(0)
+        return self.decode_probe_data(
+            region_name, self.read_probe_data(region_name, n_steps), n_steps)
+
+    def read_probe_data(self, region_name, n_steps):
+        """Read raw probed data from the simulation, this may be converted
+        with :py:meth:`~.decode_probe_data`.
+        """
+        return self.regions[region_name].read(self.region_memory[region_name],
+                                              self.neuron_slice, n_steps)
 
-        # Read the data from memory
-        region = self.regions[region_name]
-        return region.to_array(mem, self.neuron_slice, n_steps)
+    def decode_probe_data(self, region_name, data, n_steps):
+        """Convert raw probed data into an array."""
+        return self.regions[region_name].from_bytes(data, self.neuron_slice,
+                                                    n_steps)
 
     def get_spike_data(self, n_steps):
         """Retrieve spike data from the simulation."""
@@ -1247,6 +1352,23 @@ def get_decoders_and_keys(signals_connections, minimise=False):
     return decoders, keys
 
 
+def _check_parameter(name, built, value):
+    """Get a new value for a parameter of an ensemble, ensuring that it
+    matches the shape of the value it replaces.
+    """
+    if value is None:
+        return built
+
+    value = np.asarray(value, dtype=np.float)
+    if value.shape != built.shape:
+        raise ValueError(
+            "New {} of shape {} would change the size of the ensemble, "
+            "expected shape {}".format(name, value.shape, built.shape)
+        )
+
+    return value
+
+
 def _get_basic_region_arguments(neuron_slice, output_slice,
                                 learnt_output_slice, cluster_slices):
     """Get the initial arguments for LIF regions."""
@@ -1,3 +1,4 @@
+import collections
 from rig.place_and_route import Cores, SDRAM
 import six
 import struct
@@ -13,10 +14,30 @@ from nengo_spinnaker.utils.application import get_application
 class SDPReceiver(object):
     """An operator which receives SDP packets and transmits the contained data
     as a stream of multicast packets.
+
+    The rows of the outgoing connections are packed into as few cores as
+    possible such that no core transmits more multicast packets each timestep
+    than the budget given by :py:attr:`~.packet_rate`, or receives more values
+    than fit in a single SDP packet (:py:attr:`~.max_dimensions_per_packet`).
+    Connections which are wider than this are split across several cores.
+
+    Attributes
+    ----------
+    vertex_connections : {Vertex: [(transmission_params, slice), ...], ...}
+        The connections (and the slices of their rows) broadcast by each
+        vertex, in the order in which their values are expected in the SDP
+        packets sent to the vertex.
     """
+    # Number of multicast packets which each core may transmit per
+    # microsecond of the machine timestep.
+    packet_rate = 0.128
+
+    # Number of values which may be contained in a single SDP packet
+    max_dimensions_per_packet = 64
+
     def __init__(self):
-        # Create a mapping of which connection is broadcast by which vertex
-        self.connection_vertices = dict()
+        # Create a mapping of which connections are broadcast by which vertex
+        self.vertex_connections = collections.OrderedDict()
         self._sys_regions = dict()
         self._key_regions = dict()
 
@@ -25,22 +46,41 @@ class SDPReceiver(object):
         # NOTE This approach will result in more routes being created than are
         # actually necessary; the way to avoid this is to modify how the
         # builder deals with signals when creating netlists.
-
-        # Get all outgoing signals and their associated transmission parameters
+        # NOTE The rx application shipped in `binaries` ignores the offset of
+        # the values in each SDP packet, so until it is rebuilt each core may
+        # only receive a single packet each timestep.
+        max_dims = min(max(int(self.packet_rate * model.machine_timestep), 1),
+                       self.max_dimensions_per_packet)
+
+        # Break the outgoing connections into slices of rows no wider than a
+        # single core may transmit.
+        pieces = list()
         for signal, transmission_params in \
                 model.get_signals_from_object(self)[OutputPort.standard]:
-            # Get the transform, and from this the keys
-            transform = transmission_params.transform
-            keys = [(signal, {"index": i}) for i in
-                    range(transform.shape[0])]
-
-            # Create a vertex for this connection (assuming its size out <= 64)
-            if len(keys) > 64:
-                raise NotImplementedError(
-                    "Connection is too wide to transmit to SpiNNaker. "
-                    "Consider breaking the connection up or making the "
-                    "originating node a function of time Node."
-                )
+            size_out = transmission_params.transform.shape[0]
+            for start in range(0, size_out, max_dims):
+                rows = slice(start, min(start + max_dims, size_out))
+                pieces.append((signal, transmission_params, rows))
+
+        # Pack the slices into cores, placing the widest slices first and
+        # putting each into the first core with space for it.
+        pieces.sort(key=lambda piece: piece[2].start - piece[2].stop)
+        cores = list()
+        for piece in pieces:
+            size = piece[2].stop - piece[2].start
+            for core in cores:
+                if core[0] + size <= max_dims:
+                    core[0] += size
+                    core[1].append(piece)
+                    break
+            else:
+                cores.append([size, [piece]])
+
+        self.vertex_connections = collections.OrderedDict()
+        for _, core_pieces in cores:
+            # Get the keys of each row transmitted by the core
+            keys = [(signal, {"index": i}) for signal, _, rows in core_pieces
+                    for i in range(rows.start, rows.stop)]
 
             # Create the regions for the system
             sys_region = SystemRegion(model.machine_timestep, len(keys))
@@ -55,19 +95,22 @@ class SDPReceiver(object):
             }
 
             # Create the vertex
-            v = self.connection_vertices[transmission_params] = \
-                Vertex(get_application("rx"), resources)
+            v = Vertex(get_application("rx"), resources)
+            self.vertex_connections[v] = [
+                (transmission_params, rows) for _, transmission_params, rows
+                in core_pieces
+            ]
             self._sys_regions[v] = sys_region
             self._key_regions[v] = keys_region
 
         # Return the netlist specification
-        return netlistspec(list(self.connection_vertices.values()),
+        return netlistspec(list(self.vertex_connections),
                            load_function=self.load_to_machine)
 
     def load_to_machine(self, netlist, controller):
         """Load data to the machine."""
         # Write each vertex region to memory
-        for vx in six.itervalues(self.connection_vertices):
+        for vx in six.iterkeys(self.vertex_connections):
             sys_mem, key_mem = region_utils.create_app_ptr_and_region_files(
                 netlist.vertices_memory[vx],
                 [self._sys_regions[vx], self._key_regions[vx]],
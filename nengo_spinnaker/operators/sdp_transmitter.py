@@ -13,9 +13,26 @@ from nengo_spinnaker.utils.application import get_application
 class SDPTransmitter(object):
     """An operator which receives multicast packets, performs filtering and
     transmits the filtered vector as an SDP packet.
+
+    Parameters
+    ----------
+    size_in : int
+        Number of dimensions of the filtered vector.
+    transmission_period : float
+        Period (in seconds) between transmitting the vector, this is rounded
+        to a whole number of machine timesteps (of at least one).
+
+    Attributes
+    ----------
+    ethernet_chip : (x, y)
+        Ethernet connected chip through which packets are sent to the host,
+        this should be set before the operator is loaded.
     """
-    def __init__(self, size_in):
+    ethernet_chip = (0, 0)
+
+    def __init__(self, size_in, transmission_period=0.0):
         self.size_in = size_in
+        self.transmission_period = transmission_period
         self._vertex = None
         self._sys_region = None
         self._filter_region = None
@@ -23,9 +40,12 @@ class SDPTransmitter(object):
 
     def make_vertices(self, model, *args, **kwargs):
         """Create vertices that will simulate the SDPTransmitter."""
-        # Build the system region
-        self._sys_region = SystemRegion(model.machine_timestep,
-                                        self.size_in, 1)
+        # Build the system region, converting the transmission period into a
+        # number of machine timesteps.
+        delay = max(int(round(self.transmission_period * 1e6 /
+                              model.machine_timestep)), 1)
+        self._sys_region = SystemRegion(model.machine_timestep, self.size_in,
+                                        delay)
 
         # Build the filter regions
         in_sigs = model.get_signals_to_object(self)[InputPort.standard]
@@ -76,7 +96,8 @@ class SDPTransmitter(object):
             )
 
         # Write the regions into memory
-        self._sys_region.write_region_to_file(sys_mem)
+        self._sys_region.write_region_to_file(
+            sys_mem, ethernet_chip=self.ethernet_chip)
         self._filter_region.write_subregion_to_file(filter_mem)
         self._routing_region.write_subregion_to_file(routing_mem)
 
@@ -89,9 +110,13 @@ class SystemRegion(Region):
         self.transmission_delay = delay
 
     def sizeof(self, *args, **kwargs):
-        return 12
+        return 16
 
-    def write_region_to_file(self, fp, *args, **kwargs):
-        """Write the region to file."""
-        fp.write(struct.pack("<3I", self.size_in, self.machine_timestep,
-                             self.transmission_delay))
+    def write_region_to_file(self, fp, ethernet_chip=(0, 0), *args,
+                             **kwargs):
+        """Write the region to file, `ethernet_chip` is the chip to which
+        packets should be sent.
+        """
+        x, y = ethernet_chip
+        fp.write(struct.pack("<4I", self.size_in, self.machine_timestep,
+                             self.transmission_delay, (x << 8) | y))
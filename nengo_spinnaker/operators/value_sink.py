@@ -1,4 +1,5 @@
 import enum
+import functools
 import numpy as np
 from rig.place_and_route import Cores, SDRAM
 import struct
@@ -97,22 +98,32 @@ class ValueSink(object):
             v.load_to_machine(netlist)
 
     def after_simulation(self, netlist, simulator, n_steps):
-        """Retrieve data from a simulation."""
+        """Retrieve data from a simulation.
+
+        The recorded data is read from the machine immediately, the returned
+        function converts it into probe data and stores it in the simulator.
+        """
+        recordings = [(v, v.read_recording_data(n_steps))
+                      for v in self.vertices]
+        return functools.partial(self._store_probe_data, simulator,
+                                 recordings, n_steps)
+
+    def _store_probe_data(self, simulator, recordings, n_steps):
+        """Convert recorded data into probe data and store it in the
+        simulator.
+        """
         # Create an array into which to read probed values
         data = np.zeros((n_steps, self.size_in), dtype=np.float)
 
-        # Read in the recorded results
-        for v in self.vertices:
-            data[:, v.input_slice] = v.read_recording(n_steps)
+        # Convert the recorded results
+        for v, recording in recordings:
+            data[:, v.input_slice] = v.decode_recording(recording, n_steps)
 
         # Apply the sampling
         data = data[::self.sample_every]
 
-        # Store the probe data in the simulator
-        if self.probe in simulator.data:
-            # Include any existing probed data
-            data = np.vstack((simulator.data[self.probe], data))
-        simulator.data[self.probe] = data
+        # Append the probe data to any existing probe data
+        simulator.data.append(self.probe, data)
 
 
 class ValueSinkVertex(Vertex):
@@ -179,13 +190,21 @@ class ValueSinkVertex(Vertex):
 
     def read_recording(self, n_steps):
         """Read back the recorded values."""
-        # Grab the block of memory and seek to the start
-        mem = self.region_memory[Regions.recording]
-        mem.seek(0)
+        return self.decode_recording(self.read_recording_data(n_steps),
+                                     n_steps)
+
+    def read_recording_data(self, n_steps):
+        """Read back the raw recorded data, this may be converted into values
+        with :py:meth:`~.decode_recording`.
+        """
+        return self.regions[Regions.recording].read(
+            self.region_memory[Regions.recording], self.input_slice, n_steps
+        )
 
-        # Perform the read
-        return self.regions[Regions.recording].to_array(
-            mem, self.input_slice, n_steps
+    def decode_recording(self, data, n_steps):
+        """Convert raw recorded data into values."""
+        return self.regions[Regions.recording].from_bytes(
+            data, self.input_slice, n_steps
         )
 
 
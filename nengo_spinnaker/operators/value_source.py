@@ -22,17 +22,29 @@ class ValueSource(object):
         """Create a new source which evaluates the given function over a period
         of time.
         """
-        self.function = function
+        self.function = self.built_function = function
         self.size_out = size_out
         self.period = period
 
+        # Values prepared for a future simulation, see `prepare_simulation`
+        self._prepared = None
+
         # Vertices
         self.system_region = None
         self.keys_region = None
         self.vertices = list()
 
     def make_vertices(self, model, n_steps):
-        """Create the vertices to be simulated on the machine."""
+        """Create the vertices to be simulated on the machine.
+
+        A periodic source only stores a single period of values, which allows
+        it to be simulated indefinitely (`n_steps` is 0 if the length of the
+        simulation is not known).
+        """
+        if self.period is not None:
+            period_steps = int(np.ceil(self.period / model.dt))
+            n_steps = min(n_steps, period_steps) if n_steps else period_steps
+
         # Create the system region
         self.system_region = SystemRegion(model.machine_timestep,
                                           self.period is not None, n_steps)
@@ -87,7 +99,8 @@ class ValueSource(object):
 
         # Return the vertices and callback methods
         return netlistspec(self.vertices, self.load_to_machine,
-                           self.before_simulation)
+                           self.before_simulation,
+                           prepare_simulation_function=self.prepare_simulation)
 
     def load_to_machine(self, netlist, controller):
         """Load the values into memory."""
@@ -115,24 +128,104 @@ class ValueSource(object):
                 vertex.slice, cluster=vertex.cluster
             )
 
+    def set_parameters(self, model, output=None):
+        """Change the function evaluated by the source.
+
+        The values output by the source are written into memory before each
+        simulation, so the new function takes effect from the next simulation.
+
+        Parameters
+        ----------
+        output : callable, Process, array or None
+            New output of the Node, or None to use the output with which the
+            source was built.
+
+        Raises
+        ------
+        ValueError
+            If the new output is of a different size to the existing output.
+        """
+        if output is None:
+            output = self.built_function
+        elif not isinstance(output, Process):
+            value = output(0.0) if callable(output) else output
+            if np.asarray(value).size != self.size_out:
+                raise ValueError(
+                    "New output of size {} would change the size of the "
+                    "source, expected size {}".format(np.asarray(value).size,
+                                                      self.size_out)
+                )
+
+        # Discard any values computed for the previous function
+        self.function = output
+        self._prepared = None
+
+    def prepare_simulation(self, netlist, simulator, start_step, n_steps):
+        """Compute the values to output for a future set of simulation steps.
+
+        This does not communicate with the machine and so may be called while
+        the machine is simulating; the values are written into memory by
+        :py:meth:`~.before_simulation`.
+        """
+        self._prepared = (start_step, n_steps,
+                          self._compute_output(simulator.dt, start_step,
+                                               n_steps))
+
     def before_simulation(self, netlist, simulator, n_steps):
         """Generate the values to output for the next set of simulation steps.
         """
-        # Write out the system region to deal with the current run-time
-        self.system_region.n_steps = n_steps
+        # Use the values which were prepared for this simulation, if there
+        # are any, otherwise compute them now.
+        if (self._prepared is not None and
+                self._prepared[:2] == (simulator.steps, n_steps)):
+            output_matrix = self._prepared[2]
+        else:
+            output_matrix = self._compute_output(simulator.dt,
+                                                 simulator.steps, n_steps)
+        self._prepared = None
 
-        # Evaluate the node for this period of time
+        max_n = output_matrix.shape[0]
+        new_output_region = regions.MatrixRegion(
+            output_matrix,
+            sliced_dimension=regions.MatrixPartitioning.columns
+        )
+
+        # Write the simulation values into memory
+        for vertex in self.vertices:
+            self.vertices_region_memory[vertex][self.system_region].seek(0)
+            self.system_region.n_steps = max_n
+            self.system_region.write_subregion_to_file(
+                self.vertices_region_memory[vertex][self.system_region],
+                vertex.slice
+            )
+
+            self.vertices_region_memory[vertex][self.output_region].seek(0)
+            new_output_region.write_subregion_to_file(
+                self.vertices_region_memory[vertex][self.output_region],
+                vertex.slice
+            )
+
+    def _compute_output(self, dt, start_step, n_steps):
+        """Compute the fixed-point values to output for the given simulation
+        steps.
+        """
+        # Evaluate the node for this period of time, a simulation of
+        # indefinite length (`n_steps` is None) requires a periodic source.
         if self.period is not None:
-            max_n = min(n_steps, int(np.ceil(self.period / simulator.dt)))
-        else:
+            max_n = int(np.ceil(self.period / dt))
+            if n_steps is not None:
+                max_n = min(n_steps, max_n)
+        elif n_steps is not None:
             max_n = n_steps
+        else:
+            raise ValueError("Only periodic sources may be simulated "
+                             "indefinitely.")
 
-        ts = np.arange(simulator.steps, simulator.steps + max_n) * simulator.dt
+        ts = np.arange(start_step, start_step + max_n) * dt
         if callable(self.function):
             values = np.array([self.function(t) for t in ts])
         elif isinstance(self.function, Process):
-            values = self.function.run_steps(max_n, d=self.size_out,
-                                             dt=simulator.dt)
+            values = self.function.run_steps(max_n, d=self.size_out, dt=dt)
         else:
             values = np.array([self.function for t in ts])
 
@@ -162,27 +255,7 @@ class ValueSource(object):
 
         # Combine all of the output values to form a large matrix which we can
         # dump into memory.
-        output_matrix = np.hstack(outputs)
-
-        new_output_region = regions.MatrixRegion(
-            np_to_fix(output_matrix),
-            sliced_dimension=regions.MatrixPartitioning.columns
-        )
-
-        # Write the simulation values into memory
-        for vertex in self.vertices:
-            self.vertices_region_memory[vertex][self.system_region].seek(0)
-            self.system_region.n_steps = max_n
-            self.system_region.write_subregion_to_file(
-                self.vertices_region_memory[vertex][self.system_region],
-                vertex.slice
-            )
-
-            self.vertices_region_memory[vertex][self.output_region].seek(0)
-            new_output_region.write_subregion_to_file(
-                self.vertices_region_memory[vertex][self.output_region],
-                vertex.slice
-            )
+        return np_to_fix(np.hstack(outputs))
 
 
 class SystemRegion(regions.Region):
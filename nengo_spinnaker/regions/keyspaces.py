@@ -47,10 +47,11 @@ class KeyspacesRegion(Region):
         self.prepend_num_keyspaces = prepend_num_keyspaces
         self.bytes_per_field = 4
 
-    def sizeof(self, vertex_slice):
+    def sizeof(self, vertex_slice, **field_args):
         """Get the size of a slice of this region in bytes.
 
-        See :py:meth:`.region.Region.sizeof`
+        See :py:meth:`.region.Region.sizeof`, the arguments for the fields do
+        not affect the size of the region.
         """
         # Get the size from representing the fields
         if not self.partitioned:
@@ -88,9 +89,7 @@ class KeyspacesRegion(Region):
         fp.write(data)
 
 
-# NOTE: This closure intentionally tries to look like a class.
-# TODO: Neaten this docstring.
-def KeyField(maps={}, field=None, tag=None):
+class KeyField(object):
     """Create new field for a :py:class:`~KeyspacesRegion` that will fill in
     specified fields of the key and will then write out a key.
 
@@ -114,24 +113,24 @@ def KeyField(maps={}, field=None, tag=None):
 
     Will return the key with the 'i' key set to 11.
     """
-    key_field = field
+    def __init__(self, maps={}, field=None, tag=None):
+        self.maps = dict(maps)
+        self.field = field
+        self.tag = tag
 
-    def key_getter(keyspace, **kwargs):
+    def __call__(self, keyspace, **kwargs):
         # Build a set of fields to fill in
         fills = {}
-        for (kwarg, field) in iteritems(maps):
+        for (kwarg, field) in iteritems(self.maps):
             fills[field] = kwargs[kwarg]
 
         # Build the key with these fills made
         key = keyspace(**fills)
 
-        return key.get_value(field=key_field, tag=tag)
+        return key.get_value(field=self.field, tag=self.tag)
 
-    return key_getter
 
-
-# NOTE: This closure intentionally tries to look like a class.
-def MaskField(**kwargs):
+class MaskField(object):
     """Create a new field for a :py:class:`~.KeyspacesRegion` that will write
     out a mask value from a keyspace.
 
@@ -147,28 +146,21 @@ def MaskField(**kwargs):
     TypeError
         If both or neither field and tag are specified.
 
-    Returns
-    -------
-    function
-        A function which can be used in the `fields` argument to
-        :py:class:`~.KeyspacesRegion` that will include a specified mask in the
-        region data.
+    The resulting object can be used in the `fields` argument to
+    :py:class:`~.KeyspacesRegion` to include the specified mask in the region
+    data.
     """
-    # Process the arguments
-    field = kwargs.get("field")
-    tag = kwargs.get("tag")
-
-    # Create the field method
-    if field is not None and tag is None:
-        def mask_getter(keyspace, **kwargs):
-            return keyspace.get_mask(field=field)
-
-        return mask_getter
-    elif tag is not None and field is None:
-        def mask_getter(keyspace, **kwargs):
-            return keyspace.get_mask(tag=tag)
-
-        return mask_getter
-    else:
-        raise TypeError("MaskField expects 1 argument, "
-                        "either 'field' or 'tag'.")
+    def __init__(self, **kwargs):
+        # Process the arguments
+        self.field = kwargs.get("field")
+        self.tag = kwargs.get("tag")
+
+        if (self.field is None) == (self.tag is None):
+            raise TypeError("MaskField expects 1 argument, "
+                            "either 'field' or 'tag'.")
+
+    def __call__(self, keyspace, **kwargs):
+        if self.field is not None:
+            return keyspace.get_mask(field=self.field)
+        else:
+            return keyspace.get_mask(tag=self.tag)
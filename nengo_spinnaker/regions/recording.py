@@ -16,16 +16,25 @@ class RecordingRegion(Region):
         n_atoms = vertex_slice.stop - vertex_slice.start
         return self.bytes_per_frame(n_atoms) * self.n_steps
 
-    def _read(self, mem, vertex_slice, n_steps):
-        """Read a suitable amount of data out of the memory view."""
+    def read(self, mem, vertex_slice, n_steps):
+        """Read the recorded data out of the memory view.
+
+        The raw data may be converted into an array by :py:meth:`~.from_bytes`
+        at a later time, this allows the conversion to be performed while the
+        machine is busy.
+        """
         mem.seek(0)
 
         # Determine how many bytes to read, then read
         width = vertex_slice.stop - vertex_slice.start
-        framelength = self.bytes_per_frame(width)
-        data = mem.read(n_steps * framelength)
+        return mem.read(n_steps * self.bytes_per_frame(width))
 
-        return data, framelength, width
+    def to_array(self, mem, vertex_slice, n_steps):
+        """Read the memory and return an appropriately formatted array of the
+        results.
+        """
+        return self.from_bytes(self.read(mem, vertex_slice, n_steps),
+                               vertex_slice, n_steps)
 
     def write_subregion_to_file(self, *args, **kwargs):  # pragma: no cover
         pass  # Nothing to do
@@ -36,10 +45,7 @@ class WordRecordingRegion(RecordingRegion):
     def bytes_per_frame(self, n_atoms):
         return 4*n_atoms
 
-    def to_array(self, mem, vertex_slice, n_steps):
-        # Read from the memory
-        data, _, _ = self._read(mem, vertex_slice, n_steps)
-
+    def from_bytes(self, data, vertex_slice, n_steps):
         # Convert the data into the correct format
         data = np.fromstring(data, dtype=np.int32)
         data.shape = (n_steps, -1)
@@ -58,12 +64,12 @@ class SpikeRecordingRegion(RecordingRegion):
         words_per_frame = n_neurons//32 + (1 if n_neurons % 32 else 0)
         return 4 * words_per_frame
 
-    def to_array(self, mem, vertex_slice, n_steps):
-        """Read the memory and return an appropriately formatted array of the
-        results.
+    def from_bytes(self, data, vertex_slice, n_steps):
+        """Convert data read from memory into an appropriately formatted
+        array of the results.
         """
-        # Read from the memory
-        data, framelength, _ = self._read(mem, vertex_slice, n_steps)
+        framelength = self.bytes_per_frame(vertex_slice.stop -
+                                           vertex_slice.start)
 
         # Format the data as a bitarray
         spikes = bitarray(endian="little")
@@ -91,9 +97,8 @@ class VoltageRecordingRegion(RecordingRegion):
         words_per_frame = n_neurons // 2 + n_neurons % 2
         return 4 * words_per_frame
 
-    def to_array(self, mem, vertex_slice, n_steps):
-        # Read from the memory
-        data, _, n_neurons = self._read(mem, vertex_slice, n_steps)
+    def from_bytes(self, data, vertex_slice, n_steps):
+        n_neurons = vertex_slice.stop - vertex_slice.start
 
         # Convert the data into the correct format
         data = np.fromstring(data, dtype=np.uint16)
@@ -116,9 +121,8 @@ class EncoderRecordingRegion(RecordingRegion):
         words_per_frame = n_neurons * self.n_dimensions
         return 4 * words_per_frame
 
-    def to_array(self, mem, vertex_slice, n_steps):
-        # Read from the memory
-        data, _, n_neurons = self._read(mem, vertex_slice, n_steps)
+    def from_bytes(self, data, vertex_slice, n_steps):
+        n_neurons = vertex_slice.stop - vertex_slice.start
 
         # Convert the data into the correct format
         data = np.fromstring(data, dtype=np.int32)
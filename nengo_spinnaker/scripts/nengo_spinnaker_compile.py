@@ -0,0 +1,74 @@
+"""A script which compiles a network into a bundle which may be loaded onto a
+SpiNNaker machine with :py:meth:`nengo_spinnaker.Simulator.from_bundle`.
+"""
+
+import argparse
+
+import runpy
+
+from nengo_spinnaker.simulator import Simulator
+
+
+def get_network(filename, name="model"):
+    """Get a network defined by a Python script.
+
+    The script is executed and the network is taken from the global variable
+    with the given name.
+    """
+    namespace = runpy.run_path(filename, run_name="__nengo_spinnaker__")
+
+    try:
+        return namespace[name]
+    except KeyError:
+        raise ValueError("{} does not define '{}'".format(filename, name))
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(
+        description="Build, place and route a network ahead of time and save "
+                    "everything required to simulate it on SpiNNaker in a "
+                    "bundle.")
+
+    parser.add_argument("script",
+                        help="Python script which defines the network.")
+    parser.add_argument("bundle", help="File in which to save the bundle.")
+    parser.add_argument("--network", "-n", default="model",
+                        help="Name of the variable holding the network "
+                             "(default: %(default)s).")
+
+    parser.add_argument("--dt", type=float, default=0.001,
+                        help="Simulation timestep (default: %(default)s).")
+    parser.add_argument("--timescale", type=float, default=1.0,
+                        help="Simulation timescale (default: %(default)s).")
+
+    period_group = parser.add_mutually_exclusive_group()
+    period_group.add_argument("--period", type=float, default=10.0,
+                              help="Simulator period in seconds (default: "
+                                   "%(default)s).")
+    period_group.add_argument("--indefinite", dest="period",
+                              action="store_const", const=None,
+                              help="Compile for indefinite simulation.")
+
+    machine_group = parser.add_mutually_exclusive_group()
+    machine_group.add_argument("--hostname", "-H",
+                               help="Compile for the machine with this "
+                                    "hostname.")
+    machine_group.add_argument("--boards", "-b", type=int,
+                               help="Compile for a machine of this many "
+                                    "boards (default: the number required "
+                                    "by the network).")
+
+    args = parser.parse_args(args)
+
+    network = get_network(args.script, args.network)
+    Simulator.compile(network, args.bundle, dt=args.dt, period=args.period,
+                      timescale=args.timescale, hostname=args.hostname,
+                      n_boards=args.boards)
+
+    print("Compiled {} into {}".format(args.script, args.bundle))
+    return 0
+
+
+if __name__ == "__main__":  # pragma: no cover
+    import sys
+    sys.exit(main())
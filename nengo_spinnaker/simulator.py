@@ -1,21 +1,35 @@
 import atexit
+import functools
 import logging
 import nengo
 from nengo.cache import get_default_decoder_cache
 import numpy as np
-from rig.machine_control import MachineController
 from rig.machine_control.consts import AppState
 from rig.place_and_route import Cores
 import rig.place_and_route
+from rig.machine_control import MachineController
 import six
+import sys
+import threading
 import time
 
 from .builder import Model
+from .builder.node import NodeIOController, ProbeNode
+from .builder.cache import (get_model_cache_key, get_network_fingerprint,
+                            load_built_model, store_built_model)
+from .bundle import Bundle, BundleError, make_system_info
+from .host_process import HostProcess
 from .node_io import Ethernet
 from .rc import rc
+from .utils.cache import get_cache
 from .utils.config import getconfig
+from .utils.machine_control import get_core_states, wait_for_cores
+from .utils.machine_pool import MachinePool, default_pool
 from .utils.model import (get_force_removal_passnodes,
                           optimise_out_passthrough_nodes)
+from .utils.probe_data import ProbeData
+from .utils.realtime import RealTimeLoop, StepTimings
+from .utils.timings import Timings
 
 logger = logging.getLogger(__name__)
 
@@ -25,12 +39,36 @@ class Simulator(object):
 
     The simulator period determines how much data will be stored on SpiNNaker
     and is the maximum length of simulation allowed before data is transferred
-    between the machine and the host PC. If the period is set to `None`
-    function of time Nodes will not be optimised and probes will be disabled.
+    between the machine and the host PC. If the period is set to `None` the
+    simulator runs indefinitely (see :py:meth:`~.run_steps`): only periodic
+    function of time Nodes are simulated on the machine and probed values are
+    streamed to the host, where the most recent samples (set by the
+    ``indefinite_probe_steps`` config option) of each probe are kept, so the
+    memory used does not grow with the length of the simulation.  Probes of
+    neurons and learning rules are not supported in this mode.
     For any other value simulation lengths of less than or equal to the period
     will be in real-time, longer simulations will be possible but will include
     short gaps when data is transferred between SpiNNaker and the host.
 
+    The parts of the network which are simulated on the host are stepped in
+    real time alongside the machine.  The ``host_step_policy`` config option
+    determines whether steps which are late are executed as quickly as
+    possible ("catch_up") or skipped ("skip"), and statistics of the lateness
+    and execution time of the steps are recorded in
+    :py:attr:`~.host_step_timings`.  Counts of the packets sent and received
+    for each Node simulated on the host and the age of its input are recorded
+    in :py:attr:`~.node_io_stats` (see
+    :py:mod:`nengo_spinnaker.node_io.telemetry`).  If the ``host_process``
+    config option is set the host network is simulated in a separate process
+    so that it does not compete with the IO for the interpreter lock (see
+    :py:mod:`nengo_spinnaker.host_process`).
+
+    The time taken by each phase of building, loading and running the model
+    (e.g., placement, each load function and each synchronisation barrier)
+    and the numbers of cores, chips, nets and routing table entries used are
+    recorded in :py:attr:`~.timings`, which may be exported with
+    ``sim.timings.to_json()``.
+
     :py:meth:`~.close` should be called when the simulator will no longer be
     used. This will close all sockets used to communicate with the SpiNNaker
     machine and will leave the machine in a clean state. Failure to call
@@ -52,7 +90,7 @@ class Simulator(object):
 
     def __init__(self, network, dt=0.001, period=10.0, timescale=1.0,
                  hostname=None, use_spalloc=None,
-                 allocation_fudge_factor=0.6):
+                 allocation_fudge_factor=0.6, use_machine_pool=None):
         """Create a new Simulator with the given network.
 
         Parameters
@@ -69,6 +107,12 @@ class Simulator(object):
         use_spalloc : bool or None
             Allocate a SpiNNaker machine for the simulator using ``spalloc``.
             If None then the setting specified in the config file will be used.
+        use_machine_pool : bool or None
+            Take an already booted machine from the process-wide pool if one
+            is available and return the machine to the pool when the
+            simulator is closed, see
+            :py:mod:`~nengo_spinnaker.utils.machine_pool`.  If None then the
+            setting specified in the config file will be used.
 
         Other Parameters
         ----------------
@@ -82,13 +126,270 @@ class Simulator(object):
         """
         # Add this simulator to the set of open simulators
         Simulator._add_simulator(self)
+        self.timings = Timings()
+
+        io_cls, io_kwargs, machine_timestep, builder_kwargs = \
+            self._configure(network, dt, period, timescale)
+        use_spalloc, hostname, pool = self._get_machine_options(
+            hostname, use_spalloc, use_machine_pool)
+
+        # If requested, start getting the machine (allocating it if
+        # necessary) while the model is built.  The number of boards to
+        # allocate is taken from the config or estimated from the network.
+        n_boards = getconfig(network.config, Simulator, "n_boards", None)
+        machine_worker = None
+        if getconfig(network.config, Simulator, "allocate_during_build",
+                     False):
+            if use_spalloc and n_boards is None:
+                n_boards = _n_boards(_estimate_n_cores(network),
+                                     allocation_fudge_factor)
+
+            machine_worker = _HostWorker(functools.partial(
+                pool.acquire, hostname, n_boards, self.timings))
+            machine_worker.start()
+
+        try:
+            self.netlist = self._build(network, dt, machine_timestep,
+                                       io_cls, io_kwargs, builder_kwargs)
+        except Exception:
+            # Release any machine which was being acquired
+            if machine_worker is not None:
+                machine_worker.join()
+                if machine_worker.result is not None:
+                    machine_worker.result.destroy()
+            raise
+
+        self._prepare_host(network)
+
+        # Determine how many boards are required (assuming 16 usable cores
+        # per chip and 48 chips per board).
+        start = time.time()
+        required_boards = None
+        if use_spalloc:
+            required_boards = _n_boards(self.netlist.n_cores,
+                                        allocation_fudge_factor)
+
+        # Get a booted machine (allocating it if necessary) and a
+        # system-info object to place & route against.  Machines which are
+        # not taken from the pool are allocated and booted as required.
+        logger.info("Getting SpiNNaker machine")
+        with self.timings.time("wait_for_machine"):
+            if machine_worker is not None:
+                machine_worker.join()
+                machine_worker.check()
+                self.machine = machine_worker.result
+
+                if (required_boards is not None and
+                        self.machine.n_boards < required_boards):
+                    logger.warning(
+                        "Allocated %d board(s) but %d are required, "
+                        "allocating again", self.machine.n_boards,
+                        required_boards)
+                    if self._machine_pool is not None:
+                        self._machine_pool.release(self.machine)
+                    else:
+                        self.machine.destroy()
+                    self.machine = None
+            else:
+                self.machine = None
+
+            if self.machine is None:
+                self.machine = pool.acquire(
+                    hostname, n_boards or required_boards, self.timings)
+
+        self.controller = self.machine.controller
+        self.job = self.machine.job
+        system_info = self.machine.system_info
+
+        # Place & Route
+        self._place_and_route(network, system_info)
+
+        # Load the application
+        self._load(system_info, functools.partial(
+            self.netlist.load_application, self.controller, system_info,
+            self.timings
+        ))
+
+        logger.info("Preparing and loading machine took {:3f} seconds".format(
+            time.time() - start
+        ))
+        logger.debug("Timings: %s", self.timings.to_json())
+
+    @classmethod
+    def compile(cls, network, filename, dt=0.001, period=10.0,
+                timescale=1.0, hostname=None, n_boards=None,
+                allocation_fudge_factor=0.6):
+        """Build, place and route a network and save everything required to
+        simulate it in a bundle which may be loaded with
+        :py:meth:`~.from_bundle`, possibly on another computer.
+
+        The model is placed and routed against either a specific machine or
+        an ideal machine of a number of boards, see
+        :py:mod:`~nengo_spinnaker.bundle`.
 
+        Parameters
+        ----------
+        network : :py:class:`nengo.Network`
+        filename : str
+            File into which to save the bundle.
+        dt, period, timescale :
+            As for the simulator.
+        hostname : str or None
+            Hostname of the (booted) machine to compile for.
+        n_boards : int or None
+            If no hostname is given, the number of boards of the machine to
+            compile for.  If None then the number of boards is determined
+            from the number of cores required and the
+            `allocation_fudge_factor` (as when using ``spalloc``).
+
+        Returns
+        -------
+        :py:class:`~nengo_spinnaker.utils.timings.Timings`
+            The time taken by each phase of compilation.
+        """
+        # The simulator is only used to build the model, it is never
+        # connected to a machine.
+        sim = cls.__new__(cls)
+        sim.timings = Timings()
+        io_cls, io_kwargs, machine_timestep, builder_kwargs = \
+            sim._configure(network, dt, period, timescale)
+        fingerprint = get_network_fingerprint(network, dt, machine_timestep,
+                                              sim.max_steps, io_cls,
+                                              io_kwargs)
+        sim.netlist = sim._build(network, dt, machine_timestep, io_cls,
+                                 io_kwargs, builder_kwargs)
+
+        # Describe the machine to compile for
+        if hostname is not None:
+            controller = MachineController(hostname)
+            with sim.timings.time("boot"):
+                controller.boot()
+            with sim.timings.time("get_system_info"):
+                system_info = controller.get_system_info()
+        else:
+            if n_boards is None:
+                n_boards = _n_boards(sim.netlist.n_cores,
+                                     allocation_fudge_factor)
+            system_info = make_system_info(n_boards)
+
+        sim._place_and_route(network, system_info)
+
+        # Render the bundle
+        bundle = Bundle.from_model(network, sim.model, sim.io_controller,
+                                   sim.netlist, system_info, dt, period,
+                                   timescale, n_boards, fingerprint,
+                                   sim.timings)
+        with sim.timings.time("save_bundle"):
+            bundle.save(filename)
+
+        sim.io_controller.close()
+        return sim.timings
+
+    @classmethod
+    def from_bundle(cls, filename, network, hostname=None, use_spalloc=None,
+                    use_machine_pool=None):
+        """Create a simulator from a bundle produced by :py:meth:`~.compile`.
+
+        The model is not built, placed or routed; the data in the bundle is
+        loaded directly onto the machine.
+
+        Parameters
+        ----------
+        filename : str
+            File containing the bundle.
+        network : :py:class:`nengo.Network`
+            The network from which the bundle was compiled, this must be
+            constructed identically but is not built.
+        hostname, use_spalloc, use_machine_pool :
+            As for the simulator.  If ``spalloc`` is used then a machine of
+            the size for which the bundle was compiled is allocated.
+
+        Raises
+        ------
+        :py:class:`~nengo_spinnaker.bundle.BundleError`
+            If the bundle was compiled from a different network or cannot be
+            loaded onto the machine.
+        """
+        sim = cls.__new__(cls)
+        Simulator._add_simulator(sim)
+        sim.timings = Timings()
+
+        with sim.timings.time("load_bundle"):
+            bundle = Bundle.load_file(filename)
+
+        io_cls, io_kwargs, machine_timestep, _ = sim._configure(
+            network, bundle.dt, bundle.period, bundle.timescale)
+
+        fingerprint = get_network_fingerprint(network, bundle.dt,
+                                              machine_timestep, sim.max_steps,
+                                              io_cls, io_kwargs)
+        if fingerprint is None or bundle.fingerprint is None:
+            logger.warning("The network could not be fingerprinted, so it "
+                           "can't be checked that the bundle was compiled "
+                           "from it")
+        elif fingerprint != bundle.fingerprint:
+            Simulator._remove_simulator(sim)
+            raise BundleError("The bundle was compiled from a different "
+                              "network or configuration")
+
+        # Restore the model rather than building it
+        with sim.timings.time("restore_model"):
+            sim.model = Model(dt=bundle.dt, machine_timestep=machine_timestep)
+            sim.netlist = bundle.restore(network, sim.model, sim.io_controller)
+        sim._prepare_host(network)
+
+        # Get a machine of the size for which the bundle was compiled
+        use_spalloc, hostname, pool = sim._get_machine_options(
+            hostname, use_spalloc, use_machine_pool)
+        logger.info("Getting SpiNNaker machine")
+        with sim.timings.time("wait_for_machine"):
+            sim.machine = pool.acquire(hostname, bundle.n_boards or 1,
+                                       sim.timings)
+        sim.job = sim.machine.job
+        system_info = sim.machine.system_info
+
+        try:
+            bundle.check_machine(sim.netlist, system_info)
+        except BundleError:
+            sim.controller = sim.machine.controller
+            sim.close()
+            raise
+
+        # Load the bundle, the controller returned by the bundle translates
+        # the addresses used by the netlist into those of the memory
+        # allocated on the machine.
+        def load():
+            sim.controller = bundle.load(sim.machine.controller, sim.netlist,
+                                         sim.timings)
+
+        sim.controller = sim.machine.controller
+        sim._load(system_info, load)
+
+        logger.debug("Timings: %s", sim.timings.to_json())
+        return sim
+
+    def _configure(self, network, dt, period, timescale):
+        """Read the configuration of the simulator from the network config.
+
+        Returns
+        -------
+        io_cls, io_kwargs
+            Type of the IO controller and the arguments used to create it.
+        machine_timestep : int
+            Machine timestep in microseconds.
+        builder_kwargs : dict
+            Keyword arguments for :py:meth:`~.Model.build`.
+        """
         # Create the IO controller
         io_cls = getconfig(network.config, Simulator, "node_io", Ethernet)
         io_kwargs = getconfig(network.config, Simulator, "node_io_kwargs",
                               dict())
         self.io_controller = io_cls(**io_kwargs)
 
+        # Statistics of the IO performed for each Node, these are updated
+        # while simulating.
+        self.node_io_stats = self.io_controller.node_stats
+
         # Calculate the machine timestep, this is measured in microseconds
         # (hence the 1e6 scaling factor).
         self.timescale = timescale
@@ -97,47 +398,62 @@ class Simulator(object):
         # Determine the maximum run-time
         self.max_steps = None if period is None else int(period / dt)
 
+        # Determine whether host processing should be overlapped with
+        # simulation when running for more than one period.
+        self.pipelined = getconfig(network.config, Simulator,
+                                   "pipelined_runs", False)
+
+        # Determine how the host network should keep pace with the machine
+        self.host_step_policy = getconfig(network.config, Simulator,
+                                          "host_step_policy", "catch_up")
+        self.host_spin_time = getconfig(network.config, Simulator,
+                                        "host_spin_time", 1e-4)
+        self.host_step_timings = StepTimings()
+
+        # Determine whether the host network should be simulated in a
+        # separate process, this requires the IO to be performed by the
+        # thread spawned by the IO controller.
+        self.host_process = getconfig(network.config, Simulator,
+                                      "host_process", False)
+        if (self.host_process and
+                type(self.io_controller).wait is not NodeIOController.wait):
+            raise ValueError(
+                "{} performs IO while waiting between host steps so cannot "
+                "be used with host_process".format(io_cls.__name__)
+            )
+
+        # Determine how long to wait at synchronisation barriers
+        self.sync_timeout = getconfig(network.config, Simulator,
+                                      "sync_timeout", 10.0)
+
         self.steps = 0  # Steps simulated
 
         # If the simulator is in "run indefinite" mode (i.e., max_steps=None)
-        # then we modify the builders to ignore function of time Nodes and
-        # probes.
-        builder_kwargs = self.io_controller.builder_kwargs
+        # then we modify the builders to stream aperiodic function of time
+        # Nodes and probes to and from the host.
         if self.max_steps is None:
-            raise NotImplementedError
-
-        # Create a model from the network, using the IO controller
-        logger.debug("Building model")
-        start_build = time.time()
-        self.model = Model(dt=dt, machine_timestep=machine_timestep,
-                           decoder_cache=get_default_decoder_cache())
-        self.model.build(network, **builder_kwargs)
-
-        forced_removals = get_force_removal_passnodes(network)
-        optimise_out_passthrough_nodes(self.model,
-                                       self.io_controller.passthrough_nodes,
-                                       network.config, forced_removals)
-
-        logger.info("Build took {:.3f} seconds".format(time.time() -
-                                                       start_build))
-
-        self.model.decoder_cache.shrink()
-        self.dt = self.model.dt
-        self._closed = False  # Whether the simulator has been closed or not
-
-        self.host_sim = self._create_host_sim()
-
-        # Holder for probe data
-        self.data = {}
-
-        # Holder for profiling data
-        self.profiler_data = {}
-
-        # Convert the model into a netlist
-        logger.info("Building netlist")
-        start = time.time()
-        self.netlist = self.model.make_netlist(self.max_steps or 0)
-
+            builder_kwargs = self.io_controller.indefinite_builder_kwargs(
+                getconfig(network.config, Simulator,
+                          "indefinite_probe_steps", 10000)
+            )
+        else:
+            builder_kwargs = self.io_controller.builder_kwargs
+        self._host_loop = None  # Loop running an indefinite simulation
+        self._host_process = None  # Process simulating the host network
+
+        return io_cls, io_kwargs, machine_timestep, builder_kwargs
+
+    def _get_machine_options(self, hostname, use_spalloc, use_machine_pool):
+        """Determine how the machine should be acquired.
+
+        Returns
+        -------
+        use_spalloc : bool
+        hostname : str or None
+            Hostname of the machine to use, None if spalloc is to be used.
+        pool : :py:class:`~nengo_spinnaker.utils.machine_pool.MachinePool`
+            Pool from which to acquire the machine.
+        """
         # Determine whether to use a spalloc machine or not
         if use_spalloc is None:
             # Default is to not use spalloc; this is indicated by either the
@@ -147,48 +463,47 @@ class Simulator(object):
                 rc.has_option("spinnaker_machine", "use_spalloc") and
                 rc.getboolean("spinnaker_machine", "use_spalloc"))
 
-        # Create a controller for the machine and boot if necessary
-        self.job = None
-        if not use_spalloc:
+        # Determine whether to reuse machines from the process-wide pool
+        if use_machine_pool is None:
+            use_machine_pool = (
+                rc.has_option("spinnaker_machine", "use_machine_pool") and
+                rc.getboolean("spinnaker_machine", "use_machine_pool"))
+        self._machine_pool = default_pool if use_machine_pool else None
+        pool = self._machine_pool or MachinePool()
+
+        if not use_spalloc and hostname is None:
             # Use the specified machine rather than trying to get one
             # allocated.
-            if hostname is None:
-                hostname = rc.get("spinnaker_machine", "hostname")
-        else:
-            # Attempt to get a machine allocated to us
-            from spalloc import Job
-
-            # Determine how many boards to ask for (assuming 16 usable cores
-            # per chip and 48 chips per board).
-            n_cores = self.netlist.n_cores * (1.0 + allocation_fudge_factor)
-            n_boards = int(np.ceil((n_cores / 16.) / 48.))
+            hostname = rc.get("spinnaker_machine", "hostname")
+        elif use_spalloc:
+            hostname = None
 
-            # Request the job
-            self.job = Job(n_boards)
-            logger.info("Allocated job ID %d...", self.job.id)
+        return use_spalloc, hostname, pool
 
-            # Wait until we're given the machine
-            logger.info("Waiting for machine allocation...")
-            self.job.wait_until_ready()
+    def _prepare_host(self, network):
+        """Prepare the parts of the simulator which run on the host once the
+        model has been built.
+        """
+        self.dt = self.model.dt
+        self._closed = False  # Whether the simulator has been closed or not
 
-            # spalloc recommends a slight delay before attempting to boot the
-            # machine, later versions of spalloc server may relax this
-            # requirement.
-            time.sleep(5.0)
+        self.host_sim = self._create_host_sim()
 
-            # Store the hostname
-            hostname = self.job.hostname
-            logger.info("Using %d board(s) of \"%s\" (%s)",
-                        len(self.job.boards), self.job.machine_name, hostname)
+        # Holder for probe data
+        self.data = ProbeData(self.dt)
+        self._probes = list(network.all_probes)
 
-        self.controller = MachineController(hostname)
-        self.controller.boot()
+        # Probes recorded on the host store their data in ring buffers
+        self._probe_nodes = [n for n in self.io_controller.host_network.nodes
+                             if isinstance(n, ProbeNode)]
+        for node in self._probe_nodes:
+            self.data.attach(node.probe, node.buffer)
 
-        # Get a system-info object to place & route against
-        logger.info("Getting SpiNNaker machine specification")
-        system_info = self.controller.get_system_info()
+        # Holder for profiling data
+        self.profiler_data = {}
 
-        # Place & Route
+    def _place_and_route(self, network, system_info):
+        """Place and route the netlist onto the machine."""
         logger.info("Placing and routing")
         self.netlist.place_and_route(
             system_info,
@@ -196,41 +511,96 @@ class Simulator(object):
                             'placer', rig.place_and_route.place),
             place_kwargs=getconfig(network.config, Simulator,
                                    'placer_kwargs', {}),
+            cache=get_cache("place_and_route"),
+            timings=self.timings,
         )
 
         logger.info("{} cores in use".format(len(self.netlist.placements)))
         chips = set(six.itervalues(self.netlist.placements))
         logger.info("Using {}".format(chips))
 
+    def _load(self, system_info, load):
+        """Prepare the IO controller, load the application using the given
+        function and prepare the machine for simulation.
+        """
         # Prepare the simulator against the placed, allocated and routed
         # netlist.
-        self.io_controller.prepare(self.model, self.controller, self.netlist)
+        with self.timings.time("prepare_io"):
+            self.io_controller.prepare(self.model, self.controller,
+                                       self.netlist, system_info)
 
         # Load the application
         logger.info("Loading application")
-        self.netlist.load_application(self.controller, system_info)
+        load()
 
         # Check if any cores are in bad states
         if self.controller.count_cores_in_state(["exit", "dead", "watchdog",
                                                  "runtime_exception"]):
-            for vertex, (x, y) in six.iteritems(self.netlist.placements):
-                p = self.netlist.allocations[vertex][Cores].start
-                status = self.controller.get_processor_status(p, x, y)
-                if status.cpu_state is not AppState.sync0:
-                    print("Core ({}, {}, {}) in state {!s}".format(
-                        x, y, p, status))
-                    print(self.controller.get_iobuf(p, x, y))
+            self._print_core_failures(AppState.sync0)
             raise Exception("Unexpected core failures.")
 
-        logger.info("Preparing and loading machine took {:3f} seconds".format(
-            time.time() - start
-        ))
-
         logger.info("Setting router timeout to 16 cycles")
-        for x, y in system_info.chips():
-            with self.controller(x=x, y=y):
-                data = self.controller.read(0xf1000000, 4)
-                self.controller.write(0xf1000000, data[:-1] + b'\x10')
+        with self.timings.time("set_router_timeout"):
+            for x, y in system_info.chips():
+                with self.controller(x=x, y=y):
+                    data = self.controller.read(0xf1000000, 4)
+                    self.controller.write(0xf1000000, data[:-1] + b'\x10')
+
+    def _build(self, network, dt, machine_timestep, io_cls, io_kwargs,
+               builder_kwargs):
+        """Build the model and convert it into a netlist, either may be
+        retrieved from the cache.
+
+        Returns
+        -------
+        :py:class:`~nengo_spinnaker.netlist.Netlist`
+        """
+        # Create a model from the network, using the IO controller
+        logger.debug("Building model")
+        start_build = time.time()
+        self.model = Model(dt=dt, machine_timestep=machine_timestep,
+                           decoder_cache=get_default_decoder_cache())
+
+        # Attempt to retrieve the built model and netlist from the cache
+        model_cache = get_cache("models")
+        cache_key = None
+        netlist = None
+        if model_cache is not None:
+            cache_key = get_model_cache_key(network, dt, machine_timestep,
+                                            self.max_steps, io_cls, io_kwargs)
+        if cache_key is not None:
+            with self.timings.time("load_cached_model"):
+                netlist = load_built_model(model_cache, cache_key, network,
+                                           self.model, self.io_controller)
+
+        if netlist is None:
+            with self.timings.time("build"):
+                self.model.build(network, **builder_kwargs)
+
+            with self.timings.time("remove_passthrough_nodes"):
+                forced_removals = get_force_removal_passnodes(network)
+                optimise_out_passthrough_nodes(
+                    self.model, self.io_controller.passthrough_nodes,
+                    network.config, forced_removals
+                )
+
+        logger.info("Build took {:.3f} seconds".format(time.time() -
+                                                       start_build))
+
+        self.model.decoder_cache.shrink()
+
+        # Convert the model into a netlist
+        if netlist is None:
+            logger.info("Building netlist")
+            with self.timings.time("make_netlist"):
+                netlist = self.model.make_netlist(self.max_steps or 0)
+
+            # Store the model and netlist in the cache
+            if cache_key is not None:
+                store_built_model(model_cache, cache_key, network,
+                                  self.model, self.io_controller, netlist)
+
+        return netlist
 
     def __enter__(self):
         """Enter a context which will close the simulator when exited."""
@@ -244,6 +614,46 @@ class Simulator(object):
         """Exit a context and close the simulator."""
         self.close()
 
+    def reset(self, seed=None):
+        """Reset the simulator to the state it was in before any simulation.
+
+        The applications on the machine are restarted without rebuilding the
+        model or reloading the routing tables and the data in memory, so
+        learnt parameters, filter states and probe data are discarded.
+
+        Parameters
+        ----------
+        seed : int or None
+            Seed for the network simulated on the host.  The parts of the
+            network simulated on SpiNNaker are unchanged as they are
+            determined when the model is built.
+        """
+        if self._closed:
+            raise Exception("Simulator has been closed and can't be reset.")
+
+        # Restart the application on the machine
+        start = time.time()
+        with self.timings.time("reset_application"):
+            self.netlist.reset_application(self.controller)
+
+        # Reset the host-side state
+        self.steps = 0
+        self.data.clear()
+        self.profiler_data.clear()
+        self._reset_host(seed)
+        if self._host_process is not None:
+            self._host_process.reset(seed)
+
+        logger.info("Reset took {:3f} seconds".format(time.time() - start))
+
+    def _reset_host(self, seed):
+        """Reset the network simulated on the host."""
+        self.host_step_timings.clear()
+        self._host_time["start"] = None
+        for node in self._probe_nodes:
+            node.reset()
+        self.host_sim.reset(seed=seed)
+
     def run(self, time_in_seconds):
         """Simulate for the given length of time."""
         # Determine how many steps to simulate for
@@ -251,30 +661,126 @@ class Simulator(object):
         self.run_steps(steps)
 
     def run_steps(self, steps):
-        """Simulate a give number of steps."""
+        """Simulate a give number of steps.
+
+        Simulations longer than the simulator period are broken into several
+        periods.  If the ``pipelined_runs`` config option is set then, while
+        the machine simulates one period, the data retrieved after the
+        previous period is processed and the data required for the next period
+        is computed by a worker thread.  Consequently any functions of time
+        which are computed on the host may be called from this thread.
+
+        If the simulator was created with ``period=None`` then the machine
+        runs indefinitely while the host simulates `steps` steps (or until
+        :py:meth:`~.stop` is called if `steps` is None); `steps` may only be
+        None for such simulators.
+        """
+        if steps is None or self.max_steps is None:
+            for finaliser in self._run_steps(steps):
+                finaliser()
+            return
+
+        # Allocate storage for all the probed data in advance
+        periods = [self.max_steps] * (steps // self.max_steps)
+        if steps % self.max_steps:
+            periods.append(steps % self.max_steps)
+        self.data.reserve(self._probes, periods)
+
+        finalisers = list()
         while steps > 0:
             n_steps = min((steps, self.max_steps))
-            self._run_steps(n_steps)
             steps -= n_steps
 
-    def _run_steps(self, steps):
-        """Simulate for the given number of steps."""
+            if self.pipelined:
+                # Process the results of the previous period and prepare the
+                # next while the machine is running.
+                host_work = functools.partial(
+                    self._pipelined_host_work, finalisers,
+                    self.steps + n_steps, min((steps, self.max_steps))
+                )
+                finalisers = self._run_steps(n_steps, host_work)
+            else:
+                for finaliser in self._run_steps(n_steps):
+                    finaliser()
+
+        # Process the results of the final period
+        for finaliser in finalisers:
+            finaliser()
+
+    def stop(self):
+        """Stop an indefinite simulation.
+
+        This may be called from another thread or from a function simulated
+        on the host.  The applications on the machine cannot be paused when
+        running indefinitely, so they are restarted (as by :py:meth:`~.reset`)
+        once stopped; a later run continues the host simulation but the
+        state of the parts of the network simulated on the machine is lost.
+        """
+        loop = self._host_loop
+        if loop is not None:
+            loop.stop()
+
+        if self._host_process is not None:
+            self._host_process.stop()
+
+    def _pipelined_host_work(self, finalisers, next_start, next_steps):
+        """Work performed on the host while the machine is simulating."""
+        # Complete processing of the data retrieved from the previous period
+        for finaliser in finalisers:
+            finaliser()
+
+        # Prepare the data for the next period
+        if next_steps > 0:
+            self.netlist.prepare_simulation(self, next_start, next_steps)
+
+    def _step_host(self):
+        """Simulate a single step of the host network and transmit the
+        outputs of its Nodes to the machine.
+        """
+        self.host_sim.step()
+        self.io_controller.end_step()
+
+    def _run_steps(self, steps, host_work=None):
+        """Simulate for the given number of steps.
+
+        Parameters
+        ----------
+        steps : int or None
+            Number of steps to simulate, or None to simulate until
+            :py:meth:`~.stop` is called.  If the simulator has no period then
+            the machine runs indefinitely and is stopped once the host has
+            simulated this many steps.
+        host_work : callable or None
+            Function which will be called from a worker thread while the
+            machine is simulating.
+
+        Returns
+        -------
+        [`fn()`, ...]
+            Functions which must be called to complete processing of the data
+            retrieved from the machine.
+        """
         if self._closed:
             raise Exception("Simulator has been closed and can't be used to "
                             "run further simulations.")
 
-        if steps is None:
-            if self.max_steps is not None:
-                raise Exception(
-                    "Cannot run indefinitely if a simulator period was "
-                    "specified. Create a new simulator with Simulator(model, "
-                    "period=None) to perform indefinite time simulations."
-                )
-        else:
+        indefinite = self.max_steps is None
+        if steps is None and not indefinite:
+            raise Exception(
+                "Cannot run indefinitely if a simulator period was "
+                "specified. Create a new simulator with Simulator(model, "
+                "period=None) to perform indefinite time simulations."
+            )
+        elif not indefinite:
             assert steps <= self.max_steps
 
+        # Start the process which simulates the host network, this must be
+        # done before any other threads are started.
+        if self.host_process and self._host_process is None:
+            self._host_process = HostProcess(self)
+
         # Prepare the simulation
-        self.netlist.before_simulation(self, steps)
+        self.netlist.before_simulation(self, None if indefinite else steps)
 
         # Wait for all cores to hit SYNC0 (either by remaining it or entering
         # it from init)
@@ -282,13 +788,13 @@ class Simulator(object):
                                   self.netlist.n_cores)
         self.controller.send_signal("sync0")
 
-        # Get a new thread for the IO
+        # Get a new thread for the IO and one for the host work
         io_thread = self.io_controller.spawn()
+        worker = _HostWorker(host_work) if host_work is not None else None
 
         # Run the simulation
         try:
             # Prep
-            exp_time = steps * self.dt / self.timescale
             io_thread.start()
 
             # Wait for all cores to hit SYNC1
@@ -297,72 +803,117 @@ class Simulator(object):
             logger.info("Running simulation...")
             self.controller.send_signal("sync1")
 
-            # Execute the local model
-            host_steps = 0
-            start_time = time.time()
-            run_time = 0.0
-            local_timestep = self.dt / self.timescale
-            while run_time < exp_time:
-                # Run a step
-                self.host_sim.step()
-                run_time = time.time() - start_time
-
-                # If that step took less than timestep then spin
-                time.sleep(0.0001)
-                while run_time < host_steps * local_timestep:
-                    time.sleep(0.0001)
-                    run_time = time.time() - start_time
+            # Start the host work now that the machine is running
+            if worker is not None:
+                worker.start()
+
+            # Execute the local model in real time
+            if self._host_process is not None:
+                with self.timings.time("simulate"):
+                    steps_elapsed = self._host_process.run(steps)
+            else:
+                loop = RealTimeLoop(self.dt / self.timescale,
+                                    self.host_step_policy, self.host_spin_time,
+                                    self.host_step_timings,
+                                    self.io_controller.wait)
+                if indefinite:
+                    self._host_loop = loop
+                with self.timings.time("simulate"):
+                    loop.run(self._step_host, steps)
+                steps_elapsed = loop.steps_elapsed
         finally:
             # Stop the IO thread whatever occurs
+            self._host_loop = None
             io_thread.stop()
 
-        # Wait for cores to re-enter sync0
-        self._wait_for_transition(AppState.run, AppState.sync0,
-                                  self.netlist.n_cores)
+            # Wait for the host work to complete
+            if worker is not None and worker.ident is not None:
+                worker.join()
+
+        for name, value in six.iteritems(self.io_controller.get_metrics()):
+            self.timings.count("io/" + name, value)
+
+        logger.info("Host steps: %s late, %s execution time, %d skipped",
+                    self.host_step_timings.lateness,
+                    self.host_step_timings.execution_time,
+                    self.host_step_timings.n_skipped)
+
+        # Re-raise any error which occurred while performing the host work
+        if worker is not None:
+            worker.check()
+
+        if indefinite:
+            # The machine simulates until it is told to stop, so the length
+            # of the simulation is the number of steps which elapsed on the
+            # host.
+            steps = steps_elapsed
+        else:
+            # Wait for cores to re-enter sync0, they may still be simulating
+            # if the host fell behind.
+            self._wait_for_transition(AppState.run, AppState.sync0,
+                                      self.netlist.n_cores,
+                                      steps * self.dt / self.timescale)
 
         # Retrieve simulation data
         start = time.time()
         logger.info("Retrieving simulation data")
-        self.netlist.after_simulation(self, steps)
+        finalisers = self.netlist.after_simulation(self, steps, self.timings)
         logger.info("Retrieving data took {:3f} seconds".format(
             time.time() - start
         ))
 
+        # Restart the applications which were running indefinitely so that
+        # they are ready for a further simulation.
+        if indefinite:
+            with self.timings.time("reset_application"):
+                self.netlist.reset_application(self.controller)
+
         # Increase the steps count
         self.steps += steps
 
-    def _wait_for_transition(self, from_state, desired_to_state, num_verts):
-        while True:
-            # If no cores are still in from_state, stop
-            if self.controller.count_cores_in_state(from_state) == 0:
-                break
+        return finalisers
 
-            # Wait a bit
-            time.sleep(1.0)
+    def _wait_for_transition(self, from_state, desired_to_state, num_verts,
+                             expected_duration=0.0):
+        """Wait for all cores to move from one state to another.
 
-        # Check if any cores haven't exited cleanly
-        num_ready = self.controller.wait_for_cores_to_reach_state(
-            desired_to_state, num_verts, timeout=5.0)
+        Parameters
+        ----------
+        expected_duration : float
+            Time (in seconds) the transition is expected to take, the
+            ``sync_timeout`` config option is added to this to determine how
+            long to wait before assuming that cores have failed.
+        """
+        name = "sync/{}_to_{}".format(from_state.name, desired_to_state.name)
+        with self.timings.time(name):
+            num_ready = wait_for_cores(self.controller, desired_to_state,
+                                       num_verts,
+                                       expected_duration + self.sync_timeout)
 
         if num_ready != num_verts:
-            # Loop through all placed vertices
-            for vertex, (x, y) in six.iteritems(self.netlist.placements):
-                p = self.netlist.allocations[vertex][Cores].start
-                status = self.controller.get_processor_status(p, x, y)
-                if status.cpu_state is not desired_to_state:
-                    print("Core ({}, {}, {}) in state {!s}".format(
-                        x, y, p, status.cpu_state))
-                    print(self.controller.get_iobuf(p, x, y))
-
+            self._print_core_failures(desired_to_state)
             raise Exception("Unexpected core failures before reaching %s "
                             "state." % desired_to_state)
 
+    def _print_core_failures(self, expected_state):
+        """Print the state and IOBUF of every core which is not in the
+        expected state.
+        """
+        cores = {(x, y, self.netlist.allocations[vertex][Cores].start): vertex
+                 for vertex, (x, y) in six.iteritems(self.netlist.placements)}
+        states = get_core_states(self.controller, cores)
+
+        for (x, y, p), state in sorted(six.iteritems(states)):
+            if state is not expected_state:
+                print("Core ({}, {}, {}) in state {!s}".format(x, y, p, state))
+                print(self.controller.get_iobuf(p, x, y))
+
     def _create_host_sim(self):
         # change node_functions to reflect time
         # TODO: improve the reference simulator so that this is not needed
         #       by adding a realtime option
         node_functions = {}
-        node_info = dict(start=None)
+        node_info = self._host_time = dict(start=None)
         for node in self.io_controller.host_network.all_nodes:
             if callable(node.output):
                 old_func = node.output
@@ -400,11 +951,21 @@ class Simulator(object):
             # Stop the application
             self._closed = True
             self.io_controller.close()
-            self.controller.send_signal("stop")
-
-            # Destroy the job if we allocated one
-            if self.job is not None:
-                self.job.destroy()
+            if self._host_process is not None:
+                self._host_process.close()
+
+            try:
+                self.controller.send_signal("stop")
+            except Exception:
+                self.machine.destroy()
+                raise
+
+            # Return the cleanly stopped machine to the pool, or destroy the
+            # job if we allocated one.
+            if self._machine_pool is not None:
+                self._machine_pool.release(self.machine)
+            else:
+                self.machine.destroy()
 
             # Remove this simulator from the list of open simulators
             Simulator._remove_simulator(self)
@@ -413,6 +974,23 @@ class Simulator(object):
         return np.arange(1, self.steps + 1) * (self.dt or dt)
 
 
+def _estimate_n_cores(network):
+    """Roughly estimate the number of cores a network will require before it
+    is built, assuming that each core simulates around 100 neurons.
+    """
+    n_cores = sum(int(np.ceil(ens.n_neurons / 100.0)) for ens in
+                  network.all_ensembles)
+    return n_cores + len(network.all_nodes) + len(network.all_probes)
+
+
+def _n_boards(n_cores, allocation_fudge_factor):
+    """Get the number of boards to allocate for a number of cores (assuming
+    16 usable cores per chip and 48 chips per board).
+    """
+    n_cores = n_cores * (1.0 + allocation_fudge_factor)
+    return max(int(np.ceil((n_cores / 16.) / 48.)), 1)
+
+
 @atexit.register
 def _close_open_simulators():
     """Close all remaining open simulators."""
@@ -423,3 +1001,29 @@ def _close_open_simulators():
             sim.close()
         except:
             pass
+
+
+class _HostWorker(threading.Thread):
+    """Thread which performs work on the host while the machine is
+    simulating (or while the model is being built), the result of the work is
+    stored in :py:attr:`~.result` and any exception raised by the work is
+    re-raised by :py:meth:`~.check`.
+    """
+    def __init__(self, fn):
+        super(_HostWorker, self).__init__(name="HostWorker")
+        self.daemon = True
+        self._fn = fn
+        self._exc_info = None
+        self.result = None
+
+    def run(self):
+        try:
+            self.result = self._fn()
+        except Exception:
+            self._exc_info = sys.exc_info()
+
+    def check(self):
+        """Re-raise any exception raised by the work."""
+        if self._exc_info is not None:
+            exc_info, self._exc_info = self._exc_info, None
+            six.reraise(*exc_info)
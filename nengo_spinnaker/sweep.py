@@ -0,0 +1,152 @@
+"""Parameter sweeps on a loaded SpiNNaker machine.
+
+Building, placing, routing and loading a model takes far longer than most
+simulations of it.  When only the parameters of a model (rather than its
+structure) differ between simulations the same loaded application can be
+reused; only the regions of memory which hold the changed parameters are
+rewritten before the application is reset and run again.
+
+For example, to sweep over the bias of an ensemble::
+
+    with nengo_spinnaker.Simulator(network) as sim:
+        runner = nengo_spinnaker.SweepRunner(sim)
+        points = [{(ens, "bias"): b} for b in biases]
+
+        for result in runner.run(points, 1.0):
+            print(result.rewrite_time, result.data[probe].mean())
+"""
+import collections
+import logging
+from six import iteritems
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class SweepResult(collections.namedtuple(
+        "SweepResult", "point, data, rewrite_time, run_time")):
+    """Result of simulating a single point of a parameter sweep.
+
+    Attributes
+    ----------
+    point : {(object, parameter): value, ...}
+        Parameters which were used for the simulation.
+    data : {probe: array, ...}
+        Data probed during the simulation.
+    rewrite_time : float
+        Time (in seconds) taken to rewrite the parameters and reset the
+        application.
+    run_time : float
+        Time (in seconds) taken to simulate and retrieve the probed data.
+    """
+
+
+class SweepRunner(object):
+    """Repeatedly simulate a model which has been loaded to a SpiNNaker
+    machine, changing some of its parameters between simulations.
+
+    Each point of a sweep is a dictionary mapping pairs of Nengo objects and
+    parameter names to new values for those parameters.  Parameters which are
+    not specified for a point take the values with which the model was built,
+    regardless of any earlier points.  The parameters which may be swept
+    are:
+
+    ``(Ensemble, "bias")``, ``(Ensemble, "gain")``
+        New biases or gains for the neurons in an ensemble.
+    ``(Ensemble, "decoders")``
+        New decoders for the outgoing connections of an ensemble, see
+        :py:meth:`~nengo_spinnaker.operators.EnsembleLIF.set_parameters`.
+    ``(Node, "output")``
+        New output for a Node which is a function of time and which is
+        simulated on the machine.
+
+    Parameters
+    ----------
+    simulator : :py:class:`~nengo_spinnaker.Simulator`
+        Simulator whose model should be swept.
+    """
+    def __init__(self, simulator):
+        self.simulator = simulator
+
+        # Parameters changed by previous points, these must be restored if
+        # they are not specified by later points.
+        self._swept = collections.defaultdict(set)
+
+    def run(self, points, time_in_seconds, seed=None):
+        """Simulate each point of a sweep in turn.
+
+        Parameters
+        ----------
+        points : iterable of {(object, parameter): value, ...}
+            Points of the sweep.
+        time_in_seconds : float
+            Length of time to simulate each point for.
+        seed : int or None
+            Seed for the network simulated on the host.
+
+        Yields
+        ------
+        :py:class:`~.SweepResult`
+            The result of simulating each point.
+        """
+        for point in points:
+            yield self.run_point(point, time_in_seconds, seed)
+
+    def run_point(self, point, time_in_seconds, seed=None):
+        """Simulate a single point of a sweep.
+
+        Raises
+        ------
+        ValueError
+            If a parameter cannot be swept or a new value would change the
+            structure of the model or the size of any vertex.
+
+        Returns
+        -------
+        :py:class:`~.SweepResult`
+            The result of simulating the point.
+        """
+        sim = self.simulator
+
+        # Rewrite the parameters and reset the application
+        start = time.time()
+        self.set_point(point)
+        sim.reset(seed=seed)
+        rewrite_time = time.time() - start
+
+        # Simulate and copy out the probed data as resetting will clear it
+        start = time.time()
+        sim.run(time_in_seconds)
+        data = dict(sim.data)
+        run_time = time.time() - start
+
+        logger.info("Sweep point rewrite took {:3f} seconds, run took {:3f} "
+                    "seconds".format(rewrite_time, run_time))
+        return SweepResult(point, data, rewrite_time, run_time)
+
+    def set_point(self, point):
+        """Write the parameters for a point of a sweep into the memory of the
+        machine.
+
+        The new parameters will take effect once the simulator is reset.
+        """
+        # Group the new parameters by the operators which simulate the objects
+        # to which they belong.
+        operator_parameters = collections.defaultdict(dict)
+        for (obj, name), value in iteritems(point):
+            op = self.simulator.model.object_operators.get(obj)
+            if op is None or not hasattr(op, "set_parameters"):
+                raise ValueError(
+                    "Parameters of {} cannot be swept".format(obj))
+
+            operator_parameters[op][name] = value
+
+        # Restore the built values of any parameters changed by earlier points
+        for op, names in iteritems(self._swept):
+            for name in names:
+                operator_parameters[op].setdefault(name, None)
+
+        # Change the parameters
+        for op, parameters in iteritems(operator_parameters):
+            op.set_parameters(self.simulator.model, **parameters)
+            self._swept[op].update(parameters)
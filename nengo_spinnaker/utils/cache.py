@@ -0,0 +1,415 @@
+"""On-disk caching of expensive intermediate results.
+
+Entries are stored as individual files in a directory which is specific to the
+versions of nengo_spinnaker, Nengo and Rig that created them, when any of
+these versions change the stale entries are discarded. The total size of the
+cache is limited, with the least recently used entries evicted first.
+
+Helpers are also provided to fingerprint the inputs of a computation
+(:py:func:`~.describe`) and to pickle its results while replacing references to
+objects which cannot or should not be pickled with placeholders
+(:py:func:`~.dumps` and :py:func:`~.loads`).
+"""
+import errno
+import hashlib
+import io
+import logging
+import nengo
+from nengo.params import FrozenObject, ObsoleteParam
+from nengo.utils.cache import human2bytes
+from nengo.utils.compat import replace
+from nengo.utils.paths import cache_dir
+import numpy as np
+import os
+import pickle
+import pkg_resources
+import shutil
+import six
+import tempfile
+import types
+import weakref
+
+from ..rc import rc
+
+logger = logging.getLogger(__name__)
+
+_ENTRY_EXT = ".pkl"
+
+# Packages whose versions determine the content of cached entries
+_VERSIONED_PACKAGES = ("nengo_spinnaker", "nengo", "rig")
+
+
+def get_versions_string():
+    """Get a string describing the versions of the packages which determine
+    the content of cached entries.
+    """
+    versions = list()
+    for package in _VERSIONED_PACKAGES:
+        try:
+            version = pkg_resources.get_distribution(package).version
+        except pkg_resources.DistributionNotFound:  # pragma: no cover
+            version = "unknown"
+        versions.append("{}-{}".format(package, version))
+
+    return "_".join(versions)
+
+
+class FileCache(object):
+    """Size-limited, least-recently-used, on-disk store of binary blobs.
+
+    Parameters
+    ----------
+    path : str
+        Directory in which to store the cache entries.
+    max_size : int
+        Maximum size, in bytes, of all the entries in the cache.
+    version : str
+        String identifying the version of the software which produced the
+        entries. Entries produced by other versions are removed.
+    """
+    def __init__(self, path, max_size, version=None):
+        self.max_size = max_size
+        self.version = get_versions_string() if version is None else version
+
+        # Entries are stored in a subdirectory specific to this version, any
+        # other subdirectories contain stale entries and are removed.
+        self.root = path
+        self.path = os.path.join(
+            path, hashlib.sha1(self.version.encode("utf-8")).hexdigest())
+        self._invalidate_other_versions()
+
+        try:
+            os.makedirs(self.path)
+        except OSError as err:
+            if err.errno != errno.EEXIST:  # pragma: no cover
+                raise
+
+    def _invalidate_other_versions(self):
+        """Remove any entries created by other versions."""
+        if not os.path.isdir(self.root):
+            return
+
+        for name in os.listdir(self.root):
+            path = os.path.join(self.root, name)
+            if path != self.path and os.path.isdir(path):
+                logger.info("Removing stale cache entries in %s", path)
+                shutil.rmtree(path, ignore_errors=True)
+
+    def _get_filename(self, key):
+        return os.path.join(self.path, key + _ENTRY_EXT)
+
+    def get(self, key):
+        """Get the data stored against a key, or None if there is no such
+        entry.
+        """
+        filename = self._get_filename(key)
+        try:
+            with open(filename, "rb") as f:
+                data = f.read()
+        except IOError as err:
+            if err.errno == errno.ENOENT:
+                return None
+            raise  # pragma: no cover
+
+        # Mark the entry as being recently used
+        try:
+            os.utime(filename, None)
+        except OSError:  # pragma: no cover
+            pass  # Entry evicted by another process
+
+        return data
+
+    def put(self, key, data):
+        """Store data against a key, evicting least recently used entries if
+        the cache would otherwise exceed its maximum size.
+        """
+        if len(data) > self.max_size:
+            logger.info("Not caching %s, %d bytes exceeds cache size",
+                        key, len(data))
+            return
+
+        # Write to a temporary file and then move it into place so that other
+        # processes never see partially written entries.
+        fd, tmp = tempfile.mkstemp(dir=self.path)
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        replace(tmp, self._get_filename(key))
+
+        self.shrink()
+
+    def shrink(self):
+        """Remove least recently used entries until the cache is within its
+        size limit.
+        """
+        # Get the size and last use of every entry
+        entries = list()
+        for name in os.listdir(self.path):
+            if not name.endswith(_ENTRY_EXT):
+                continue
+
+            filename = os.path.join(self.path, name)
+            try:
+                stat = os.stat(filename)
+            except OSError:  # pragma: no cover
+                continue  # Removed by another process
+            entries.append((stat.st_mtime, stat.st_size, filename))
+
+        # Remove the oldest entries until we're within the limit
+        total_size = sum(size for _, size, _ in entries)
+        for _, size, filename in sorted(entries):
+            if total_size <= self.max_size:
+                break
+
+            logger.debug("Evicting %s from the cache", filename)
+            try:
+                os.remove(filename)
+            except OSError:  # pragma: no cover
+                pass  # Removed by another process
+            total_size -= size
+
+    def clear(self):
+        """Remove all entries from the cache."""
+        for name in os.listdir(self.path):
+            if name.endswith(_ENTRY_EXT):
+                os.remove(os.path.join(self.path, name))
+
+
+def get_cache(name):
+    """Get the cache with the given name as configured in the
+    ``nengo_spinnaker`` rc files, or None if caching is disabled.
+
+    The cache is configured in the ``[cache]`` section of the rc file::
+
+        [cache]
+        enabled: True
+        path: /path/to/cache
+        size: 1 GB
+
+    Each named cache is stored in its own subdirectory of `path` and may use
+    up to `size` bytes.
+    """
+    if not (rc.has_option("cache", "enabled") and
+            rc.getboolean("cache", "enabled")):
+        return None
+
+    # Get the path and the size limit
+    path = os.path.join(cache_dir, "nengo_spinnaker")
+    if rc.has_option("cache", "path"):
+        path = os.path.expanduser(rc.get("cache", "path"))
+
+    size = "512 MB"
+    if rc.has_option("cache", "size"):
+        size = rc.get("cache", "size")
+
+    return FileCache(os.path.join(path, name), human2bytes(size))
+
+
+class _PlaceholderPickler(pickle.Pickler):
+    """Pickler which replaces references to given objects with
+    placeholders.
+    """
+    def __init__(self, fp, objects):
+        pickle.Pickler.__init__(self, fp, pickle.HIGHEST_PROTOCOL)
+        self._index = {id(obj): i for i, obj in enumerate(objects)}
+
+    def persistent_id(self, obj):
+        i = self._index.get(id(obj))
+        return None if i is None else str(i)
+
+
+class _PlaceholderUnpickler(pickle.Unpickler):
+    """Unpickler which replaces placeholders with the given objects."""
+    def __init__(self, fp, objects):
+        pickle.Unpickler.__init__(self, fp)
+        self._objects = objects
+
+    def persistent_load(self, pid):
+        return self._objects[int(pid)]
+
+
+def dumps(obj, objects):
+    """Pickle an object, replacing references to any of the given objects
+    with placeholders.
+    """
+    fp = io.BytesIO()
+    _PlaceholderPickler(fp, objects).dump(obj)
+    return fp.getvalue()
+
+
+def loads(data, objects):
+    """Unpickle data produced by :py:func:`~.dumps`, replacing placeholders
+    with the given objects.
+    """
+    return _PlaceholderUnpickler(io.BytesIO(data), objects).load()
+
+
+class UndescribableError(Exception):
+    """Raised when a value cannot be described faithfully, computations
+    whose inputs include the value should not be cached.
+    """
+    pass
+
+
+def describe(value, index={}, top=False, _seen=None, _memo=None):
+    """Get a string which deterministically describes a value, used to
+    fingerprint the inputs to expensive computations.
+
+    Nengo objects, containers, arrays and functions (including the global
+    variables they refer to) are described by their contents.  Modules,
+    classes, builtins, loggers and the functions of the packages whose
+    versions key the cache are described by their (qualified) names, and other
+    objects by their type and a hash of their pickled state so that
+    references to arbitrary modules or objects are never walked.
+
+    Parameters
+    ----------
+    value :
+        Value to describe.
+    index : {id(object): int, ...}
+        References to objects in the index are described by their position in
+        the index rather than by their contents.
+    top : bool
+        If True then `value` is described by its contents even if it is in the
+        index.
+
+    Raises
+    ------
+    UndescribableError
+        If the value, or any value it refers to, is an object which cannot be
+        pickled and so cannot be described by its state.
+    """
+    if not top and id(value) in index:
+        return "<{}>".format(index[id(value)])
+
+    # Objects referred to many times are only described once, the objects are
+    # kept in the memo so that their IDs are not reused while describing.
+    _memo = dict() if _memo is None else _memo
+    if id(value) in _memo:
+        return _memo[id(value)][1]
+
+    # Prevent infinite recursion when describing arbitrary objects
+    _seen = set() if _seen is None else _seen
+    if id(value) in _seen:
+        return "<cycle>"
+
+    def sub(v):
+        # Long descriptions of contained values are replaced with their hash
+        # so that descriptions don't grow with the number of references.
+        d = describe(v, index, _seen=_seen | {id(value)}, _memo=_memo)
+        if len(d) > 256:
+            d = "sha1({})".format(hashlib.sha1(d.encode("utf-8")).hexdigest())
+        return d
+
+    description = _describe(value, sub)
+    _memo[id(value)] = (value, description)
+    return description
+
+
+def _describe(value, sub):
+    """Describe a value, using `sub` to describe the values it contains."""
+    name = type(value).__name__
+    if (value is None or isinstance(value, (bool, float, complex, slice)) or
+            isinstance(value, six.integer_types + six.string_types +
+                       (six.binary_type, six.text_type))):
+        return repr(value)
+    elif isinstance(value, np.ndarray):
+        return "ndarray({}, {}, {})".format(
+            value.dtype.str, value.shape,
+            hashlib.sha1(np.ascontiguousarray(value).tobytes()).hexdigest()
+        )
+    elif isinstance(value, (list, tuple)):
+        return "{}[{}]".format(name, ", ".join(sub(v) for v in value))
+    elif isinstance(value, (set, frozenset)):
+        return "{}{{{}}}".format(
+            name, ", ".join(sorted(sub(v) for v in value)))
+    elif isinstance(value, dict):
+        return "{}{{{}}}".format(name, ", ".join(sorted(
+            "{}: {}".format(sub(k), sub(v)) for k, v in six.iteritems(value)
+        )))
+    elif isinstance(value, types.ModuleType):
+        return "module({})".format(value.__name__)
+    elif isinstance(value, (type, types.BuiltinFunctionType)):
+        return qualified_name(value)
+    elif (isinstance(value, types.FunctionType) and
+            (value.__module__ or "").split(".")[0] in _VERSIONED_PACKAGES):
+        return qualified_name(value)
+    elif isinstance(value, types.FunctionType):
+        # Global variables referred to by the function are described along
+        # with its code.
+        names = _get_code_names(value.__code__)
+        return "function({}, {}, {}, {}, {})".format(
+            value.__module__, _describe_code(value.__code__),
+            sub(value.__defaults__),
+            sub([c.cell_contents for c in value.__closure__ or []]),
+            sub({n: value.__globals__[n] for n in names
+                 if n in value.__globals__})
+        )
+    elif isinstance(value, types.MethodType):
+        return "method({}, {})".format(sub(value.__self__),
+                                       sub(value.__func__))
+    elif isinstance(value, logging.Logger):
+        return "Logger({})".format(value.name)
+    elif isinstance(value, weakref.ref):
+        return "weakref({})".format(sub(value()))
+    elif isinstance(value, (nengo.base.NengoObject, nengo.Network)):
+        params = value.params if hasattr(value, "params") else ["seed"]
+        return "{}({})".format(name, sub(
+            {p: getattr(value, p) for p in params if not
+             isinstance(getattr(type(value), p, None), ObsoleteParam)}
+        ))
+    elif isinstance(value, nengo.ensemble.Neurons):
+        return "Neurons({})".format(sub(value.ensemble))
+    elif isinstance(value, nengo.connection.LearningRule):
+        return "LearningRule({}, {})".format(
+            sub(value.connection), sub(value.learning_rule_type))
+    elif isinstance(value, nengo.base.ObjView):
+        return "ObjView({}, {})".format(sub(value.obj), sub(value.slice))
+    elif isinstance(value, FrozenObject):
+        return "{}({})".format(name, sub(value.__getstate__()))
+    elif hasattr(value, "__dict__"):
+        try:
+            state = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        except Exception as err:
+            raise UndescribableError(
+                "{} could not be pickled: {}".format(
+                    qualified_name(type(value)), err)
+            )
+        return "{}({})".format(qualified_name(type(value)),
+                               hashlib.sha1(state).hexdigest())
+    else:
+        # Representations which include the address of the object don't
+        # describe its value.
+        description = "{}({!r})".format(name, value)
+        if " at 0x" in description:
+            raise UndescribableError(
+                "{} has no description".format(qualified_name(type(value))))
+        return description
+
+
+def qualified_name(obj):
+    """Get the qualified name of a module level class or function."""
+    return "{}.{}".format(
+        getattr(obj, "__module__", None),
+        getattr(obj, "__qualname__", getattr(obj, "__name__", repr(obj)))
+    )
+
+
+def _get_code_names(code):
+    """Get the names of the global variables and attributes used by a code
+    object and any code objects nested within it.
+    """
+    names = set(code.co_names)
+    for const in code.co_consts:
+        if isinstance(const, types.CodeType):
+            names.update(_get_code_names(const))
+    return names
+
+
+def _describe_code(code):
+    """Get a string which describes a code object."""
+    consts = (_describe_code(c) if isinstance(c, types.CodeType) else repr(c)
+              for c in code.co_consts)
+    return "code({}, {}, [{}])".format(
+        hashlib.sha1(code.co_code).hexdigest(), code.co_names,
+        ", ".join(consts)
+    )
@@ -8,6 +8,9 @@ def getconfig(config, object, name, default=None):
     """Get a configuration parameter that may or may not have been added to the
     config.
     """
+    if config is None:
+        return default
+
     try:
         return getattr(config[object], name, default)
     except ConfigError:
@@ -2,6 +2,7 @@ from __future__ import absolute_import
 
 import collections
 from rig.bitfield import BitField
+from six.moves import copyreg
 
 
 def get_derived_keyspaces(keyspace, values, max_v=None,
@@ -114,6 +115,16 @@ class KeyspaceContainer(collections.defaultdict):
         nengo_ks.add_field("cluster", tags=[self.routing_tag])
         nengo_ks.add_field("index", start_at=0)
 
+    def __reduce__(self):
+        # The keyspaces, the master keyspace and the getter which derives new
+        # keyspaces from it must all be restored when unpickled.
+        return (type(self), (), (self.default_factory, self.__dict__), None,
+                iter(self.items()))
+
+    def __setstate__(self, state):
+        self.default_factory, attributes = state
+        self.__dict__.update(attributes)
+
     def assign_fields(self):
         """Call `assign_fields` on the master keyspace, forcing field
         assignation for all keyspaces.
@@ -131,6 +142,17 @@ class KeyspaceContainer(collections.defaultdict):
         return self._filter_routing_tag
 
 
+def _reduce_bitfield(keyspace):
+    """Pickle a keyspace, :py:class:`~rig.bitfield.BitField` can't otherwise
+    be pickled as it treats unknown attributes as fields.
+    """
+    return (BitField, (keyspace.length, keyspace.fields,
+                       keyspace.field_values))
+
+
+copyreg.pickle(BitField, _reduce_bitfield)
+
+
 def is_nengo_keyspace(keyspace):
     """Return True if the keyspace is the default Nengo keyspace.
 
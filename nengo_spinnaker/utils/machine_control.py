@@ -0,0 +1,127 @@
+"""Synchronisation with the applications running on a SpiNNaker machine.
+
+Waiting for every core to reach a state (a synchronisation barrier) is done
+by polling the number of cores in the state.  Polls start a millisecond apart
+so that short waits add little latency, and back off exponentially so that
+long waits do not flood the machine with requests.
+"""
+import collections
+from rig.machine_control.consts import AppState
+import struct
+import time
+
+from .realtime import clock
+
+# States from which a core will not reach any barrier
+failed_states = (AppState.dead, AppState.watchdog,
+                 AppState.runtime_exception)
+
+
+def poll(condition, timeout, initial_interval=0.001, max_interval=0.1,
+         backoff=2.0):
+    """Repeatedly evaluate a condition, with exponentially increasing
+    intervals between evaluations, until it is true or a timeout expires.
+
+    For example::
+
+        >>> poll(lambda: True, timeout=1.0)
+        True
+
+    Parameters
+    ----------
+    condition : callable
+        Function returning True when the wait is over.
+    timeout : float or None
+        Maximum time (in seconds) to wait, or None to wait forever.
+    initial_interval : float
+        Time (in seconds) between the first and second evaluations.
+    max_interval : float
+        Maximum time (in seconds) between evaluations.
+    backoff : float
+        Factor by which the interval grows after each evaluation.
+
+    Returns
+    -------
+    bool
+        Whether the condition became true before the timeout expired.
+    """
+    deadline = None if timeout is None else clock() + timeout
+    interval = initial_interval
+
+    while not condition():
+        remaining = None if deadline is None else deadline - clock()
+        if remaining is not None and remaining <= 0.0:
+            return False
+
+        time.sleep(interval if remaining is None else
+                   min(interval, remaining))
+        interval = min(interval * backoff, max_interval)
+
+    return True
+
+
+def wait_for_cores(controller, state, n_cores, timeout, **kwargs):
+    """Wait for a number of cores to reach a state.
+
+    Waiting stops early if any core fails (see :py:data:`~.failed_states`)
+    or, unless it is the desired state, exits.  Further keyword arguments are
+    passed to :py:func:`~.poll`.
+
+    Returns
+    -------
+    int
+        Number of cores in the desired state when waiting stopped.
+    """
+    bad_states = list(failed_states)
+    if state is not AppState.exit:
+        bad_states.append(AppState.exit)
+
+    counts = [0]
+
+    def reached():
+        count = controller.count_cores_in_state(state)
+        stalled, counts[0] = count <= counts[0], count
+
+        # Only look for failed cores when no more cores have reached the
+        # state since the last poll, as counting them is relatively slow.
+        return count >= n_cores or (
+            stalled and controller.count_cores_in_state(bad_states) > 0)
+
+    poll(reached, timeout, **kwargs)
+    return counts[0]
+
+
+def get_core_states(controller, cores):
+    """Get the state of many cores with a single read per chip.
+
+    Parameters
+    ----------
+    controller : :py:class:`~rig.machine_control.MachineController`
+    cores : iterable of (x, y, p)
+        Cores whose states should be read.
+
+    Returns
+    -------
+    {(x, y, p): :py:class:`~rig.machine_control.consts.AppState`, ...}
+    """
+    # Group the cores by chip
+    chip_cores = collections.defaultdict(list)
+    for x, y, p in cores:
+        chip_cores[(x, y)].append(p)
+
+    vcpu = controller.structs[b"vcpu"]
+    field = vcpu[b"cpu_state"]
+    pack_chars = b"<" + field.pack_chars
+
+    # Read the VCPU structs of all the cores on each chip in one go
+    states = dict()
+    for (x, y), ps in chip_cores.items():
+        base = controller.read_struct_field("sv", "vcpu_base", x, y)
+        data = controller.read(base, vcpu.size * (max(ps) + 1), x, y)
+
+        for p in ps:
+            state, = struct.unpack_from(pack_chars, data,
+                                        vcpu.size * p + field.offset)
+            states[(x, y, p)] = AppState(state)
+
+    return states
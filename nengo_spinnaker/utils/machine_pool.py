@@ -0,0 +1,173 @@
+"""Process-wide pool of booted SpiNNaker machines.
+
+Allocating a machine with spalloc, booting it and reading its system
+information takes many seconds.  When several simulators are created one
+after another (e.g., in a notebook or a batch of experiments) the machine
+used by a closed simulator may instead be kept, with its spalloc job kept
+alive, and handed to the next simulator which needs a machine of the same
+size.
+
+The pool is used by simulators when the ``use_machine_pool`` option of the
+``spinnaker_machine`` section of the rc file (or the ``use_machine_pool``
+argument of the simulator) is set.  Any machines remaining in the pool are
+released when the process exits, or when :py:meth:`~.MachinePool.close` is
+called.
+"""
+import atexit
+import logging
+from rig.machine_control import MachineController
+import threading
+import time
+
+from .timings import Timings
+
+logger = logging.getLogger(__name__)
+
+
+class PooledMachine(object):
+    """A booted machine, and the spalloc job which owns it (if any).
+
+    Attributes
+    ----------
+    hostname : str
+    controller : :py:class:`~rig.machine_control.MachineController`
+    system_info : \
+            :py:class:`~rig.machine_control.machine_controller.SystemInfo`
+        Description of the machine when it was booted.
+    job : :py:class:`spalloc.Job` or None
+        The job which allocated the machine, the job is kept alive by its own
+        keepalive thread for as long as it is not destroyed.
+    n_boards : int or None
+        Number of boards requested for the job, or None if a machine of any
+        size was requested.
+    """
+    def __init__(self, hostname, controller, system_info, job=None,
+                 n_boards=None):
+        self.hostname = hostname
+        self.controller = controller
+        self.system_info = system_info
+        self.job = job
+        self.n_boards = n_boards
+
+    def destroy(self):
+        """Release the machine, destroying its job if it has one."""
+        if self.job is not None:
+            self.job.destroy()
+            self.job = None
+
+
+class MachinePool(object):
+    """Pool of booted machines which are not in use."""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._free = list()
+
+    def __len__(self):
+        return len(self._free)
+
+    def acquire(self, hostname=None, n_boards=None, timings=None):
+        """Get a booted machine, reusing one from the pool if possible.
+
+        Parameters
+        ----------
+        hostname : str or None
+            Hostname of the machine to use, if None then a machine of at
+            least `n_boards` boards is allocated using spalloc.
+        n_boards : int or None
+            Number of boards to allocate if no hostname is given.  If None
+            then a machine of any size may be reused, or spalloc allocates a
+            machine of its default size.
+        timings : :py:class:`~nengo_spinnaker.utils.timings.Timings` or None
+            If provided, the time taken to allocate, boot and describe a new
+            machine is recorded in this object.
+
+        Returns
+        -------
+        :py:class:`~.PooledMachine`
+        """
+        with self._lock:
+            machine = self._take(hostname, n_boards)
+
+        if machine is not None:
+            logger.info("Reusing machine %s from the pool", machine.hostname)
+            return machine
+
+        # Allocate and boot a new machine
+        if timings is None:
+            timings = Timings()
+
+        job = None
+        if hostname is None:
+            with timings.time("allocate_machine"):
+                job = self._allocate_job(n_boards)
+            hostname = job.hostname
+
+        controller = MachineController(hostname)
+        with timings.time("boot"):
+            controller.boot()
+
+        with timings.time("get_system_info"):
+            system_info = controller.get_system_info()
+
+        return PooledMachine(hostname, controller, system_info, job, n_boards)
+
+    def _take(self, hostname, n_boards):
+        """Remove and return the most suitable free machine, if any."""
+        if hostname is not None:
+            candidates = [m for m in self._free if m.hostname == hostname]
+        elif n_boards is None:
+            # Any job will do
+            candidates = [m for m in self._free if m.job is not None]
+        else:
+            # Use the smallest job which is known to be large enough
+            candidates = sorted((m for m in self._free if m.job is not None and
+                                 m.n_boards is not None and
+                                 m.n_boards >= n_boards),
+                                key=lambda m: m.n_boards)
+
+        if not candidates:
+            return None
+
+        self._free.remove(candidates[0])
+        return candidates[0]
+
+    def _allocate_job(self, n_boards):
+        """Allocate a machine using spalloc."""
+        from spalloc import Job
+
+        job = Job(n_boards) if n_boards is not None else Job()
+        logger.info("Allocated job ID %d...", job.id)
+
+        # Wait until we're given the machine
+        logger.info("Waiting for machine allocation...")
+        job.wait_until_ready()
+
+        # spalloc recommends a slight delay before attempting to boot the
+        # machine, later versions of spalloc server may relax this
+        # requirement.
+        time.sleep(5.0)
+
+        logger.info("Using %d board(s) of \"%s\" (%s)",
+                    len(job.boards), job.machine_name, job.hostname)
+        return job
+
+    def release(self, machine):
+        """Return a machine, whose application has been stopped cleanly, to
+        the pool.
+        """
+        with self._lock:
+            self._free.append(machine)
+
+    def close(self):
+        """Release every machine in the pool."""
+        with self._lock:
+            free, self._free = self._free, list()
+
+        for machine in free:
+            machine.destroy()
+
+
+# The pool shared by all simulators in this process, registered to be emptied
+# when the process exits.
+default_pool = MachinePool()
+atexit.register(default_pool.close)
@@ -0,0 +1,213 @@
+"""Storage for the data recorded by probes.
+
+Data is retrieved from the machine after every period of a simulation.
+Rather than concatenating the data from every period (which copies all the
+data recorded so far each time) it is appended into preallocated storage
+which grows geometrically, and which may be allocated once if the length of
+the simulation is known in advance.  Simulations which run indefinitely
+instead record into ring buffers which hold only the most recent data.
+"""
+import numpy as np
+from six import iteritems
+
+try:
+    from collections.abc import MutableMapping
+except ImportError:  # pragma: no cover
+    from collections import MutableMapping  # Python 2
+
+
+class ProbeBuffer(object):
+    """Growable, append-only array of probed data.
+
+    The data is stored in a single array which is larger than required; rows
+    are appended along the first axis and the array is reallocated with
+    double the capacity when it is full, so appending is amortised O(1).
+
+    For example::
+
+        >>> buf = ProbeBuffer()
+        >>> buf.append(np.zeros((2, 3)))
+        >>> buf.append(np.ones((1, 3)))
+        >>> buf.array.shape
+        (3, 3)
+        >>> buf.array[2].tolist()
+        [1.0, 1.0, 1.0]
+    """
+    def __init__(self, capacity=0):
+        self._data = None
+        self._capacity = capacity
+        self._n_rows = 0
+
+    def __len__(self):
+        return self._n_rows
+
+    @property
+    def array(self):
+        """View of the data which has been appended."""
+        return self._data[:self._n_rows]
+
+    def reserve(self, n_rows):
+        """Ensure that a further `n_rows` rows may be appended without
+        reallocating the storage.
+        """
+        self._capacity = max(self._capacity, self._n_rows + n_rows)
+        if self._data is not None and self._capacity > self._data.shape[0]:
+            self._resize(self._capacity)
+
+    def append(self, data):
+        """Append rows of data."""
+        data = np.asarray(data)
+        n_rows = self._n_rows + data.shape[0]
+
+        if self._data is None:
+            # Allocate the storage when the shape of a row is known
+            self._capacity = max(self._capacity, n_rows)
+            self._data = np.empty((self._capacity, ) + data.shape[1:],
+                                  dtype=data.dtype)
+        elif n_rows > self._data.shape[0]:
+            # Grow the storage geometrically
+            self._resize(max(n_rows, 2 * self._data.shape[0]))
+
+        self._data[self._n_rows:n_rows] = data
+        self._n_rows = n_rows
+
+    def _resize(self, capacity):
+        data = np.empty((capacity, ) + self._data.shape[1:],
+                        dtype=self._data.dtype)
+        data[:self._n_rows] = self.array
+        self._data = data
+
+
+class ProbeRingBuffer(object):
+    """Fixed-size array of probed data which retains only the most recently
+    appended rows.
+
+    For example::
+
+        >>> buf = ProbeRingBuffer(3)
+        >>> for i in range(5):
+        ...     buf.append([[i]])
+        >>> buf.array.ravel().tolist()
+        [2, 3, 4]
+    """
+    def __init__(self, n_rows):
+        self.n_rows = n_rows
+        self.clear()
+
+    def __len__(self):
+        return min(self._n_appended, self.n_rows)
+
+    @property
+    def array(self):
+        """Copy of the retained data, oldest row first."""
+        if self._data is None:
+            return np.zeros((0, 0))
+
+        start = self._n_appended % self.n_rows
+        if self._n_appended <= self.n_rows:
+            return self._data[:self._n_appended].copy()
+        return np.concatenate((self._data[start:], self._data[:start]))
+
+    def clear(self):
+        """Remove all the data."""
+        self._data = None
+        self._n_appended = 0
+
+    def append(self, data):
+        """Append rows of data, overwriting the oldest rows if full."""
+        data = np.asarray(data)[-self.n_rows:]
+        if self._data is None:
+            self._data = np.empty((self.n_rows, ) + data.shape[1:],
+                                  dtype=data.dtype)
+
+        # Write the rows, wrapping around the end of the storage
+        indices = (self._n_appended + np.arange(data.shape[0])) % self.n_rows
+        self._data[indices] = data
+        self._n_appended += data.shape[0]
+
+
+class ProbeData(MutableMapping):
+    """Mapping from probes to the data they have recorded.
+
+    Indexing the mapping returns the data recorded by a probe as an array,
+    :py:meth:`~.append` should be used to add newly recorded data.
+
+    Parameters
+    ----------
+    dt : float
+        Simulation timestep, used to determine how many samples a probe will
+        record.
+    """
+    def __init__(self, dt):
+        self.dt = dt
+        self._buffers = dict()
+        self._reserved = dict()
+        self._attached = dict()
+
+    def __getitem__(self, probe):
+        return self._buffers[probe].array
+
+    def __setitem__(self, probe, data):
+        self._buffers[probe] = ProbeBuffer()
+        self._buffers[probe].append(data)
+
+    def __delitem__(self, probe):
+        del self._buffers[probe]
+
+    def __iter__(self):
+        return iter(self._buffers)
+
+    def __len__(self):
+        return len(self._buffers)
+
+    def clear(self):
+        self._buffers.clear()
+        self._reserved.clear()
+
+        # Attached buffers are emptied rather than removed
+        for probe, buf in iteritems(self._attached):
+            buf.clear()
+            self._buffers[probe] = buf
+
+    def attach(self, probe, buffer):
+        """Use an existing buffer (e.g., a :py:class:`~.ProbeRingBuffer`
+        written to by the host) to store the data recorded by a probe.
+
+        Attached buffers are retained, but emptied, when the data is cleared.
+        """
+        self._attached[probe] = self._buffers[probe] = buffer
+
+    def append(self, probe, data):
+        """Append newly recorded data to the data recorded by a probe."""
+        if probe not in self._buffers:
+            self._buffers[probe] = ProbeBuffer(self._reserved.pop(probe, 0))
+        self._buffers[probe].append(data)
+
+    def reserve(self, probes, periods):
+        """Allocate sufficient storage for the given probes to record data for
+        further simulation periods.
+
+        Parameters
+        ----------
+        probes : [:py:class:`nengo.Probe`, ...]
+            Probes for which to allocate storage.
+        periods : [int, ...]
+            Number of steps in each further period of simulation, the data
+            from each period is sampled separately.
+        """
+        for probe in probes:
+            if probe in self._attached:
+                continue  # Attached buffers are not grown
+
+            sample_every = 1
+            if probe.sample_every is not None:
+                sample_every = max(int(np.round(probe.sample_every / self.dt)),
+                                   1)
+
+            # Ceiling division, as the first step of each period is sampled
+            n_rows = sum(-(-n_steps // sample_every) for n_steps in periods)
+
+            if probe in self._buffers:
+                self._buffers[probe].reserve(n_rows)
+            else:
+                self._reserved[probe] = self._reserved.get(probe, 0) + n_rows
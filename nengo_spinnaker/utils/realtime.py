@@ -0,0 +1,177 @@
+"""Real-time execution of the parts of a model simulated on the host.
+
+The host must keep pace with the machine, so each step of the host simulation
+is given a deadline measured from the start of the simulation (rather than
+from the end of the previous step) to prevent errors accumulating.  Waiting
+for a deadline sleeps for most of the time remaining and then spins, so that
+the host neither wastes a CPU nor oversleeps.
+"""
+import bisect
+import numpy as np
+import time
+
+# Use the highest resolution monotonic clock available
+clock = getattr(time, "perf_counter", time.time)
+
+
+class TimingHistogram(object):
+    """Histogram of durations.
+
+    Parameters
+    ----------
+    edges : [float, ...]
+        Left edges of the bins (in seconds), the last bin is unbounded.
+    """
+    default_edges = (0.0, 1e-5, 2e-5, 5e-5, 1e-4, 2e-4, 5e-4, 1e-3, 2e-3,
+                     5e-3, 1e-2, 2e-2, 5e-2, 1e-1)
+
+    def __init__(self, edges=default_edges):
+        self.edges = list(edges)
+        self.clear()
+
+    def clear(self):
+        """Remove all recorded durations."""
+        self.counts = np.zeros(len(self.edges), dtype=int)
+        self.n = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, duration):
+        """Record a duration, durations less than the first edge are counted
+        in the first bin.
+        """
+        self.counts[max(bisect.bisect_right(self.edges, duration) - 1, 0)] += 1
+        self.n += 1
+        self.total += duration
+        self.max = max(self.max, duration)
+
+    @property
+    def mean(self):
+        """Mean of the recorded durations."""
+        return self.total / self.n if self.n else 0.0
+
+    def __repr__(self):
+        return "<{} n={} mean={:.6f} max={:.6f}>".format(
+            type(self).__name__, self.n, self.mean, self.max)
+
+
+class StepTimings(object):
+    """Timing statistics of a real-time loop.
+
+    Attributes
+    ----------
+    lateness : :py:class:`~.TimingHistogram`
+        How long after its deadline each step was started.
+    execution_time : :py:class:`~.TimingHistogram`
+        How long each step took to execute.
+    n_skipped : int
+        Number of steps which were skipped because they would have started
+        too late.
+    """
+    def __init__(self):
+        self.lateness = TimingHistogram()
+        self.execution_time = TimingHistogram()
+        self.n_skipped = 0
+
+    def clear(self):
+        """Remove all recorded statistics."""
+        self.lateness.clear()
+        self.execution_time.clear()
+        self.n_skipped = 0
+
+
+class RealTimeLoop(object):
+    """Call a function once per timestep in real time.
+
+    Parameters
+    ----------
+    timestep : float
+        Real time (in seconds) between successive steps.
+    policy : "catch_up" or "skip"
+        What to do when a step cannot be started before the deadline of the
+        following step.  With "catch_up" late steps are executed as quickly as
+        possible until the loop is back on time; with "skip" steps whose
+        deadlines have already passed are not executed.
+    spin_time : float
+        Time (in seconds) before each deadline for which to spin, rather than
+        sleep, to avoid oversleeping.  This is limited to a tenth of the
+        timestep so that the loop always spends most of its time asleep.
+    timings : :py:class:`~.StepTimings` or None
+        Object in which to record the timing statistics of the loop.
+    sleep : callable or None
+        Function used to sleep for a number of seconds while waiting for a
+        deadline, by default :py:func:`time.sleep`.
+    """
+    def __init__(self, timestep, policy="catch_up", spin_time=1e-4,
+                 timings=None, sleep=None):
+        if policy not in ("catch_up", "skip"):
+            raise ValueError("Unknown real-time policy {!r}".format(policy))
+
+        self.timestep = timestep
+        self.policy = policy
+        self.spin_time = min(spin_time, 0.1 * timestep)
+        self.timings = timings if timings is not None else StepTimings()
+        self.sleep = sleep if sleep is not None else time.sleep
+        self.steps_elapsed = 0
+        self._stopped = False
+
+    def run(self, step, n_steps=None):
+        """Call `step` for each of `n_steps` timesteps.
+
+        If `n_steps` is None then the loop runs until :py:meth:`~.stop` is
+        called, either by `step` or from another thread.  The number of
+        timesteps which elapsed (whether or not they were skipped) is stored
+        in :py:attr:`~.steps_elapsed`.
+
+        Returns
+        -------
+        int
+            Number of steps which were executed.
+        """
+        timings = self.timings
+        start = clock()
+        n_executed = 0
+
+        i = 0
+        while (n_steps is None or i < n_steps) and not self._stopped:
+            # Wait for the deadline of this step
+            deadline = start + i * self.timestep
+            self._wait_until(deadline)
+
+            # If the step is so late that the following step is also due then
+            # skip ahead to the most recent step.
+            now = clock()
+            if self.policy == "skip":
+                n_late = int((now - deadline) // self.timestep)
+                if n_late > 0:
+                    if n_steps is not None:
+                        n_late = min(n_late, n_steps - i - 1)
+                    timings.n_skipped += n_late
+                    i += n_late
+                    deadline += n_late * self.timestep
+
+            # Execute the step
+            timings.lateness.record(now - deadline)
+            step()
+            timings.execution_time.record(clock() - now)
+
+            n_executed += 1
+            i += 1
+
+        # Wait until the end of the final step
+        self.steps_elapsed = i
+        self._wait_until(start + i * self.timestep)
+        return n_executed
+
+    def stop(self):
+        """Stop the loop after the step which is currently executing."""
+        self._stopped = True
+
+    def _wait_until(self, deadline):
+        """Sleep and then spin until the deadline."""
+        remaining = deadline - clock()
+        if remaining > self.spin_time:
+            self.sleep(remaining - self.spin_time)
+
+        while clock() < deadline:
+            pass
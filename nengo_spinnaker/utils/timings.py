@@ -0,0 +1,115 @@
+"""Instrumentation of the phases of building, loading and running a model.
+
+For example::
+
+    >>> timings = Timings()
+    >>> with timings.time("build"):
+    ...     pass
+    >>> timings.count("n_cores", 12)
+    >>> timings.n("build"), timings.counts["n_cores"]
+    (1, 12)
+"""
+import collections
+import contextlib
+import functools
+import json
+
+from .realtime import clock
+
+
+class Timings(object):
+    """Durations of named phases and counts of resources.
+
+    Phases which occur more than once (e.g., the synchronisation barriers of
+    every simulation) record a duration for each occurrence.  Names may be
+    grouped by separating them with a "/", e.g., "load/EnsembleLIF".
+
+    Attributes
+    ----------
+    phases : {name: [duration, ...], ...}
+        Durations (in seconds) of each occurrence of each phase, in the order
+        in which the phases first occurred.
+    counts : {name: int, ...}
+        Counts of resources, e.g., the number of cores used.
+    """
+    def __init__(self):
+        self.phases = collections.OrderedDict()
+        self.counts = collections.OrderedDict()
+
+    @contextlib.contextmanager
+    def time(self, name):
+        """Context manager which records the time taken to execute its body
+        as an occurrence of the named phase.
+        """
+        start = clock()
+        try:
+            yield
+        finally:
+            self.record(name, clock() - start)
+
+    def record(self, name, duration):
+        """Record the duration of an occurrence of a phase."""
+        self.phases.setdefault(name, list()).append(duration)
+
+    def count(self, name, value):
+        """Record a count of a resource."""
+        self.counts[name] = value
+
+    def n(self, name):
+        """Number of occurrences of a phase."""
+        return len(self.phases.get(name, ()))
+
+    def total(self, name):
+        """Total duration of all occurrences of a phase."""
+        return sum(self.phases.get(name, ()))
+
+    def clear(self):
+        """Remove all recorded durations and counts."""
+        self.phases.clear()
+        self.counts.clear()
+
+    def to_dict(self):
+        """Get the timings as a dictionary which may be serialised."""
+        return collections.OrderedDict((
+            ("phases", collections.OrderedDict(
+                (name, collections.OrderedDict((
+                    ("n", len(durations)),
+                    ("total", sum(durations)),
+                    ("durations", list(durations)),
+                ))) for name, durations in self.phases.items()
+            )),
+            ("counts", collections.OrderedDict(self.counts)),
+        ))
+
+    def to_json(self, **kwargs):
+        """Get the timings as a JSON string, keyword arguments are passed to
+        :py:func:`json.dumps`.
+        """
+        return json.dumps(self.to_dict(), **kwargs)
+
+    def __repr__(self):
+        return "<{} {}>".format(type(self).__name__, ", ".join(
+            "{}={:.3f}".format(name, sum(durations)) for name, durations in
+            self.phases.items()
+        ))
+
+
+def function_name(fn):
+    """Get a short name for a function, method or partial application to be
+    used as the name of a phase.
+
+    For example::
+
+        >>> function_name(Timings.record)
+        'record'
+        >>> function_name(Timings().record)
+        'Timings.record'
+    """
+    if isinstance(fn, functools.partial):
+        return function_name(fn.func)
+
+    owner = getattr(fn, "__self__", None)
+    if owner is not None:
+        return "{}.{}".format(type(owner).__name__, fn.__name__)
+
+    return getattr(fn, "__name__", type(fn).__name__)
@@ -98,6 +98,7 @@ setup(
     entry_points={
         "console_scripts": [
             "nengo_spinnaker_setup = nengo_spinnaker.scripts.nengo_spinnaker_setup:main",
+            "nengo_spinnaker_compile = nengo_spinnaker.scripts.nengo_spinnaker_compile:main",
         ],
     },
 
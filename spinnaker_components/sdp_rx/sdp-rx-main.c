@@ -24,17 +24,31 @@ void sdp_rx_tick(uint ticks, uint arg1) {
 }
 
 /** \brief Receive packed data packed in SDP message
+ *
+ * The first argument of the message is the index of the first dimension
+ * contained in the message, wide outputs are received in several messages.
  */
 void sdp_received(uint mailbox, uint port) {
   use(port);
   sdp_msg_t *message = (sdp_msg_t*) mailbox;
 
+  // Determine which dimensions are contained in the message, the length
+  // counts the bytes from the flags field onwards.
+  uint offset = message->arg1;
+  uint n_values = (message->length -
+                   ((uint) message->data - (uint) &message->flags)) /
+                  sizeof(value_t);
+  if (offset + n_values > g_sdp_rx.n_dimensions) {
+    n_values = (offset < g_sdp_rx.n_dimensions) ?
+               g_sdp_rx.n_dimensions - offset : 0;
+  }
+
   // Copy the data into the output buffer
   // Mark values as being fresh
   value_t * data = (value_t*) message->data;
-  for (uint d = 0; d < g_sdp_rx.n_dimensions; d++) {
-    g_sdp_rx.output[d] = data[d];
-    g_sdp_rx.fresh[d] = true;
+  for (uint d = 0; d < n_values; d++) {
+    g_sdp_rx.output[offset + d] = data[d];
+    g_sdp_rx.fresh[offset + d] = true;
   }
   spin1_msg_free(message);
 }
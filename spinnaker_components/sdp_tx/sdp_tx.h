@@ -23,6 +23,7 @@
 typedef struct sdp_tx_parameters {
   uint machine_timestep;   //!< Machine time step / useconds
   uint transmission_delay; //!< Number of ticks between output transmissions
+  uint ethernet_chip;      //!< P2P address of the chip to send packets to
 
   uint n_dimensions;       //!< Number of dimensions to represent
 
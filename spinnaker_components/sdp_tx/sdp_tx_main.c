@@ -21,7 +21,7 @@ void sdp_tx_update(uint ticks, uint arg1) {
 
     // Construct and transmit the SDP Message
     sdp_msg_t message;
-    message.dest_addr = 0x0000;        // (0, 0)
+    message.dest_addr = g_sdp_tx.ethernet_chip;  // Nearest Ethernet chip
     message.dest_port = 0xff;
     message.srce_addr = sv->p2p_addr;  // Sender P2P address
     message.srce_port = spin1_get_id();
@@ -43,6 +43,7 @@ bool data_system(address_t addr) {
   g_sdp_tx.n_dimensions = addr[0];
   g_sdp_tx.machine_timestep = addr[1];
   g_sdp_tx.transmission_delay = addr[2];
+  g_sdp_tx.ethernet_chip = addr[3];
 
   delay_remaining = g_sdp_tx.transmission_delay;
   io_printf(IO_BUF, "[SDP Tx] Tick period = %d microseconds\n",
@@ -476,12 +476,14 @@ class TestMakeNetlist(object):
         # Create the second operator
         vertex_b = mock.Mock(name="vertex B")
         load_fn_b = mock.Mock(name="load function B")
+        reset_fn_b = mock.Mock(name="reset function B")
         constraint_b = mock.Mock(name="Constraint B")
 
         object_b = mock.Mock(name="object B")
         operator_b = mock.Mock(name="operator B", spec_set=["make_vertices"])
         operator_b.make_vertices.return_value = \
-            netlistspec((vertex_b, ), load_fn_b, constraints=[constraint_b])
+            netlistspec((vertex_b, ), load_fn_b, constraints=[constraint_b],
+                        reset_function=reset_fn_b)
 
         # Create a signal between the operators
         keyspace = mock.Mock(name="keyspace")
@@ -519,6 +521,7 @@ class TestMakeNetlist(object):
         assert set(netlist.load_functions) == set([load_fn_a, load_fn_b])
         assert netlist.before_simulation_functions == [pre_fn_a]
         assert netlist.after_simulation_functions == [post_fn_a]
+        assert netlist.reset_functions == [reset_fn_b]
 
     def test_removes_sinkless_filters(self):
         """Test that making a netlist correctly filters out passthrough Nodes
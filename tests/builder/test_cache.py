@@ -0,0 +1,188 @@
+import nengo
+import numpy as np
+import pytest
+import threading
+
+from nengo_spinnaker import add_spinnaker_params
+from nengo_spinnaker.builder import Model
+from nengo_spinnaker.builder.cache import (
+    get_model_cache_key, get_network_fingerprint, load_built_model,
+    store_built_model)
+from nengo_spinnaker.node_io import Ethernet
+from nengo_spinnaker.utils.cache import FileCache
+
+
+class Unpicklable(object):
+    """Callable object which can't be pickled, and so can't be
+    fingerprinted.
+    """
+    def __init__(self, scale):
+        self.scale = scale
+        self.lock = threading.Lock()
+
+    def __call__(self, x):
+        return self.scale * x
+
+
+GAIN = 1.0
+
+
+def make_network(seed=3, radius=1.0, gain=1.0, f_of_t=False):
+    """Construct a test network, every call with the same arguments should
+    construct an equivalent network.
+    """
+    with nengo.Network(seed=seed) as net:
+        a = nengo.Node(lambda t: [np.sin(t), gain * t])
+        b = nengo.Ensemble(100, 2, radius=radius)
+        c = nengo.Node(size_in=2)
+        d = nengo.Ensemble(50, 1)
+        e = nengo.Node(lambda t, x: None, size_in=1)
+        nengo.Connection(a, b)
+        nengo.Connection(b, c)
+        nengo.Connection(c[0], d)
+        nengo.Connection(d, e)
+        learnt = nengo.Connection(d, d, learning_rule_type=nengo.PES())
+        nengo.Connection(b[0], learnt.learning_rule)
+        nengo.Probe(b, synapse=0.01)
+        nengo.Probe(d.neurons, "spikes")
+
+    add_spinnaker_params(net.config)
+    net.config[a].function_of_time = f_of_t
+    return net
+
+
+class TestGetModelCacheKey(object):
+    def test_stable(self):
+        """The key should be the same for separate constructions of the same
+        network.
+        """
+        assert (get_model_cache_key(make_network(), 0.001) ==
+                get_model_cache_key(make_network(), 0.001))
+
+    def test_stable_after_build(self):
+        """Building a network should not change its key."""
+        net = make_network()
+        Model().build(net, **Ethernet().builder_kwargs)
+        assert (get_model_cache_key(net, 0.001) ==
+                get_model_cache_key(make_network(), 0.001))
+
+    @pytest.mark.parametrize(
+        "kwargs", [{"seed": 4}, {"radius": 2.0}, {"gain": 2.0},
+                   {"f_of_t": True}]
+    )
+    def test_network_changes(self, kwargs):
+        """The key should change when the network or its config changes."""
+        assert (get_model_cache_key(make_network(), 0.001) !=
+                get_model_cache_key(make_network(**kwargs), 0.001))
+
+    def test_args_change(self):
+        """The key should change when the build arguments change."""
+        net = make_network()
+        assert (get_model_cache_key(net, 0.001) !=
+                get_model_cache_key(net, 0.002))
+
+    def test_global_changes(self):
+        """The key should change when a global variable referred to by a
+        function in the network changes.
+        """
+        global GAIN
+
+        def make():
+            with nengo.Network(seed=1) as net:
+                a = nengo.Ensemble(10, 1)
+                b = nengo.Node(size_in=1)
+                nengo.Connection(a, b, function=lambda x: GAIN * x)
+            return net
+
+        before = get_model_cache_key(make(), 0.001)
+        GAIN = 2.0
+        try:
+            assert get_model_cache_key(make(), 0.001) != before
+        finally:
+            GAIN = 1.0
+
+    def test_unpicklable_callables(self):
+        """Networks with functions which can't be fingerprinted can't be
+        cached, so different functions never share a cache entry.
+        """
+        def make(scale):
+            with nengo.Network(seed=1) as net:
+                a = nengo.Ensemble(10, 1)
+                b = nengo.Node(size_in=1)
+                nengo.Connection(a, b, function=Unpicklable(scale))
+            return net
+
+        assert get_model_cache_key(make(1.0), 0.001) is None
+        assert get_model_cache_key(make(2.0), 0.001) is None
+
+    def test_no_seed(self):
+        """Networks without a seed can't be cached."""
+        with nengo.Network() as net:
+            nengo.Ensemble(100, 1)
+
+        assert get_model_cache_key(net, 0.001) is None
+
+        # But they may still be fingerprinted
+        assert get_network_fingerprint(net, 0.001) is not None
+
+
+def test_fingerprint_default_config_time_limit():
+    """Networks using the default SpiNNaker config (whose place and route
+    functions refer to modules) should be fingerprinted quickly.
+    """
+    with nengo.Network(seed=1) as net:
+        nengo.Ensemble(10, 1)
+    add_spinnaker_params(net.config)
+
+    fingerprints = list()
+    thread = threading.Thread(target=lambda: fingerprints.append(
+        get_network_fingerprint(net, 0.001)))
+    thread.daemon = True
+    thread.start()
+    thread.join(10.0)
+    assert fingerprints, "Fingerprinting took longer than 10 seconds"
+
+
+def test_store_and_load_built_model(tmpdir):
+    cache = FileCache(str(tmpdir), 2**30, version="1")
+
+    # Build a network and store it in the cache
+    net = make_network()
+    key = get_model_cache_key(net, 0.001)
+    io = Ethernet()
+    model = Model(0.001)
+    model.build(net, **io.builder_kwargs)
+    netlist = model.make_netlist(100)
+    store_built_model(cache, key, net, model, io, netlist)
+
+    # Loading with a different key should fail and leave the model unchanged
+    net2 = make_network()
+    io2 = Ethernet()
+    model2 = Model(0.001)
+    assert load_built_model(cache, "abcd", net2, model2, io2) is None
+    assert model2.params == dict()
+
+    # Load the model for a new construction of the network
+    netlist2 = load_built_model(cache, key, net2, model2, io2)
+    assert netlist2 is not None
+    assert len(netlist2.nets) == len(netlist.nets)
+    assert len(netlist2.operator_vertices) == len(netlist.operator_vertices)
+
+    # The parameters should refer to the objects in the new network
+    for ens in net2.all_ensembles:
+        assert np.all(model2.params[ens].gain ==
+                      model.params[net.all_ensembles[
+                          net2.all_ensembles.index(ens)]].gain)
+
+    # The operators should refer to the objects in the new network
+    new_objects = net2.all_objects + [e.neurons for e in net2.all_ensembles]
+    assert all(any(o is p for p in new_objects)
+               for o in model2.object_operators)
+
+    # The host network should be rebuilt around the nodes of the new network
+    host_nodes = io2.host_network.all_nodes
+    assert len(host_nodes) == len(io.host_network.all_nodes)
+    assert all(n in net2.all_nodes for n in host_nodes if
+               type(n) is nengo.Node)
+    assert (len(io2.host_network.all_connections) ==
+            len(io.host_network.all_connections))
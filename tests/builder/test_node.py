@@ -2,13 +2,12 @@ import mock
 import nengo
 import numpy as np
 import pytest
-import threading
 
 from nengo_spinnaker import add_spinnaker_params
 from nengo_spinnaker.builder import Model
 from nengo_spinnaker.builder.model import OutputPort, InputPort
 from nengo_spinnaker.builder.node import (
-    NodeIOController, InputNode, OutputNode,
+    NodeIOController, NodeInputBuffer, InputNode, OutputNode, ProbeNode,
     build_node_transmission_parameters
 )
 from nengo_spinnaker.operators import ValueSink
@@ -175,6 +174,97 @@ class TestNodeIOController(object):
         assert isinstance(model.object_operators[p], ValueSink)
         assert model.object_operators[p].probe is p
 
+    @pytest.mark.parametrize("period, on_machine", [(None, False),
+                                                    (1.0, True)])
+    def test_build_node_function_of_time_indefinite(self, period,
+                                                    on_machine):
+        """Test that only periodic function of time Nodes are simulated on
+        the machine when simulating indefinitely.
+        """
+        with nengo.Network() as net:
+            a = nengo.Node(lambda t: t, size_in=0)
+
+        add_spinnaker_params(net.config)
+        net.config[a].function_of_time = True
+        net.config[a].function_of_time_period = period
+
+        model = Model()
+        model.config = net.config
+
+        nioc = NodeIOController()
+        nioc.build_node(model, a, indefinite=True)
+
+        assert (a in model.object_operators) is on_machine
+        assert (a in nioc.host_network.nodes) is not on_machine
+
+    def test_indefinite_builder_kwargs(self):
+        """Test that probes are streamed to the host when simulating
+        indefinitely and that unsupported probes fail to build.
+        """
+        with nengo.Network():
+            a = nengo.Ensemble(10, 1)
+            p = nengo.Probe(a.neurons, "spikes")
+
+        nioc = NodeIOController()
+        kwargs = nioc.indefinite_builder_kwargs(100)
+
+        assert (kwargs["extra_probe_builders"][nengo.Ensemble].func ==
+                nioc.build_streamed_probe)
+        with pytest.raises(NotImplementedError):
+            kwargs["extra_probe_builders"][nengo.ensemble.Neurons](None, p)
+
+    def test_build_streamed_probe_of_host_node(self):
+        """Test that a probe of a Node simulated on the host is recorded
+        entirely on the host.
+        """
+        with nengo.Network():
+            a = nengo.Node(lambda t, x: x**2, size_in=3, size_out=3)
+            p = nengo.Probe(a, synapse=0.01)
+
+        model = mock.Mock(name="model", spec_set=[
+            "seeds", "make_connection", "dt"
+        ])
+        model.seeds = {p: 123}
+        model.dt = 0.001
+
+        nioc = NodeIOController()
+        nioc.build_streamed_probe(model, p, 100)
+
+        # The probe should be recorded by a new Node on the host
+        assert not model.make_connection.called
+        probe_node, = [n for n in nioc.host_network.nodes
+                       if isinstance(n, ProbeNode)]
+        assert probe_node.probe is p
+        assert probe_node.buffer.n_rows == 100
+
+        conn, = nioc.host_network.connections
+        assert conn.pre_obj is a
+        assert conn.post_obj is probe_node
+        assert conn.synapse is p.synapse
+
+    def test_build_streamed_probe_of_ensemble(self):
+        """Test that a probe of an Ensemble is connected to a Node on the
+        host by the model.
+        """
+        with nengo.Network():
+            a = nengo.Ensemble(100, 2)
+            p = nengo.Probe(a, synapse=0.01)
+
+        model = mock.Mock(name="model", spec_set=[
+            "seeds", "make_connection", "dt"
+        ])
+        model.seeds = {p: 123}
+        model.dt = 0.001
+
+        nioc = NodeIOController()
+        nioc.build_streamed_probe(model, p, 100)
+
+        conn = model.make_connection.call_args[0][0]
+        assert conn.pre_obj is a
+        assert isinstance(conn.post_obj, ProbeNode)
+        assert conn.post_obj in nioc.host_network.nodes
+        assert conn.solver is p.solver
+
     def test_get_node_source_standard(self):
         """Test that calling a NodeIOController to get the source for a
         connection which originates at a Node calls the method
@@ -444,7 +534,7 @@ class TestNodeIOController(object):
         assert conn.synapse is None
 
         # Check that the Node is included in the Node input dictionary
-        assert np.all(nioc.node_input[b] == np.zeros(b.size_in))
+        assert np.all(nioc.node_input[b].read() == np.zeros(b.size_in))
 
     def test_get_node_sink_repeated(self):
         """Test that calling a NodeIOController to get the sink for a
@@ -604,6 +694,54 @@ class TestBuildNodeTransmissionParameters(object):
         assert params.transform.shape == (1, 5)
 
 
+class TestNodeInputBuffer(object):
+    def test_write_read(self):
+        buf = NodeInputBuffer(3)
+        assert np.array_equal(buf.read(), np.zeros(3))
+
+        # Values written to the back buffer are not visible until flipped
+        buf.back[:] = [1.0, 2.0, 3.0]
+        assert np.array_equal(buf.read(), np.zeros(3))
+        buf.flip()
+        assert buf.sequence == 1
+        assert np.array_equal(buf.front, [1.0, 2.0, 3.0])
+
+        # Reads return a copy which is not changed by subsequent writes
+        value = buf.read()
+        assert np.array_equal(value, [1.0, 2.0, 3.0])
+        buf.write([4.0, 5.0, 6.0])
+        buf.write([7.0, 8.0, 9.0])
+        assert np.array_equal(value, [1.0, 2.0, 3.0])
+        assert buf.read() is value
+        assert np.array_equal(value, [7.0, 8.0, 9.0])
+
+    def test_read_retries_when_flipped(self):
+        """If a new value is published while the front buffer is being copied
+        the copy may be torn, so the read should be repeated.
+        """
+        buf = NodeInputBuffer(2)
+        buf.write([1.0, 1.0])
+        copyto = np.copyto
+
+        def write_during_copy(dst, src):
+            # Copy half of the value, then publish two new values so that the
+            # buffer being copied is overwritten before finishing the copy.
+            dst[0] = src[0]
+            if copyto_mock.call_count == 1:
+                buf.write([2.0, 2.0])
+                buf.write([3.0, 3.0])
+                dst[1] = src[1]
+            else:
+                copyto(dst, src)
+
+        with mock.patch("numpy.copyto",
+                        side_effect=write_during_copy) as copyto_mock:
+            value = buf.read()
+
+        assert copyto_mock.call_count == 2
+        assert np.array_equal(value, [3.0, 3.0])
+
+
 class TestInputNode(object):
     def test_init(self):
         """Test creating an new InputNode from an existing Node, this should
@@ -627,15 +765,15 @@ class TestInputNode(object):
         """
         controller = mock.Mock()
         controller.node_input = dict()
-        controller.node_input_lock = threading.Lock()
+        value = np.random.normal(size=3)
+        controller.get_node_input.return_value = value
 
         with nengo.Network():
             a = nengo.Node(lambda t, x: None, size_in=3, size_out=0)
             inn = InputNode(a, controller)
 
-        controller.node_input[a] = np.random.normal(size=a.size_in)
-
-        assert np.all(inn.output(0.1) == controller.node_input[a])
+        assert np.all(inn.output(0.1) == value)
+        controller.get_node_input.assert_called_once_with(a)
 
 
 class TestOutputNode(object):
@@ -666,3 +804,28 @@ class TestOutputNode(object):
 
         on.output(0.01, [1, 2, 3])
         controller.set_node_output.assert_called_once_with(a, [1, 2, 3])
+
+
+class TestProbeNode(object):
+    def test_output(self):
+        """Test that a ProbeNode records the values it receives, taking into
+        account the sample period of the probe.
+        """
+        with nengo.Network():
+            a = nengo.Node(lambda t, x: x, size_in=2, size_out=2)
+            p = nengo.Probe(a, sample_every=0.002)
+
+        pn = ProbeNode(p, 2, 0.001, add_to_container=False)
+        assert pn.size_in == 2
+        assert pn.size_out == 0
+
+        for i in range(5):
+            pn.output(0.0, np.array([i, -i]))
+
+        # Steps 0, 2 and 4 are sampled, only the last two are retained
+        assert pn.buffer.array.tolist() == [[2, -2], [4, -4]]
+
+        # Resetting restarts the sampling
+        pn.reset()
+        pn.output(0.0, np.array([7, 7]))
+        assert pn.buffer.array.tolist()[-1] == [7, 7]
@@ -0,0 +1,141 @@
+import mock
+import nengo
+import numpy as np
+from rig.links import Links
+from rig.machine_control.consts import AppState
+from rig.machine_control.machine_controller import ChipInfo, SystemInfo
+from rig import place_and_route as par
+from rig.place_and_route.routing_tree import RoutingTree
+import threading
+
+from nengo_spinnaker.builder import Model
+from nengo_spinnaker.netlist.cache import get_place_and_route_cache_key
+from nengo_spinnaker.node_io import Ethernet
+from nengo_spinnaker.utils.cache import FileCache
+from nengo_spinnaker.utils.timings import Timings
+
+
+def make_netlist():
+    """Construct a netlist, every call should construct an equivalent
+    netlist.
+    """
+    with nengo.Network(seed=5) as net:
+        a = nengo.Node(np.sin)
+        b = nengo.Ensemble(200, 1)
+        c = nengo.Ensemble(200, 2)
+        d = nengo.Node(size_in=2)
+        nengo.Connection(a, b)
+        nengo.Connection(b, c[0])
+        nengo.Connection(b, c[1], function=np.square)
+        nengo.Connection(c, d)
+        nengo.Probe(c, synapse=0.01)
+
+    io = Ethernet()
+    model = Model()
+    model.build(net, **io.builder_kwargs)
+    return model.make_netlist(100)
+
+
+def make_system_info(width=2, height=2, dead_chips=[]):
+    """Construct a description of a machine in which all cores are idle."""
+    chips = {
+        (x, y): ChipInfo(num_cores=18,
+                         core_states=[AppState.idle] * 18,
+                         working_links=set(Links),
+                         largest_free_sdram_block=100 * 2**20,
+                         largest_free_sram_block=2**16,
+                         largest_free_rtr_mc_block=1000,
+                         ethernet_up=(x, y) == (0, 0),
+                         ip_address="127.0.0.1" if (x, y) == (0, 0) else None,
+                         local_ethernet_chip=(0, 0))
+        for x in range(width) for y in range(height)
+        if (x, y) not in dead_chips
+    }
+    return SystemInfo(width, height, chips)
+
+
+def get_results(netlist):
+    """Get the results of placing and routing a netlist in terms of the
+    positions of the vertices and nets in the netlist.
+    """
+    vertices = list(netlist.vertices)
+    signals = list(netlist.nets)
+    return (
+        [netlist.placements[v] for v in vertices],
+        [netlist.allocations[v] for v in vertices],
+        [v.cluster for v in vertices],
+        [s.keyspace.get_mask(tag="routing") for s in signals],
+        [s.keyspace.get_value(tag="filter_routing") for s in signals],
+        sorted((ks.get_value(tag="routing"), ks.get_mask(tag="routing"))
+               for ks in netlist.net_keyspaces.values()),
+    )
+
+
+def test_get_place_and_route_cache_key():
+    # The same netlist and machine should have the same key
+    key = get_place_and_route_cache_key(make_netlist(), make_system_info())
+    assert key == get_place_and_route_cache_key(make_netlist(),
+                                                make_system_info())
+
+    # Changing the machine should change the key
+    assert key != get_place_and_route_cache_key(
+        make_netlist(), make_system_info(dead_chips=[(1, 1)]))
+
+    system_info = make_system_info()
+    system_info[(0, 0)].core_states[1] = AppState.run
+    assert key != get_place_and_route_cache_key(make_netlist(), system_info)
+
+    # Changing the place and route arguments should change the key
+    assert key != get_place_and_route_cache_key(
+        make_netlist(), make_system_info(), {"effort": 0.5})
+
+    # Place and route functions are identified by name
+    key = get_place_and_route_cache_key(make_netlist(), make_system_info(),
+                                        par.place, {}, par.route, {})
+    assert key == get_place_and_route_cache_key(
+        make_netlist(), make_system_info(), par.place, {}, par.route, {})
+    assert key != get_place_and_route_cache_key(
+        make_netlist(), make_system_info(), par.place, {}, par.allocate, {})
+
+    # Arguments which can't be described can't be cached
+    assert get_place_and_route_cache_key(
+        make_netlist(), make_system_info(), {"lock": threading.Lock()}
+    ) is None
+
+
+def test_place_and_route_cached(tmpdir):
+    cache = FileCache(str(tmpdir), 2**30, version="1")
+
+    # Place and route a netlist, storing the results in the cache
+    netlist = make_netlist()
+    timings = Timings()
+    netlist.place_and_route(make_system_info(), cache=cache, timings=timings)
+    expected = get_results(netlist)
+
+    # Each phase of placing and routing should have been timed
+    for phase in ("load_place_and_route_cache", "place", "allocate", "route",
+                  "allocate_keys"):
+        assert timings.n(phase) >= 1
+    assert timings.counts["n_cores"] == netlist.n_cores
+
+    # Placing and routing an equivalent netlist should restore the same
+    # results without performing placement.
+    netlist = make_netlist()
+    with mock.patch.object(netlist, "_place_and_route") as pnr:
+        netlist.place_and_route(make_system_info(), cache=cache)
+    assert not pnr.called
+    assert get_results(netlist) == expected
+
+    # The routes should refer to the vertices of the new netlist
+    vertices = set(netlist.vertices)
+    for tree in netlist.routes.values():
+        assert all(obj in vertices for obj in tree if
+                   not isinstance(obj, RoutingTree))
+
+    # Placing and routing onto a different machine should not use the cache
+    netlist = make_netlist()
+    with mock.patch.object(netlist, "_place_and_route",
+                           wraps=netlist._place_and_route) as pnr:
+        netlist.place_and_route(make_system_info(dead_chips=[(1, 1)]),
+                                cache=cache)
+    assert pnr.called
@@ -7,6 +7,7 @@ from rig.place_and_route.constraints import (ReserveResourceConstraint,
 
 from nengo_spinnaker import netlist
 from nengo_spinnaker.utils.itertools import flatten
+from nengo_spinnaker.utils.timings import Timings
 
 
 def test_before_simulation():
@@ -43,6 +44,13 @@ def test_before_simulation():
         "user1", 100, 1, 2, 5
     )
 
+    # An indefinite simulation is indicated by the maximum number of steps
+    simulator.controller.reset_mock()
+    model.before_simulation(simulator, None)
+    simulator.controller.write_vcpu_struct_field.assert_called_once_with(
+        "user1", 0xffffffff, 1, 2, 5
+    )
+
 
 def test_after_simulation():
     """Test that all methods are called when asked to finish a simulation."""
@@ -65,3 +73,120 @@ def test_after_simulation():
 
     after_a.assert_called_once_with(model, simulator, 100)
     after_b.assert_called_once_with(model, simulator, 100)
+
+
+def test_after_simulation_finalisers():
+    """Test that functions returned by "after_simulation" functions are
+    returned to be called later.
+    """
+    finaliser = mock.Mock()
+    after_a = mock.Mock(return_value=finaliser)
+    after_b = mock.Mock(return_value=None)
+
+    # Create a netlist
+    model = netlist.Netlist(
+        nets=[],
+        operator_vertices={},
+        keyspaces={},
+        after_simulation_functions=[after_a, after_b]
+    )
+
+    # Only the finaliser should be returned and it shouldn't be called
+    simulator = mock.Mock(name="Simulator")
+    assert model.after_simulation(simulator, 100) == [finaliser]
+    assert not finaliser.called
+
+
+def test_after_simulation_timings():
+    """Test that the time taken by each function is recorded."""
+    model = netlist.Netlist(
+        nets=[],
+        operator_vertices={},
+        keyspaces={},
+        after_simulation_functions=[mock.Mock(), mock.Mock()]
+    )
+
+    timings = Timings()
+    model.after_simulation(mock.Mock(name="Simulator"), 100, timings)
+    assert timings.n("after_simulation/Mock") == 2
+
+
+def test_prepare_simulation():
+    """Test that all methods are called when asked to prepare for a future
+    simulation.
+    """
+    prepare_a = mock.Mock()
+    prepare_b = mock.Mock()
+
+    # Create a netlist
+    model = netlist.Netlist(
+        nets=[],
+        operator_vertices={},
+        keyspaces={},
+        prepare_simulation_functions=[prepare_a, prepare_b]
+    )
+
+    # Call the prepare_simulation_functions
+    simulator = mock.Mock(name="Simulator")
+    model.prepare_simulation(simulator, 200, 100)
+
+    prepare_a.assert_called_once_with(model, simulator, 200, 100)
+    prepare_b.assert_called_once_with(model, simulator, 200, 100)
+
+
+def test_reset_application():
+    """Test that the executables are stopped, the reset functions called and
+    the executables reloaded when the application is reset.
+    """
+    vertex = mock.Mock(name="vertex")
+    vertex.application = "app.aplx"
+    vertex.resources = {Cores: 1}
+
+    controller = mock.Mock(name="controller")
+    controller.wait_for_cores_to_reach_state.return_value = 1
+
+    reset_a = mock.Mock()
+    reset_a.side_effect = lambda n, c: c.load_application.assert_not_called()
+
+    model = netlist.Netlist(
+        nets=[],
+        operator_vertices={None: (vertex, )},
+        keyspaces={},
+        reset_functions=[reset_a]
+    )
+    model.placements[vertex] = (1, 2)
+    model.allocations[vertex] = {Cores: slice(3, 4)}
+
+    model.reset_application(controller)
+
+    controller.send_signal.assert_called_once_with("exit")
+    reset_a.assert_called_once_with(model, controller)
+    controller.load_application.assert_called_once_with(
+        {"app.aplx": {(1, 2): {3}}})
+
+    # Routing tables and memory should be untouched
+    assert not controller.load_routing_tables.called
+    assert not controller.sdram_alloc.called
+
+
+def test_reset_application_fails():
+    """Test that an error is raised if the executables do not stop."""
+    vertex = mock.Mock(name="vertex")
+    vertex.resources = {Cores: 1}
+
+    controller = mock.Mock(name="controller")
+    controller.wait_for_cores_to_reach_state.return_value = 0
+
+    reset_a = mock.Mock()
+    model = netlist.Netlist(
+        nets=[],
+        operator_vertices={None: (vertex, )},
+        keyspaces={},
+        reset_functions=[reset_a]
+    )
+
+    with pytest.raises(Exception):
+        model.reset_application(controller)
+
+    assert not reset_a.called
+    assert not controller.load_application.called
@@ -0,0 +1,111 @@
+import asyncio
+import mock
+import nengo
+import numpy as np
+import pytest
+from rig.machine_control.packets import SCPPacket
+from rig.place_and_route import Cores
+
+from nengo_spinnaker.builder.connection import NodeTransmissionParameters
+from nengo_spinnaker.node_io import AsyncioEthernet
+from nengo_spinnaker.operators import SDPReceiver, SDPTransmitter
+from nengo_spinnaker.utils import type_casts as tp
+
+
+@pytest.fixture
+def loop():
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+def make_io(loop):
+    """Create and prepare an IO controller for a Node which both transmits to
+    and receives from the machine.
+    """
+    node = nengo.Node(lambda t, x: x, size_in=2, add_to_container=False)
+
+    sdp_rx = SDPReceiver()
+    rx_vertex = mock.Mock()
+    sdp_rx.vertex_connections[rx_vertex] = [
+        (NodeTransmissionParameters(slice(None), None, np.eye(2)),
+         slice(0, 2))]
+    sdp_tx = SDPTransmitter(2)
+    sdp_tx._vertex = mock.Mock()
+
+    netlist = mock.Mock()
+    netlist.placements = {rx_vertex: (0, 1), sdp_tx._vertex: (1, 0)}
+    netlist.allocations = {rx_vertex: {Cores: slice(2, 3)},
+                           sdp_tx._vertex: {Cores: slice(5, 6)}}
+    controller = mock.MagicMock()
+    controller.initial_host = "localhost"
+
+    io = AsyncioEthernet(loop=loop)
+    io._sdp_receivers[node] = sdp_rx
+    io._sdp_transmitters[node] = sdp_tx
+    io.prepare(None, controller, netlist)
+    return io, node
+
+
+def test_receive_while_waiting(loop):
+    """Packets should be received while the event loop runs between steps,
+    alongside other tasks scheduled on the loop.
+    """
+    io, node = make_io(loop)
+    assert io.loop is loop
+
+    # Other work scheduled on the loop is performed while waiting
+    timer = mock.Mock()
+    loop.call_later(0.01, timer)
+
+    packet = SCPPacket(
+        src_x=1, src_y=0, src_cpu=5, src_port=1,
+        dest_x=0, dest_y=0, dest_cpu=0, dest_port=0xff, tag=1,
+        cmd_rc=0, seq=0, arg1=0, arg2=0, arg3=0,
+        data=bytes(tp.np_to_fix(np.array([0.25, -2.0])).data)
+    )
+    io.out_socket.sendto(packet.bytestring,
+                         ("localhost", io.in_socket.getsockname()[1]))
+
+    # No thread is used
+    thread = io.spawn()
+    thread.start()
+    io.wait(0.05)
+    thread.stop()
+
+    assert timer.called
+    assert np.array_equal(io.get_node_input(node), [0.25, -2.0])
+    io.close()
+
+
+def test_send_through_transport(loop):
+    """Node outputs should be transmitted by the datagram endpoint."""
+    io, node = make_io(loop)
+
+    with mock.patch.object(io._out_transports[(0, 0)], "sendto") as sendto:
+        io.set_node_output(node, np.array([0.5, 1.0]))
+        io.end_step()
+
+    assert sendto.call_count == 1
+    (data, _), _ = sendto.call_args
+    assert SCPPacket.from_bytestring(data).dest_cpu == 2
+    assert io.get_metrics()["n_packets_sent"] == 1
+
+    io.close()
+    assert io.in_socket.fileno() == -1
+
+
+def test_wait_without_create_future(loop):
+    """Waiting shouldn't require `loop.create_future`, which was added in
+    Python 3.5.2.
+    """
+    loop.create_future = mock.Mock(side_effect=AttributeError)
+    io = AsyncioEthernet(loop=loop)
+
+    timer = mock.Mock()
+    loop.call_later(0.01, timer)
+    io.wait(0.05)
+
+    assert timer.called
+    assert not loop.create_future.called
+    io.close()
@@ -0,0 +1,99 @@
+import mock
+import nengo
+import numpy as np
+import pytest
+from rig.machine_control import MachineController
+from rig.machine_control.scp_connection import FatalReturnCodeError
+from rig.place_and_route import Cores
+import time
+
+from nengo_spinnaker.builder.connection import NodeTransmissionParameters
+from nengo_spinnaker.bundle import make_system_info
+from nengo_spinnaker.node_io import Ethernet
+from nengo_spinnaker.node_io.emulator import SpiNNakerEmulator
+from nengo_spinnaker.operators import SDPReceiver, SDPTransmitter
+
+
+@pytest.fixture
+def emulator():
+    emulator = SpiNNakerEmulator()
+    emulator.start()
+    yield emulator
+    emulator.close()
+
+
+def wait_for(condition, timeout=1.0):
+    """Wait until a condition is met."""
+    end = time.time() + timeout
+    while not condition() and time.time() < end:
+        time.sleep(0.001)
+    return condition()
+
+
+def test_iptags(emulator):
+    controller = MachineController("localhost", n_tries=1)
+    with controller(x=0, y=0):
+        controller.iptag_set(1, "127.0.0.1", 1234)
+        controller.iptag_set(2, "0.0.0.0", 5678)
+        assert emulator.iptags == {1: ("127.0.0.1", 1234),
+                                   2: ("127.0.0.1", 5678)}
+
+        controller.iptag_clear(2)
+        assert emulator.iptags == {1: ("127.0.0.1", 1234)}
+
+        # Other commands are not supported
+        with pytest.raises(FatalReturnCodeError):
+            controller.get_software_version()
+
+
+def test_exchange_with_ethernet(emulator):
+    """Node values should be exchanged with an Ethernet IO controller."""
+    node = nengo.Node(lambda t, x: x, size_in=2, add_to_container=False)
+
+    sdp_rx = SDPReceiver()
+    rx_vertex = mock.Mock()
+    sdp_rx.vertex_connections[rx_vertex] = [
+        (NodeTransmissionParameters(slice(None), None, np.eye(2)),
+         slice(0, 2))]
+    sdp_tx = SDPTransmitter(2)
+    sdp_tx._vertex = mock.Mock()
+
+    netlist = mock.Mock()
+    netlist.placements = {rx_vertex: (0, 1), sdp_tx._vertex: (1, 0)}
+    netlist.allocations = {rx_vertex: {Cores: slice(2, 3)},
+                           sdp_tx._vertex: {Cores: slice(5, 6)}}
+
+    io = Ethernet()
+    io._sdp_receivers[node] = sdp_rx
+    io._sdp_transmitters[node] = sdp_tx
+    io.prepare(None, MachineController("localhost", n_tries=1), netlist,
+               make_system_info(1))
+    assert emulator.iptags[1][1] == io.in_socket.getsockname()[1]
+
+    # Output of the Node is received by the SDP receiver core
+    io.set_node_output(node, np.array([0.5, -0.25]))
+    io.end_step()
+    assert wait_for(lambda: emulator.n_sdp_received == 1)
+    assert np.array_equal(emulator.sdp_values[(0, 1, 2)], [0.5, -0.25])
+
+    # Packets emitted by the SDP transmitter core are received as input
+    thread = io.spawn()
+    thread.start()
+    try:
+        emulator.add_transmitter(1, 0, 5, width=2)
+        emulator.rate = 1000.0
+        assert wait_for(
+            lambda: io.node_stats[node].n_packets_received >= 10)
+    finally:
+        thread.stop()
+        io.close()
+
+    assert io.get_node_input(node)[0] != 0.0
+    assert emulator.n_sdp_dropped == 0
+
+
+def test_drop_without_iptag(emulator):
+    emulator.add_transmitter(1, 0, 5, width=2)
+    emulator.rate = 1000.0
+    assert wait_for(lambda: emulator.n_sdp_dropped >= 5)
+    assert emulator.n_sdp_sent == 0
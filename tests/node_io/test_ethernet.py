@@ -1,10 +1,21 @@
+import mock
 import nengo
+import numpy as np
 import pytest
+import socket
+import time
+from rig.machine_control.consts import SCP_PORT
+from rig.machine_control.packets import SCPPacket
+from rig.place_and_route import Cores
 
+from nengo_spinnaker import add_spinnaker_params
 from nengo_spinnaker.builder import Model
+from nengo_spinnaker.builder.connection import NodeTransmissionParameters
+from nengo_spinnaker.bundle import make_system_info
 from nengo_spinnaker.builder.model import OutputPort, InputPort
 from nengo_spinnaker.node_io import ethernet as ethernet_io
 from nengo_spinnaker.operators import SDPReceiver, SDPTransmitter
+from nengo_spinnaker.utils import type_casts as tp
 
 
 @pytest.mark.parametrize("transmission_period", [0.001, 0.002])
@@ -23,9 +34,8 @@ def test_Ethernet_init(transmission_period):
     assert io.host_network.all_connections == list()
     assert io.host_network.all_probes == list()
 
-    # Check that the node input dictionary and lock are present
-    with io.node_input_lock:
-        assert io.node_input == dict()
+    # Check that the node input dictionary is present
+    assert io.node_input == dict()
 
 
 def test_get_spinnaker_source_for_node():
@@ -88,6 +98,30 @@ def test_get_spinnaker_sink_for_node():
     assert model.extra_operators == [spec.target.obj]
 
 
+def test_get_spinnaker_sink_for_node_transmission_config():
+    """Check that the SDP Tx operators use the transmission period of the
+    controller unless it is overridden by the config of the Node.
+    """
+    with nengo.Network() as net:
+        a = nengo.Ensemble(100, 1)
+        b = nengo.Node(lambda t, x: None, size_in=1)
+        c = nengo.Node(lambda t, x: None, size_in=2)
+        a_b = nengo.Connection(a, b)
+        a_c = nengo.Connection(a, c[0])
+
+    add_spinnaker_params(net.config)
+    net.config[c].transmission_period = 0.1
+
+    model = Model()
+    model.config = net.config
+    io = ethernet_io.Ethernet(transmission_period=0.02)
+    sdp_tx_b = io.get_node_sink(model, a_b).target.obj
+    sdp_tx_c = io.get_node_sink(model, a_c).target.obj
+
+    assert sdp_tx_b.transmission_period == 0.02
+    assert sdp_tx_c.transmission_period == 0.1
+
+
 def test_get_spinnaker_sink_for_node_repeated():
     """Check that getting the SpiNNaker sink for a Node twice returns the same
     target.
@@ -106,3 +140,294 @@ def test_get_spinnaker_sink_for_node_repeated():
 
     assert spec0.target.obj is spec1.target.obj
     assert model.extra_operators == [spec0.target.obj]
+
+
+def test_set_node_output_coalesces_packets():
+    """Check that the outputs of a Node are transmitted at the end of a step
+    in one packet for each SDP receiver core, with the values of every
+    connection transmitted by a core packed into its packet.
+    """
+    node = nengo.Node(size_in=2, add_to_container=False)
+    tp_a = NodeTransmissionParameters(slice(None), None, np.eye(2))
+    tp_b = NodeTransmissionParameters(slice(0, 1), np.square, [[2.0]])
+    tp_c = NodeTransmissionParameters(slice(None), None, [[1.0, 1.0]])
+
+    # Connections a and b are transmitted by the same core
+    vertex_ab, vertex_c = mock.Mock(), mock.Mock()
+    sdp_rx = SDPReceiver()
+    sdp_rx.vertex_connections.update([
+        (vertex_ab, [(tp_a, slice(0, 2)), (tp_b, slice(0, 1))]),
+        (vertex_c, [(tp_c, slice(0, 1))]),
+    ])
+
+    netlist = mock.Mock()
+    netlist.placements = {vertex_ab: (1, 2), vertex_c: (1, 2)}
+    netlist.allocations = {vertex_ab: {Cores: slice(3, 4)},
+                           vertex_c: {Cores: slice(4, 5)}}
+    controller = mock.MagicMock()
+    controller.initial_host = "localhost"
+
+    io = ethernet_io.Ethernet()
+    io._sdp_receivers[node] = sdp_rx
+    io.prepare(None, controller, netlist)
+    out_socket = io._out_transports[(0, 0)] = mock.Mock()
+
+    # Nothing is sent until the end of the step
+    io.set_node_output(node, np.array([0.5, -0.25]))
+    assert not out_socket.sendto.called
+    io.end_step()
+
+    def packet(p, values):
+        return SCPPacket(dest_port=1, dest_cpu=p, dest_x=1, dest_y=2,
+                         cmd_rc=0, arg1=0, arg2=0, arg3=0,
+                         data=bytes(tp.np_to_fix(np.array(values)).data))
+
+    sent = sorted(args[0] for args, _ in out_socket.sendto.call_args_list)
+    assert sent == sorted([packet(3, [0.5, -0.25, 0.5]).bytestring,
+                           packet(4, [0.25]).bytestring])
+    assert all(args[1] == ("localhost", SCP_PORT) for args, _ in
+               out_socket.sendto.call_args_list)
+
+    # A step in which no Node produces output sends nothing
+    io.end_step()
+    assert out_socket.sendto.call_count == 2
+    assert io.get_metrics() == {
+        "n_packets_sent": 2, "packets_per_step": 1.0,
+        "n_packets_received": 0, "n_unknown_packets": 0,
+        "n_send_errors": 0, "n_receive_errors": 0,
+    }
+    assert io.node_stats[node].n_packets_sent == 2
+    assert io.node_stats[node].n_bytes_sent == sum(
+        len(args[0]) for args, _ in out_socket.sendto.call_args_list)
+
+    # Packets which cannot be sent are counted as errors
+    out_socket.sendto.side_effect = IOError
+    io.set_node_output(node, np.array([0.5, -0.25]))
+    io.end_step()
+    assert io.node_stats[node].n_packets_sent == 2
+    assert io.node_stats[node].n_send_errors == 2
+    assert io.get_metrics()["n_send_errors"] == 2
+
+    io.close()
+
+
+def test_node_output_stacks_transforms():
+    """Check that connections sharing a pre-slice and function are computed
+    together and that the values written to the payloads match those which
+    would be computed for each connection separately.
+    """
+    connections = [
+        NodeTransmissionParameters(slice(None), None, np.eye(3)),
+        NodeTransmissionParameters(slice(0, 2), np.sum, [[2.0], [1e6]]),
+        NodeTransmissionParameters(slice(None), None, [[1.0, 0.5, -1.0]]),
+        NodeTransmissionParameters([2, 0], np.sum, [[-3.0]]),
+        NodeTransmissionParameters(slice(0, 2), np.sum, [[0.5]]),
+    ]
+    payloads = [np.zeros(np.shape(c.transform)[0], dtype=np.int32)
+                for c in connections]
+    output = ethernet_io.NodeOutput(
+        [(c, slice(None), payload, (0, 0, i % 2 + 1)) for i, (c, payload) in
+         enumerate(zip(connections, payloads))])
+    assert len(output._groups) == 3
+    assert output.cores == [(0, 0, 1), (0, 0, 2)]
+
+    value = np.array([0.5, 0.25, -1.5])
+    output(value)
+
+    for c, payload in zip(connections, payloads):
+        c_value = value[c.pre_slice]
+        if c.function is not None:
+            c_value = c.function(c_value)
+        expected = tp.np_to_fix(np.dot(c.transform, c_value).reshape(-1))
+        assert np.array_equal(payload, expected)
+
+    # Large values are saturated
+    assert payloads[1][1] == np.iinfo(np.int32).max
+
+
+def test_set_node_output_splits_wide_connections():
+    """Check that a connection split across several cores is transmitted in
+    slices and that cores receiving more values than fit in a single packet
+    receive several packets with the offset of their values.
+    """
+    node = nengo.Node(size_in=100, add_to_container=False)
+    transform = np.eye(100) * 0.5
+    tp_a = NodeTransmissionParameters(slice(None), None, transform)
+
+    vertex_0, vertex_1 = mock.Mock(), mock.Mock()
+    sdp_rx = SDPReceiver()
+    sdp_rx.vertex_connections.update([
+        (vertex_0, [(tp_a, slice(0, 80))]),
+        (vertex_1, [(tp_a, slice(80, 100))]),
+    ])
+
+    netlist = mock.Mock()
+    netlist.placements = {vertex_0: (1, 2), vertex_1: (1, 2)}
+    netlist.allocations = {vertex_0: {Cores: slice(3, 4)},
+                           vertex_1: {Cores: slice(4, 5)}}
+    controller = mock.MagicMock()
+    controller.initial_host = "localhost"
+
+    io = ethernet_io.Ethernet()
+    io._sdp_receivers[node] = sdp_rx
+    io.prepare(None, controller, netlist)
+    out_socket = io._out_transports[(0, 0)] = mock.Mock()
+
+    # The connection is computed once for all of its slices
+    assert len(io._node_outgoing[node]._groups) == 1
+
+    value = np.linspace(-1.0, 1.0, 100)
+    io.set_node_output(node, value)
+    io.end_step()
+
+    def packet(p, offset, values):
+        return SCPPacket(dest_port=1, dest_cpu=p, dest_x=1, dest_y=2,
+                         cmd_rc=0, arg1=offset, arg2=0, arg3=0,
+                         data=bytes(tp.np_to_fix(np.array(values)).data))
+
+    expected = np.dot(transform, value)
+    sent = sorted(args[0] for args, _ in out_socket.sendto.call_args_list)
+    assert sent == sorted([packet(3, 0, expected[0:64]).bytestring,
+                           packet(3, 64, expected[64:80]).bytestring,
+                           packet(4, 0, expected[80:100]).bytestring])
+    assert io.n_packets_sent == 3
+
+    io.close()
+
+
+def test_ethernet_thread_receives_node_input():
+    """Check that values received from SDP transmitters are written into the
+    input arrays of the appropriate Nodes.
+    """
+    node_a = nengo.Node(lambda t, x: None, size_in=2, add_to_container=False)
+    node_b = nengo.Node(lambda t, x: None, size_in=1, add_to_container=False)
+
+    sdp_tx_a, sdp_tx_b = SDPTransmitter(2), SDPTransmitter(1)
+    sdp_tx_a._vertex, sdp_tx_b._vertex = mock.Mock(), mock.Mock()
+    netlist = mock.Mock()
+    netlist.placements = {sdp_tx_a._vertex: (3, 2), sdp_tx_b._vertex: (2, 3)}
+    netlist.allocations = {sdp_tx_a._vertex: {Cores: slice(7, 8)},
+                           sdp_tx_b._vertex: {Cores: slice(17, 18)}}
+    controller = mock.MagicMock()
+    controller.initial_host = "localhost"
+
+    io = ethernet_io.Ethernet()
+    io._sdp_transmitters.update({node_a: sdp_tx_a, node_b: sdp_tx_b})
+    io.prepare(None, controller, netlist)
+    input_a = io.node_input[node_a]
+
+    thread = io.spawn()
+    thread.start()
+    try:
+        def packet(x, y, p, values):
+            return SCPPacket(
+                src_x=x, src_y=y, src_cpu=p, src_port=1,
+                dest_x=0, dest_y=0, dest_cpu=0, dest_port=0xff, tag=1,
+                cmd_rc=0, seq=0, arg1=0, arg2=0, arg3=0,
+                data=bytes(tp.np_to_fix(np.array(values)).data)
+            ).bytestring
+
+        address = ("localhost", io.in_socket.getsockname()[1])
+        io.out_socket.sendto(packet(3, 2, 7, [0.5, -0.25]), address)
+        io.out_socket.sendto(packet(2, 3, 17, [1.5]), address)
+        io.out_socket.sendto(packet(2, 3, 18, [2.0]), address)  # Unknown
+
+        for _ in range(100):
+            if io.n_unknown_packets:
+                break
+            time.sleep(0.01)
+    finally:
+        thread.stop()
+
+    # The values are written into the existing buffers
+    assert io.node_input[node_a] is input_a
+    assert np.array_equal(io.get_node_input(node_a), [0.5, -0.25])
+    assert np.array_equal(io.get_node_input(node_b), [1.5])
+
+    # The received packets are counted
+    stats = io.node_stats[node_a]
+    assert stats.n_packets_received == 1
+    assert stats.n_bytes_received == 26 + 8
+    assert stats.newest_input_age >= 0.0
+    assert io.get_metrics()["n_packets_received"] == 2
+    assert io.get_metrics()["n_unknown_packets"] == 1
+
+    # Reading the input records how long it waited, only once per packet
+    assert stats.input_wait.n == 1
+    io.get_node_input(node_a)
+    assert stats.input_wait.n == 1
+    io.close()
+
+
+def test_io_through_nearest_ethernet_chip():
+    """Check that packets are exchanged with each core through the Ethernet
+    connected chip nearest to it.
+    """
+    system_info = make_system_info(3)
+    hostnames = {(0, 0): "spinn-0", (4, 8): "10.0.0.2", (8, 4): "10.0.0.3"}
+    for xy, hostname in hostnames.items():
+        system_info[xy] = system_info[xy]._replace(ip_address=hostname)
+
+    node = nengo.Node(lambda t, x: x, size_in=1, add_to_container=False)
+    sdp_rx = SDPReceiver()
+    rx_vertex = mock.Mock()
+    sdp_rx.vertex_connections[rx_vertex] = [
+        (NodeTransmissionParameters(slice(None), None, [[1.0]]),
+         slice(0, 1))]
+    sdp_tx = SDPTransmitter(1)
+    sdp_tx._vertex = mock.Mock()
+
+    netlist = mock.Mock()
+    netlist.placements = {rx_vertex: (9, 5), sdp_tx._vertex: (5, 9)}
+    netlist.allocations = {rx_vertex: {Cores: slice(1, 2)},
+                           sdp_tx._vertex: {Cores: slice(2, 3)}}
+    controller = mock.MagicMock()
+    controller.initial_host = "localhost"
+
+    io = ethernet_io.Ethernet()
+    io._sdp_receivers[node] = sdp_rx
+    io._sdp_transmitters[node] = sdp_tx
+    io.prepare(None, controller, netlist, system_info)
+
+    # An IP tag is set on every Ethernet connected chip for its own socket
+    assert list(io.in_sockets) == [(0, 0), (4, 8), (8, 4)]
+    assert io.in_sockets[(0, 0)] is io.in_socket
+    assert len(set(io.in_sockets.values())) == 3
+    assert controller.iptag_set.call_count == 3
+    assert mock.call(x=4, y=8) in controller.call_args_list
+
+    # The SDP transmitter sends packets to its nearest Ethernet chip
+    assert sdp_tx.ethernet_chip == (4, 8)
+
+    # Packets for the SDP receiver are sent to its nearest Ethernet chip
+    out_socket = io._out_transports[(8, 4)] = mock.Mock()
+    io.set_node_output(node, np.array([0.5]))
+    io.end_step()
+    (data, address), _ = out_socket.sendto.call_args
+    assert address == ("10.0.0.3", SCP_PORT)
+    assert SCPPacket.from_bytestring(data).dest_x == 9
+
+    # Packets are received from every Ethernet chip
+    thread = io.spawn()
+    thread.start()
+    try:
+        packet = SCPPacket(
+            src_x=5, src_y=9, src_cpu=2, src_port=1,
+            dest_x=4, dest_y=8, dest_cpu=0, dest_port=0xff, tag=1,
+            cmd_rc=0, seq=0, arg1=0, arg2=0, arg3=0,
+            data=bytes(tp.np_to_fix(np.array([0.75])).data)
+        )
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.sendto(packet.bytestring,
+                    ("localhost", io.in_sockets[(4, 8)].getsockname()[1]))
+        sock.close()
+
+        for _ in range(100):
+            if io.node_input[node].sequence:
+                break
+            time.sleep(0.01)
+    finally:
+        thread.stop()
+
+    assert io.get_node_input(node)[0] == 0.75
+    io.close()
@@ -0,0 +1,56 @@
+import mock
+import nengo
+import pytest
+
+from nengo_spinnaker.node_io import telemetry
+from nengo_spinnaker.node_io.telemetry import NodeIOStats, RoundTripProbe
+
+
+def test_node_io_stats():
+    stats = NodeIOStats()
+    assert stats.newest_input_age is None
+
+    # Reading before anything was received records nothing
+    stats.record_read(1.0)
+    assert stats.input_wait.n == 0
+
+    # Inputs replaced before they are read are not recorded
+    stats.record_received(34, 2.0)
+    stats.record_received(34, 2.5)
+    assert stats.n_packets_received == 2
+    assert stats.n_bytes_received == 68
+    assert stats.last_received == 2.5
+
+    stats.record_read(3.0)
+    stats.record_read(4.0)
+    assert stats.input_wait.n == 1
+    assert stats.input_wait.total == pytest.approx(0.5)
+
+    with mock.patch.object(telemetry, "clock", return_value=5.0):
+        assert stats.newest_input_age == pytest.approx(2.5)
+
+
+def test_round_trip_probe():
+    with nengo.Network() as net:
+        pass
+    probe = RoundTripProbe(net)
+
+    # The stamp, loopback and echo Nodes are connected in a loop
+    assert probe.loopback.output is None
+    assert [(c.pre_obj, c.post_obj) for c in net.connections] == [
+        (probe.stamp, probe.loopback), (probe.loopback, probe.echo)]
+
+    with mock.patch.object(telemetry, "clock", return_value=61.5):
+        assert probe.stamp.output(0.0) == pytest.approx(1.5)
+
+    with mock.patch.object(telemetry, "clock", return_value=62.0):
+        probe.echo.output(0.0, [0.0])  # Nothing has returned yet
+        probe.echo.output(0.0, [1.5])
+        probe.echo.output(0.0, [1.5])  # Repeated values are ignored
+        probe.echo.output(0.0, [59.75])  # Latency wraps with the stamp
+
+    assert probe.latency.n == 2
+    assert probe.latency.total == pytest.approx(0.5 + 2.25)
+
+    probe.reset()
+    assert probe.latency.n == 0
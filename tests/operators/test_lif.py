@@ -1,4 +1,5 @@
 import itertools
+import mock
 import nengo
 import numpy as np
 import pytest
@@ -23,6 +24,53 @@ class TestEnsembleLIF(object):
         assert np.all(op.direct_input == np.zeros(size_in))
         assert op.local_probes == list()
 
+    def test_set_parameters(self):
+        """Test that changing the parameters of an ensemble rewrites only the
+        regions which have changed.
+        """
+        ens = nengo.Ensemble(4, 2, radius=2.0, add_to_container=False)
+        op = lif.EnsembleLIF(ens)
+
+        # Construct the regions as they would have been built
+        encoders = np.array([[1.0, 0.0], [0.0, 1.0], [-1.0, 0.0], [0, -1.0]])
+        gain = np.array([1.0, 2.0, 3.0, 4.0])
+        bias = np.array([0.5, 0.5, 0.5, 0.5])
+        params = mock.Mock(encoders=encoders, gain=gain, bias=bias)
+        model = mock.Mock(dt=0.001, params={ens: params})
+
+        op.n_encoder_copies = 1
+        op.decoders = np.ones((1, 4))
+        op.regions = op._make_neuron_regions(
+            encoders * (gain / 2.0)[:, np.newaxis], bias, gain)
+        op.regions[lif.Regions.decoders] = op._make_decoder_region(
+            op.decoders, model.dt)
+        built_regions = dict(op.regions)
+
+        vertex = mock.Mock(name="vertex")
+        op.clusters = [mock.Mock(vertices=[vertex])]
+
+        # Changing the bias should only rewrite the bias region
+        op.set_parameters(model, bias=np.zeros(4))
+        vertex.rewrite_region.assert_called_once_with(lif.Regions.bias)
+        assert np.all(op.regions[lif.Regions.bias].matrix == 0)
+
+        # Changing the gain should rewrite the encoders and gains and restore
+        # the biases.
+        vertex.reset_mock()
+        op.set_parameters(model, gain=2*gain)
+        assert (set(c[0][0] for c in vertex.rewrite_region.call_args_list) ==
+                {lif.Regions.encoders, lif.Regions.gain, lif.Regions.bias})
+        assert np.all(op.regions[lif.Regions.bias].matrix ==
+                      built_regions[lif.Regions.bias].matrix)
+        assert np.all(op.regions[lif.Regions.encoders].matrix ==
+                      tp.np_to_fix(encoders * gain[:, np.newaxis]))
+
+        # Parameters of the wrong shape should be rejected
+        vertex.reset_mock()
+        with pytest.raises(ValueError):
+            op.set_parameters(model, decoders=np.ones((2, 4)))
+        assert not vertex.rewrite_region.called
+
 
 @pytest.mark.parametrize(
     ("machine_timestep", "size_in", "encoder_width", "n_populations",
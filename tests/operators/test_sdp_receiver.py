@@ -7,7 +7,7 @@ import struct
 import tempfile
 
 from nengo_spinnaker.builder.builder import Model, ObjectPort
-from nengo_spinnaker.builder.model import SignalParameters
+from nengo_spinnaker.builder.model import OutputPort, SignalParameters
 from nengo_spinnaker.builder.node import NodeTransmissionParameters
 from nengo_spinnaker.operators import SDPReceiver
 from nengo_spinnaker.operators.sdp_receiver import SystemRegion
@@ -29,3 +29,80 @@ class TestSystemRegion(object):
 
         fp.seek(0)
         assert fp.read() == struct.pack("<2I", machine_timestep, size_out)
+
+
+class TestMakeVertices(object):
+    def test_packs_and_splits_connections(self):
+        """Check that narrow connections are packed into a single core and
+        that wide connections are split across several cores.
+        """
+        sdp_rx = SDPReceiver()
+
+        # Create a model with connections of 3, 5 and 300 dimensions
+        m = Model()
+        m.machine_timestep = 1000
+        connections = list()
+        for size_out in (3, 5, 300):
+            signal = SignalParameters(True, size_out, m.keyspaces["nengo"])
+            params = NodeTransmissionParameters(slice(None), None,
+                                                np.ones((size_out, 1)))
+            m.connection_map.add_connection(
+                sdp_rx, OutputPort.standard, signal, params, None, None, None
+            )
+            connections.append((signal, params))
+        (sig_a, tp_a), (sig_b, tp_b), (sig_c, tp_c) = connections
+
+        # Make the vertices, each core receives at most one packet (64
+        # values) each step.
+        netlistspec = sdp_rx.make_vertices(m)
+        assert sdp_rx.packet_rate * m.machine_timestep == 128
+        assert len(netlistspec.vertices) == 5
+        assert netlistspec.load_function == sdp_rx.load_to_machine
+
+        assert (list(six.itervalues(sdp_rx.vertex_connections)) == [
+            [(tp_c, slice(0, 64))],
+            [(tp_c, slice(64, 128))],
+            [(tp_c, slice(128, 192))],
+            [(tp_c, slice(192, 256))],
+            [(tp_c, slice(256, 300)), (tp_b, slice(0, 5)),
+             (tp_a, slice(0, 3))],
+        ])
+        assert list(sdp_rx.vertex_connections) == netlistspec.vertices
+
+        # The keys of each core are given in the order of its values
+        vx = netlistspec.vertices[4]
+        assert vx.resources[Cores] == 1
+        assert sdp_rx._sys_regions[vx].size_out == 52
+        assert sdp_rx._key_regions[vx].signals_and_arguments == (
+            [(sig_c, {"index": i}) for i in range(256, 300)] +
+            [(sig_b, {"index": i}) for i in range(5)] +
+            [(sig_a, {"index": i}) for i in range(3)]
+        )
+
+    def test_packet_rate_limits_rows(self):
+        """Cores should transmit no more packets each step than the packet
+        rate allows.
+        """
+        sdp_rx = SDPReceiver()
+        m = Model(machine_timestep=100)  # At most 12 packets each step
+        signal = SignalParameters(True, 30, m.keyspaces["nengo"])
+        params = NodeTransmissionParameters(slice(None), None,
+                                            np.ones((30, 1)))
+        m.connection_map.add_connection(
+            sdp_rx, OutputPort.standard, signal, params, None, None, None
+        )
+
+        sdp_rx.make_vertices(m)
+        assert list(six.itervalues(sdp_rx.vertex_connections)) == [
+            [(params, slice(0, 12))], [(params, slice(12, 24))],
+            [(params, slice(24, 30))],
+        ]
+
+    def test_no_connections(self):
+        """Check that no vertices are created if the receiver has no
+        outgoing connections.
+        """
+        sdp_rx = SDPReceiver()
+        netlistspec = sdp_rx.make_vertices(Model())
+        assert netlistspec.vertices == []
+        assert len(sdp_rx.vertex_connections) == 0
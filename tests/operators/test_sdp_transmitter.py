@@ -0,0 +1,41 @@
+import pytest
+import struct
+import tempfile
+
+from nengo_spinnaker.builder.builder import Model
+from nengo_spinnaker.operators import SDPTransmitter
+from nengo_spinnaker.operators.sdp_transmitter import SystemRegion
+
+
+def test_system_region():
+    """The system region should contain the P2P address of the chip to which
+    packets should be sent.
+    """
+    region = SystemRegion(1000, 3, 10)
+    assert region.sizeof() == 16
+
+    fp = tempfile.TemporaryFile()
+    region.write_region_to_file(fp, ethernet_chip=(4, 8))
+    fp.seek(0)
+    assert struct.unpack("<4I", fp.read()) == (3, 1000, 10, (4 << 8) | 8)
+
+
+@pytest.mark.parametrize(
+    "machine_timestep, transmission_period, delay",
+    [(1000, 0.0, 1),  # Every timestep
+     (1000, 0.01, 10),
+     (2000, 0.01, 5),
+     (1000, 0.0004, 1),  # At least one timestep
+     ]
+)
+def test_make_vertices_transmission_delay(machine_timestep,
+                                          transmission_period, delay):
+    """The transmission period should be converted into a number of machine
+    timesteps.
+    """
+    model = Model(machine_timestep=machine_timestep)
+    sdp_tx = SDPTransmitter(3, transmission_period)
+    netlistspec = sdp_tx.make_vertices(model)
+
+    assert netlistspec.vertices == (sdp_tx._vertex, )
+    assert sdp_tx._sys_region.transmission_delay == delay
@@ -5,7 +5,7 @@ import pytest
 import struct
 
 from nengo_spinnaker.operators.value_source import (
-    SystemRegion, get_transform_keys)
+    SystemRegion, ValueSource, get_transform_keys)
 
 
 def test_get_transform_keys():
@@ -65,3 +65,83 @@ class TestSystemRegion(object):
             timestep, vertex_slice.stop - vertex_slice.start,
             0x1 if periodic else 0x0, n_blocks, block_length, last_block_length
         )
+
+
+def test_prepare_simulation():
+    """Values prepared for a simulation should be written by
+    before_simulation without re-evaluating the function.
+    """
+    # Create a value source with a single output and a bare-bones connection
+    function = mock.Mock(side_effect=lambda t: [t])
+    vs = ValueSource(function, 1, None)
+    t_pars = mock.Mock(spec_set=["pre_slice", "function"])
+    t_pars.pre_slice = slice(None)
+    t_pars.function = None
+    vs.transmission_parameters = [(t_pars, np.eye(1))]
+    vs.system_region = SystemRegion(1000, False, 10)
+    vs.output_region = mock.Mock()
+    vs.vertices = []
+
+    # Prepare the simulation of 10 steps starting at step 5
+    simulator = mock.Mock(dt=0.001, steps=5)
+    vs.prepare_simulation(None, simulator, 5, 10)
+    assert function.call_count == 10
+
+    # Running the prepared simulation shouldn't call the function again
+    vs.before_simulation(None, simulator, 10)
+    assert function.call_count == 10
+
+    # But the values should be recomputed for a simulation which wasn't
+    # prepared.
+    simulator.steps = 15
+    vs.before_simulation(None, simulator, 10)
+    assert function.call_count == 20
+
+
+def test_set_parameters():
+    """Changing the output should discard prepared values and the original
+    output should be restored when no output is given.
+    """
+    function = mock.Mock(side_effect=lambda t: [t, t])
+    vs = ValueSource(function, 2, None)
+    vs._prepared = (0, 10, None)
+
+    new_function = mock.Mock(side_effect=lambda t: [0.0, t])
+    vs.set_parameters(None, output=new_function)
+    assert vs.function is new_function
+    assert vs._prepared is None
+
+    vs.set_parameters(None)
+    assert vs.function is function
+
+    # Outputs of the wrong size should be rejected
+    with pytest.raises(ValueError):
+        vs.set_parameters(None, output=lambda t: [t])
+    assert vs.function is function
+
+    with pytest.raises(ValueError):
+        vs.set_parameters(None, output=np.zeros(3))
+
+
+@pytest.mark.parametrize("period, n_steps, n_rows", [(0.005, 10, 5),
+                                                     (0.005, None, 5),
+                                                     (None, 10, 10)])
+def test_compute_output_period(period, n_steps, n_rows):
+    """Only a single period of values should be computed for a periodic
+    source, including when simulating indefinitely.
+    """
+    vs = ValueSource(lambda t: [t], 1, period)
+    t_pars = mock.Mock(spec_set=["pre_slice", "function"])
+    t_pars.pre_slice = slice(None)
+    t_pars.function = None
+    vs.transmission_parameters = [(t_pars, np.eye(1))]
+
+    assert vs._compute_output(0.001, 0, n_steps).shape == (n_rows, 1)
+
+
+def test_compute_output_indefinite_aperiodic():
+    vs = ValueSource(lambda t: [t], 1, None)
+    vs.transmission_parameters = []
+
+    with pytest.raises(ValueError):
+        vs._compute_output(0.001, 0, None)
@@ -0,0 +1,59 @@
+import mock
+import pytest
+
+from nengo_spinnaker.scripts.nengo_spinnaker_compile import main, get_network
+from nengo_spinnaker.simulator import Simulator
+
+
+SCRIPT = """\
+import nengo
+
+with nengo.Network() as model:
+    nengo.Ensemble(10, 1)
+
+other = None
+"""
+
+
+@pytest.fixture
+def script(tmpdir):
+    filename = tmpdir.join("model.py")
+    filename.write(SCRIPT)
+    return str(filename)
+
+
+def test_get_network(script):
+    network = get_network(script)
+    assert len(network.all_ensembles) == 1
+
+    with pytest.raises(ValueError):
+        get_network(script, "missing")
+
+
+@pytest.mark.parametrize(
+    "args, kwargs",
+    [("", dict(dt=0.001, period=10.0, timescale=1.0, hostname=None,
+               n_boards=None)),
+     ("--dt 0.002 --indefinite --timescale 0.5 --boards 3",
+      dict(dt=0.002, period=None, timescale=0.5, hostname=None,
+           n_boards=3)),
+     ("--period 2.0 -H spinn-1",
+      dict(dt=0.001, period=2.0, timescale=1.0, hostname="spinn-1",
+           n_boards=None))]
+)
+def test_main(script, tmpdir, args, kwargs):
+    bundle = str(tmpdir.join("model.nsb"))
+
+    with mock.patch.object(Simulator, "compile") as compile:
+        assert main([script, bundle] + args.split()) == 0
+
+    network, filename = compile.call_args[0]
+    assert len(network.all_ensembles) == 1
+    assert filename == bundle
+    assert compile.call_args[1] == kwargs
+
+
+def test_bad_args(script):
+    # A machine may only be specified once
+    with pytest.raises(SystemExit):
+        main([script, "model.nsb", "--hostname", "spinn-1", "--boards", "1"])
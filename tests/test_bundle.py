@@ -0,0 +1,312 @@
+import mock
+import nengo
+import numpy as np
+import pytest
+from rig.links import Links
+from rig.machine_control.consts import AppState
+from rig.place_and_route import Cores
+from rig.routing_table import Routes, RoutingTableEntry
+import struct
+
+from nengo_spinnaker.builder import Model
+from nengo_spinnaker.bundle import (Bundle, BundleError, ImageController,
+                                    make_system_info, render_images)
+from nengo_spinnaker.node_io import Ethernet
+
+
+class FakeMachine(ImageController):
+    """Machine whose memory is allocated at different addresses to those used
+    when rendering images.
+    """
+    base_address = 0x61230000
+
+    def __init__(self):
+        super(FakeMachine, self).__init__()
+        self.routing_tables = None
+        self.application_map = None
+
+    def load_routing_tables(self, routing_tables):
+        self.routing_tables = routing_tables
+
+    def load_application(self, application_map):
+        self.application_map = application_map
+
+    def get_memory(self, address, length, x, y):
+        allocation, offset = self._find(address, x, y)
+        return bytes(allocation.data[offset:offset + length])
+
+
+class PointerNetlist(object):
+    """Netlist-like object whose load function writes pointers between
+    allocations.
+    """
+    def __init__(self, scale=1):
+        self.scale = scale
+
+    def load_data(self, controller):
+        with controller(x=1, y=2):
+            a = controller.sdram_alloc_as_filelike(64, tag=3)
+            b = controller.sdram_alloc(10, clear=True)
+
+        c = controller.sdram_alloc(8, x=0, y=0)
+        self.memory = (a, b, c)
+
+        # Pointers, an unbuffered alias of a pointer and data
+        a.write(struct.pack("<4I", b, c + 4, (b + 0x10000000) * self.scale,
+                            0xcafe))
+        controller.write(c, b"\x01\x02", 0, 0)
+
+
+def test_image_controller_render():
+    images = ImageController()
+
+    # Allocations are placed one after another on each chip
+    with images(x=1, y=1):
+        a = images.sdram_alloc(5, tag=1)
+        b = images.sdram_alloc(8, clear=True)
+    c = images.sdram_alloc(4, x=0, y=1)
+
+    assert a == c == ImageController.base_address
+    assert b == a + 8  # Word aligned
+    assert [(m.x, m.y, m.size, m.tag, m.clear) for m in images.allocations] \
+        == [(1, 1, 5, 1, False), (1, 1, 8, 0, True), (0, 1, 4, 0, False)]
+
+    # Data written may be read back
+    images.write(b + 2, b"\x01\x02", 1, 1)
+    assert images.read(b, 4, 1, 1) == b"\x00\x00\x01\x02"
+    assert images.allocations[1].get_written_ranges() == [(2, 4)]
+
+    # Only allocated memory may be accessed
+    with pytest.raises(ValueError):
+        images.write(b + 7, b"\x00\x00", 1, 1)
+    with pytest.raises(ValueError):
+        images.read(c, 4, 0, 0)
+
+    # Arguments must be given or set by the context
+    with pytest.raises(TypeError):
+        images.sdram_alloc(4)
+
+    # The controller doesn't communicate with a machine
+    with pytest.raises(AttributeError):
+        images.send_signal("stop")
+
+
+def test_written_ranges_and_compact():
+    images = ImageController()
+    address = images.sdram_alloc(32, x=0, y=0)
+    for offset, data in ((8, b"\x01" * 4), (0, b"\x02" * 4),
+                         (4, b"\x03" * 2), (20, b"\x04" * 4)):
+        images.write(address + offset, data, 0, 0)
+
+    allocation = images.allocations[0]
+    assert allocation.get_written_ranges() == [(0, 6), (8, 12), (20, 24)]
+
+    allocation.compact()
+    assert allocation.chunks == [(0, b"\x02" * 4 + b"\x03" * 2),
+                                 (8, b"\x01" * 4), (20, b"\x04" * 4)]
+
+
+def test_render_images_and_load():
+    netlist = PointerNetlist()
+    images = render_images(netlist)
+
+    # The pointers should have been found
+    a, b, c = images.allocations
+    assert a.relocations.tolist() == [[0, 1], [4, 2], [8, 1]]
+    assert b.relocations.tolist() == c.relocations.tolist() == []
+
+    # The netlist should refer to the returned images
+    assert netlist.memory[0]._machine_controller is images
+
+    # Load the images, the pointers should be relocated
+    machine = FakeMachine()
+    images.load(machine)
+    real_a, real_b, real_c = [m.address for m in machine.allocations]
+    assert [(m.x, m.y, m.size, m.tag, m.clear) for m in
+            machine.allocations] == [(1, 2, 64, 3, False),
+                                     (1, 2, 10, 0, True),
+                                     (0, 0, 8, 0, False)]
+    assert machine.get_memory(real_a, 16, 1, 2) == struct.pack(
+        "<4I", real_b, real_c + 4, real_b + 0x10000000, 0xcafe)
+    assert machine.get_memory(real_c, 2, 0, 0) == b"\x01\x02"
+
+    # Memory views and addresses held by the netlist now refer to the memory
+    # on the machine.
+    mem_a, addr_b, addr_c = netlist.memory
+    mem_a.seek(12)
+    mem_a.write(b"\xff")
+    assert machine.get_memory(real_a + 12, 1, 1, 2) == b"\xff"
+
+    images.write(addr_b + 0x10000000 + 1, b"\x07", 1, 2)
+    assert machine.get_memory(real_b + 1, 1, 1, 2) == b"\x07"
+    with images(x=0, y=0):
+        assert images.read(addr_c, 2) == b"\x01\x02"
+
+    # Other calls are forwarded to the machine
+    images.load_routing_tables("tables")
+    assert machine.routing_tables == "tables"
+
+
+def test_render_images_not_relocatable():
+    # Data which depends on addresses in other ways can't be relocated
+    with pytest.raises(BundleError):
+        render_images(PointerNetlist(scale=2))
+
+
+def test_image_controller_forwards_unknown_addresses():
+    images = ImageController()
+    images.sdram_alloc(4, x=0, y=0)
+
+    controller = mock.Mock()
+    controller.sdram_alloc.return_value = 0x61000000
+    images.load(controller)
+
+    images.read(0xf1000000, 4, 0, 0)
+    controller.read.assert_called_once_with(0xf1000000, 4, 0, 0, 0)
+
+
+@pytest.mark.parametrize("n_boards, width, height, n_chips",
+                         [(1, 8, 8, 48), (3, 12, 12, 144),
+                          (4, 24, 12, 288)])
+def test_make_system_info(n_boards, width, height, n_chips):
+    system_info = make_system_info(n_boards)
+    assert (system_info.width, system_info.height) == (width, height)
+    assert len(system_info) == n_chips
+
+    # The monitor core of every chip is running
+    for chip_info in system_info.values():
+        assert chip_info.core_states[0] is AppState.run
+        assert set(chip_info.core_states[1:]) == {AppState.idle}
+
+    if n_boards == 1:
+        # Links at the edge of the board are not working
+        assert system_info[(0, 0)].working_links == {
+            Links.east, Links.north_east, Links.north}
+        assert system_info[(4, 0)].working_links == {
+            Links.north_east, Links.north, Links.west}
+        assert list(system_info.ethernet_connected_chips()) == [
+            ((0, 0), None)]
+    else:
+        assert all(c.working_links == set(Links) for c in
+                   system_info.values())
+
+
+def make_network():
+    with nengo.Network(seed=5) as net:
+        a = nengo.Node(np.sin)
+        b = nengo.Ensemble(200, 1)
+        c = nengo.Ensemble(200, 2)
+        d = nengo.Node(size_in=2)
+        nengo.Connection(a, b)
+        nengo.Connection(b, c[0])
+        nengo.Connection(b, c[1], function=np.square)
+        nengo.Connection(c, d)
+        nengo.Probe(c, synapse=0.01)
+
+    return net
+
+
+def make_bundle(network, system_info):
+    io = Ethernet()
+    model = Model()
+    model.build(network, **io.builder_kwargs)
+    netlist = model.make_netlist(100)
+    netlist.place_and_route(system_info)
+    return Bundle.from_model(network, model, io, netlist, system_info,
+                             0.001, 0.1, 1.0, 1, "fingerprint"), netlist
+
+
+def test_bundle_save_restore_and_load(tmpdir):
+    system_info = make_system_info(1)
+    network = make_network()
+    bundle, netlist = make_bundle(network, system_info)
+    assert bundle.routing_tables == netlist.get_routing_tables(system_info)
+
+    # Save and load the bundle
+    filename = str(tmpdir.join("model.nsb"))
+    bundle.save(filename)
+    bundle = Bundle.load_file(filename)
+    assert (bundle.dt, bundle.period, bundle.timescale, bundle.n_boards,
+            bundle.fingerprint) == (0.001, 0.1, 1.0, 1, "fingerprint")
+
+    # Restore the model, it should refer to the objects in the network
+    model = Model()
+    io = Ethernet()
+    restored = bundle.restore(network, model, io)
+    assert set(model.params) <= set(
+        network.all_ensembles + network.all_connections + network.all_probes +
+        network.all_nodes + [e.neurons for e in network.all_ensembles])
+    assert set(io.host_network.nodes) & set(network.all_nodes)
+    assert model.keyspaces is restored.keyspaces
+    assert [restored.placements[v] for v in restored.vertices] == \
+        [netlist.placements[v] for v in netlist.vertices]
+    assert len(restored.load_functions) == len(netlist.load_functions)
+
+    # The keyspaces should still be assigned
+    assert sorted(ks.get_value(tag="routing") for ks in
+                  restored.net_keyspaces.values()) == \
+        sorted(ks.get_value(tag="routing") for ks in
+               netlist.net_keyspaces.values())
+
+    # The bundle may be loaded onto an ideal machine
+    bundle.check_machine(restored, system_info)
+
+    machine = FakeMachine()
+    controller = bundle.load(machine, restored)
+    assert controller is restored.images
+    assert machine.routing_tables == bundle.routing_tables
+    assert machine.application_map
+
+    # The same data should be in memory as if the netlist had been loaded
+    # directly (with memory allocated at the same addresses).
+    direct = FakeMachine()
+    netlist.load_data(direct)
+    assert len(direct.allocations) == len(machine.allocations)
+    for a, b in zip(direct.allocations, machine.allocations):
+        assert a.address == b.address
+        for start, stop in a.get_written_ranges():
+            assert a.data[start:stop] == b.data[start:stop]
+
+    io.close()
+
+
+def test_check_machine():
+    system_info = make_system_info(1)
+    bundle, netlist = make_bundle(make_network(), system_info)
+
+    # A core which is in use prevents the bundle being loaded
+    vertex, (x, y) = next(iter(netlist.placements.items()))
+    p = netlist.allocations[vertex][Cores].start
+    system_info[(x, y)].core_states[p] = AppState.run
+    with pytest.raises(BundleError) as excinfo:
+        bundle.check_machine(netlist, system_info)
+    assert "Core ({}, {}, {})".format(x, y, p) in str(excinfo.value)
+    system_info[(x, y)].core_states[p] = AppState.idle
+
+    # As does a dead chip
+    del system_info[(x, y)]
+    with pytest.raises(BundleError):
+        bundle.check_machine(netlist, system_info)
+    system_info = make_system_info(1)
+
+    # And a link which isn't working
+    bundle.routing_tables = {(0, 0): [RoutingTableEntry({Routes.west}, 0, 0)]}
+    with pytest.raises(BundleError) as excinfo:
+        bundle.check_machine(netlist, system_info)
+    assert "Link west of chip (0, 0)" in str(excinfo.value)
+
+    # And a routing table which is too large
+    bundle.routing_tables = {(0, 0): [
+        RoutingTableEntry({Routes.core_1}, i, 0xffffffff)
+        for i in range(1024)]}
+    with pytest.raises(BundleError):
+        bundle.check_machine(netlist, system_info)
+
+
+def test_load_file_version(tmpdir):
+    filename = str(tmpdir.join("model.nsb"))
+    Bundle(0.001, None, 1.0, None, "fp", {}, b"").save(filename)
+
+    with mock.patch("nengo_spinnaker.bundle.BUNDLE_VERSION", 2):
+        with pytest.raises(BundleError):
+            Bundle.load_file(filename)
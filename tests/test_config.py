@@ -21,6 +21,7 @@ def test_add_spinnaker_params():
     for param, value in [
             ("function_of_time", True),
             ("function_of_time_period", 0.5),
+            ("transmission_period", 0.1),
             ]:
         with pytest.raises(AttributeError) as excinfo:
             setattr(net.config[n_ft], param, value)
@@ -41,6 +42,14 @@ def test_add_spinnaker_params():
             ("router_kwargs", {}),
             ("node_io", None),
             ("node_io_kwargs", {}),
+            ("pipelined_runs", True),
+            ("host_process", True),
+            ("host_step_policy", "skip"),
+            ("host_spin_time", 0.0),
+            ("indefinite_probe_steps", 100),
+            ("sync_timeout", 1.0),
+            ("allocate_during_build", True),
+            ("n_boards", 3),
             ]:
         with pytest.raises(ConfigError) as excinfo:
             setattr(net.config[Simulator], param, value)
@@ -52,6 +61,7 @@ def test_add_spinnaker_params():
     assert net.config[nengo.Node].function_of_time is False
     assert net.config[nengo.Node].function_of_time_period is None
     assert net.config[nengo.Node].optimize_out is None
+    assert net.config[nengo.Node].transmission_period is None
 
     assert net.config[Simulator].placer is par.place
     assert net.config[Simulator].placer_kwargs == {}
@@ -62,6 +72,14 @@ def test_add_spinnaker_params():
 
     assert net.config[Simulator].node_io is node_io.Ethernet
     assert net.config[Simulator].node_io_kwargs == {}
+    assert net.config[Simulator].pipelined_runs is False
+    assert net.config[Simulator].host_process is False
+    assert net.config[Simulator].host_step_policy == "catch_up"
+    assert net.config[Simulator].host_spin_time == 1e-4
+    assert net.config[Simulator].indefinite_probe_steps == 10000
+    assert net.config[Simulator].sync_timeout == 10.0
+    assert net.config[Simulator].allocate_during_build is False
+    assert net.config[Simulator].n_boards is None
 
 
 def test_callable_parameter_validate():
@@ -0,0 +1,138 @@
+import mock
+import nengo
+import numpy as np
+import pytest
+import threading
+
+from nengo_spinnaker.builder.node import NodeIOController, ProbeNode
+from nengo_spinnaker.host_process import HostProcess
+from nengo_spinnaker.simulator import Simulator
+from nengo_spinnaker.utils.probe_data import ProbeData
+from nengo_spinnaker.utils.realtime import StepTimings
+
+
+class RecordingIO(NodeIOController):
+    """IO controller which records the Node outputs it transmits."""
+    def __init__(self):
+        super(RecordingIO, self).__init__()
+        self.outputs = list()
+        self.n_steps = 0
+
+    def set_node_output(self, node, value):
+        self.outputs.append((node, value.copy()))
+
+    def end_step(self):
+        self.n_steps += 1
+
+
+@pytest.fixture
+def host_process():
+    """Create a simulator whose host network contains a Node which doubles
+    the input it receives from the machine and whose output is probed, and
+    simulate the host network in a separate process.
+    """
+    io = RecordingIO()
+    state = {"calls": 0}
+
+    def double(t, x):
+        state["calls"] += 1
+        if x[0] < 0.0:
+            raise ValueError("Negative input")
+        return 2 * x
+
+    node = nengo.Node(double, size_in=1, size_out=1, add_to_container=False)
+    probe = nengo.Probe(node, add_to_container=False)
+    probe_node = ProbeNode(probe, 100, 0.001, add_to_container=False)
+    with io.host_network:
+        io._add_input_node(node)
+        io._add_output_node(node)
+        io._add_node(probe_node)
+        nengo.Connection(node, probe_node, synapse=None)
+
+    sim = Simulator.__new__(Simulator)
+    sim.io_controller = io
+    sim.dt = 0.001
+    sim.timescale = 1.0
+    sim.host_step_policy = "catch_up"
+    sim.host_spin_time = 0.0
+    sim.host_step_timings = StepTimings()
+    sim.host_sim = nengo.Simulator(io.host_network, dt=sim.dt)
+    sim._host_time = {"start": None}
+    sim._host_loop = None
+    sim._probe_nodes = [probe_node]
+    sim.data = ProbeData(sim.dt)
+    sim.data.attach(probe, probe_node.buffer)
+
+    host_process = HostProcess(sim)
+    host_process.node = node
+    host_process.probe = probe
+    host_process.state = state
+    yield host_process
+    host_process.close()
+    sim.host_sim.close()
+
+
+def test_run(host_process):
+    sim = host_process.simulator
+    io = sim.io_controller
+    node = host_process.node
+    io.node_input[node].write([0.25])
+
+    assert host_process.run(20) == 20
+
+    # The outputs of the Node were transmitted by the IO controller
+    assert io.n_steps > 0
+    assert all(n is node for n, _ in io.outputs)
+    assert np.array_equal(io.outputs[-1][1], [0.5])
+
+    # The Node was simulated in the other process, the timings of the steps
+    # and the probed data are returned.
+    assert host_process.state["calls"] == 0
+    assert sim.host_step_timings.execution_time.n == 20
+    assert sim.data[host_process.probe].shape == (20, 1)
+    assert np.all(sim.data[host_process.probe][-1] == 0.5)
+
+    # Resetting clears the probed data in the other process
+    sim.data.clear()
+    host_process.reset()
+    host_process.run(5)
+    assert sim.data[host_process.probe].shape == (5, 1)
+
+
+def test_stop(host_process):
+    timer = threading.Timer(0.05, host_process.stop)
+    timer.start()
+    steps = host_process.run(None)
+    timer.join()
+    assert 0 < steps
+
+
+def test_error(host_process):
+    """Errors in the host network should be re-raised."""
+    io = host_process.simulator.io_controller
+    io.node_input[host_process.node].write([-1.0])
+
+    with pytest.raises(Exception) as excinfo:
+        host_process.run(10)
+    assert "Negative input" in str(excinfo.value)
+
+    # The process can still be used
+    io.node_input[host_process.node].write([1.0])
+    assert host_process.run(10) == 10
+
+
+def test_close(host_process):
+    host_process.close()
+    assert not host_process.process.is_alive()
+
+    # Closing again is harmless
+    host_process.close()
+
+
+def test_requires_fork():
+    """A clear error should be raised if processes can't be forked."""
+    with mock.patch("multiprocessing.get_context", side_effect=ValueError,
+                    create=True):
+        with pytest.raises(ValueError) as excinfo:
+            HostProcess(mock.Mock(name="simulator"))
+    assert "fork" in str(excinfo.value)
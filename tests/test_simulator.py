@@ -0,0 +1,388 @@
+import mock
+import nengo
+import pytest
+from rig.machine_control.consts import AppState
+import time
+
+from nengo_spinnaker import add_spinnaker_params, simulator
+from nengo_spinnaker.builder import Model
+from nengo_spinnaker.builder.node import NodeIOController
+from nengo_spinnaker.bundle import BundleError, make_system_info
+from nengo_spinnaker.simulator import Simulator, _HostWorker
+from nengo_spinnaker.utils.machine_pool import MachinePool, PooledMachine
+from nengo_spinnaker.utils.probe_data import ProbeData
+from nengo_spinnaker.utils.realtime import StepTimings
+from nengo_spinnaker.utils.timings import Timings
+
+
+def make_simulator(max_steps, pipelined):
+    """Create a simulator without building a network or connecting to a
+    machine, the running of each period is recorded in `events`.
+    """
+    sim = Simulator.__new__(Simulator)
+    sim.max_steps = max_steps
+    sim.pipelined = pipelined
+    sim.steps = 0
+    sim.data = ProbeData(0.001)
+    sim._probes = list()
+    sim.events = events = list()
+
+    # Preparing the simulation is recorded
+    sim.netlist = mock.Mock()
+    sim.netlist.prepare_simulation.side_effect = \
+        lambda s, start, n: events.append(("prepare", start, n))
+
+    def run_steps(steps, host_work=None):
+        events.append(("run", sim.steps, steps))
+        if host_work is not None:
+            host_work()
+        sim.steps += steps
+
+        # Return a finaliser which records when it is called
+        return [lambda start=sim.steps - steps:
+                events.append(("finalise", start))]
+
+    sim._run_steps = run_steps
+    return sim
+
+
+def test_run_steps_not_pipelined():
+    sim = make_simulator(100, False)
+    sim.run_steps(250)
+
+    assert sim.events == [
+        ("run", 0, 100), ("finalise", 0),
+        ("run", 100, 100), ("finalise", 100),
+        ("run", 200, 50), ("finalise", 200),
+    ]
+
+
+def test_run_steps_pipelined():
+    sim = make_simulator(100, True)
+    sim.run_steps(250)
+
+    # While each period runs the results of the previous period should be
+    # processed and the next period prepared.
+    assert sim.events == [
+        ("run", 0, 100), ("prepare", 100, 100),
+        ("run", 100, 100), ("finalise", 0), ("prepare", 200, 50),
+        ("run", 200, 50), ("finalise", 100),
+        ("finalise", 200),
+    ]
+
+
+def test_run_steps_indefinite():
+    """Running indefinitely should run a single simulation of no fixed
+    length.
+    """
+    sim = make_simulator(None, False)
+    sim._run_steps = mock.Mock(return_value=[mock.Mock(name="finaliser")])
+    sim.run_steps(None)
+
+    sim._run_steps.assert_called_once_with(None)
+    sim._run_steps.return_value[0].assert_called_once_with()
+
+
+def test_run_steps_without_period():
+    """Running a number of steps without a period should run a single
+    simulation of that length.
+    """
+    sim = make_simulator(None, False)
+    sim._run_steps = mock.Mock(return_value=[mock.Mock(name="finaliser")])
+    sim.run_steps(250)
+
+    sim._run_steps.assert_called_once_with(250)
+    sim._run_steps.return_value[0].assert_called_once_with()
+
+
+def test_run_steps_without_period_runs_machine_indefinitely():
+    """Without a period the machine should be run indefinitely while the host
+    simulates the given number of steps.
+    """
+    sim = Simulator.__new__(Simulator)
+    sim._closed = False
+    sim.max_steps = None
+    sim.steps = 0
+    sim.dt = 0.001
+    sim.timescale = 1.0
+    sim.host_process = False
+    sim._host_process = None
+    sim._host_loop = None
+    sim.host_step_policy = "catch_up"
+    sim.host_spin_time = 0.0
+    sim.host_step_timings = StepTimings()
+    sim.timings = Timings()
+    sim.controller = mock.Mock(name="controller")
+    sim.io_controller = mock.Mock(name="io controller")
+    sim.io_controller.get_metrics.return_value = {}
+    sim.io_controller.wait = time.sleep
+    sim.netlist = mock.Mock(name="netlist")
+    sim.netlist.after_simulation.return_value = list()
+    sim._wait_for_transition = mock.Mock()
+    sim._step_host = mock.Mock()
+
+    sim._run_steps(5)
+
+    sim.netlist.before_simulation.assert_called_once_with(sim, None)
+    assert sim._step_host.call_count == 5
+    sim.netlist.after_simulation.assert_called_once_with(sim, 5, sim.timings)
+    sim.netlist.reset_application.assert_called_once_with(sim.controller)
+    assert sim.steps == 5
+
+
+def test_stop():
+    """Stopping should stop the loop of an indefinite simulation, if there
+    is one.
+    """
+    sim = make_simulator(None, False)
+    sim._host_loop = None
+    sim._host_process = None
+    sim.stop()
+
+    sim._host_loop = mock.Mock(name="loop")
+    sim.stop()
+    sim._host_loop.stop.assert_called_once_with()
+
+    # Simulations in a separate host process are also stopped
+    sim._host_loop = None
+    sim._host_process = mock.Mock(name="host process")
+    sim.stop()
+    sim._host_process.stop.assert_called_once_with()
+
+
+def test_wait_for_transition(monkeypatch):
+    """Barriers should wait for the expected duration plus the timeout and
+    the time spent waiting should be recorded.
+    """
+    wait = mock.Mock(return_value=4)
+    monkeypatch.setattr(simulator, "wait_for_cores", wait)
+
+    sim = Simulator.__new__(Simulator)
+    sim.controller = mock.Mock(name="controller")
+    sim.timings = Timings()
+    sim.sync_timeout = 2.0
+
+    sim._wait_for_transition(AppState.run, AppState.sync0, 4, 3.0)
+    wait.assert_called_once_with(sim.controller, AppState.sync0, 4, 5.0)
+    assert sim.timings.n("sync/run_to_sync0") == 1
+
+    # Failing to reach the state should report the failed cores
+    sim._print_core_failures = mock.Mock()
+    with pytest.raises(Exception):
+        sim._wait_for_transition(AppState.init, AppState.sync0, 5)
+    sim._print_core_failures.assert_called_once_with(AppState.sync0)
+
+
+@pytest.mark.parametrize("pooled", [False, True])
+def test_close(pooled):
+    """Closing should return the machine to the pool, if one is used, or
+    destroy it otherwise.
+    """
+    sim = Simulator.__new__(Simulator)
+    Simulator._add_simulator(sim)
+    sim._closed = False
+    sim.io_controller = mock.Mock(name="io controller")
+    sim.controller = mock.Mock(name="controller")
+    sim.machine = mock.Mock(name="machine")
+    sim._machine_pool = mock.Mock(name="pool") if pooled else None
+    sim._host_process = mock.Mock(name="host process")
+
+    sim.close()
+    sim.controller.send_signal.assert_called_once_with("stop")
+    sim._host_process.close.assert_called_once_with()
+    if pooled:
+        sim._machine_pool.release.assert_called_once_with(sim.machine)
+        assert not sim.machine.destroy.called
+    else:
+        sim.machine.destroy.assert_called_once_with()
+    assert sim not in Simulator._open_simulators
+
+
+def test_host_process_requires_threaded_io():
+    """The host network cannot be simulated in a separate process if the IO
+    controller performs IO while waiting between host steps.
+    """
+    class WaitingIO(NodeIOController):
+        def wait(self, duration):
+            pass
+
+    with nengo.Network() as net:
+        pass
+    add_spinnaker_params(net.config)
+    net.config[Simulator].node_io = WaitingIO
+    net.config[Simulator].host_process = True
+
+    sim = Simulator.__new__(Simulator)
+    with pytest.raises(ValueError) as excinfo:
+        sim._configure(net, 0.001, 10.0, 1.0)
+    assert "WaitingIO" in str(excinfo.value)
+
+    # IO controllers which perform IO in a separate thread may be used
+    net.config[Simulator].node_io = NodeIOController
+    sim._configure(net, 0.001, 10.0, 1.0)
+    assert sim.host_process
+
+
+def test_host_worker_result():
+    worker = _HostWorker(lambda: 5)
+    worker.start()
+    worker.join()
+
+    worker.check()
+    assert worker.result == 5
+
+
+def test_estimate_n_boards():
+    """The number of boards should be estimated before building a network
+    and should never be zero.
+    """
+    with nengo.Network() as net:
+        a = nengo.Ensemble(250, 1)
+        b = nengo.Node(size_in=1)
+        nengo.Probe(a)
+        nengo.Probe(b)
+
+    assert simulator._estimate_n_cores(net) == 3 + 1 + 2
+    assert simulator._n_boards(6, 0.6) == 1
+    assert simulator._n_boards(0, 0.6) == 1
+    assert simulator._n_boards(16 * 48, 0.6) == 2
+
+
+def test_host_worker_reraises():
+    def fail():
+        raise ValueError("Oops")
+
+    worker = _HostWorker(fail)
+    worker.start()
+    worker.join()
+
+    with pytest.raises(ValueError):
+        worker.check()
+
+
+def test_reset():
+    """Check that resetting restarts the application and clears the host-side
+    state.
+    """
+    sim = Simulator.__new__(Simulator)
+    sim._closed = False
+    sim.controller = mock.Mock(name="controller")
+    sim.netlist = mock.Mock(name="netlist")
+    sim.host_sim = mock.Mock(name="host simulator")
+    sim._host_time = {"start": 1.0}
+    sim.steps = 100
+    sim.data = data = {"probe": None}
+    sim.profiler_data = {"ensemble": None}
+    sim.host_step_timings = mock.Mock(name="host step timings")
+    sim._probe_nodes = [mock.Mock(name="probe node")]
+    sim._host_process = mock.Mock(name="host process")
+    sim.timings = Timings()
+
+    sim.reset(seed=3)
+    sim._host_process.reset.assert_called_once_with(3)
+    assert sim.timings.n("reset_application") == 1
+
+    sim.netlist.reset_application.assert_called_once_with(sim.controller)
+    sim.host_sim.reset.assert_called_once_with(seed=3)
+    assert sim.steps == 0
+    assert sim.data is data and sim.data == {}
+    assert sim.profiler_data == {}
+    assert sim._host_time["start"] is None
+    sim.host_step_timings.clear.assert_called_once_with()
+    sim._probe_nodes[0].reset.assert_called_once_with()
+
+
+def test_reset_closed():
+    sim = Simulator.__new__(Simulator)
+    sim._closed = True
+    sim.netlist = mock.Mock(name="netlist")
+
+    with pytest.raises(Exception):
+        sim.reset()
+
+    assert not sim.netlist.reset_application.called
+
+
+def make_bundle_network(n_neurons=100, spinnaker_params=False):
+    with nengo.Network(seed=3) as net:
+        a = nengo.Node([0.5])
+        b = nengo.Ensemble(n_neurons, 1)
+        nengo.Connection(a, b)
+        nengo.Probe(b, synapse=0.01)
+
+    if spinnaker_params:
+        add_spinnaker_params(net.config)
+    return net
+
+
+def make_bundle_machine():
+    """Make a fake machine onto which bundles may be loaded."""
+    controller = mock.MagicMock(name="controller")
+    controller.initial_host = "localhost"
+    controller.sdram_alloc.side_effect = \
+        lambda size, *args, **kwargs: 0x61000000 + 0x100000 * \
+        controller.sdram_alloc.call_count
+    controller.read.return_value = b"\x00" * 4
+    controller.count_cores_in_state.return_value = 0
+    return PooledMachine("localhost", controller, make_system_info(1))
+
+
+def test_compile_and_from_bundle(tmpdir):
+    """Check that a simulator may be created from a compiled bundle without
+    building the network.
+    """
+    filename = str(tmpdir.join("model.nsb"))
+    timings = Simulator.compile(make_bundle_network(), filename, period=0.1,
+                                n_boards=1)
+    assert timings.n("build") == 1
+    assert timings.n("place") == 1
+
+    # Create a simulator from the bundle using a fake machine
+    machine = make_bundle_machine()
+    controller = machine.controller
+
+    network = make_bundle_network()
+    with mock.patch.object(MachinePool, "acquire",
+                           return_value=machine) as acquire, \
+            mock.patch.object(Model, "build") as build:
+        sim = Simulator.from_bundle(filename, network, hostname="localhost",
+                                    use_machine_pool=False)
+    acquire.assert_called_once_with("localhost", 1, sim.timings)
+    assert not build.called
+
+    # The bundle should have been loaded
+    assert sim.dt == 0.001 and sim.max_steps == 100
+    assert controller.load_routing_tables.called
+    assert controller.load_application.called
+    assert controller.sdram_alloc.call_count == \
+        len(sim.netlist.images.allocations)
+    assert sim.controller is sim.netlist.images
+    assert sim.timings.n("load_bundle") == 1
+
+    sim.close()
+    controller.send_signal.assert_called_with("stop")
+
+    # A bundle may not be loaded for a different network
+    with mock.patch.object(MachinePool, "acquire") as acquire:
+        with pytest.raises(BundleError):
+            Simulator.from_bundle(filename, make_bundle_network(200),
+                                  hostname="localhost")
+    assert not acquire.called
+
+
+def test_compile_and_from_bundle_default_config(tmpdir):
+    """Check that networks using the default SpiNNaker config may be compiled
+    and loaded from a bundle.
+    """
+    filename = str(tmpdir.join("model.nsb"))
+    Simulator.compile(make_bundle_network(spinnaker_params=True), filename,
+                      period=0.1, n_boards=1)
+
+    machine = make_bundle_machine()
+    with mock.patch.object(MachinePool, "acquire", return_value=machine):
+        sim = Simulator.from_bundle(
+            filename, make_bundle_network(spinnaker_params=True),
+            hostname="localhost", use_machine_pool=False)
+
+    assert machine.controller.load_application.called
+    sim.close()
@@ -0,0 +1,62 @@
+import mock
+import pytest
+
+from nengo_spinnaker.sweep import SweepRunner
+
+
+@pytest.fixture
+def simulator():
+    sim = mock.Mock(name="simulator")
+    sim.data = {}
+
+    def run(time_in_seconds):
+        sim.data["probe"] = time_in_seconds
+
+    sim.run.side_effect = run
+    sim.model.object_operators = {
+        "a": mock.Mock(name="operator a", spec_set=["set_parameters"]),
+        "b": mock.Mock(name="operator b", spec_set=["set_parameters"]),
+        "c": mock.Mock(name="operator c", spec_set=[]),
+    }
+    return sim
+
+
+def test_run(simulator):
+    """Each point should be written, the simulator reset and run and the
+    probed data returned.
+    """
+    op_a = simulator.model.object_operators["a"]
+    op_b = simulator.model.object_operators["b"]
+
+    runner = SweepRunner(simulator)
+    results = list(runner.run([{("a", "bias"): 1.0},
+                               {("b", "output"): 2.0}], 0.5, seed=3))
+
+    # The points should have been simulated in turn
+    assert [r.point for r in results] == [{("a", "bias"): 1.0},
+                                          {("b", "output"): 2.0}]
+    assert all(r.data == {"probe": 0.5} for r in results)
+    assert all(r.rewrite_time >= 0.0 and r.run_time >= 0.0 for r in results)
+    assert simulator.reset.call_args_list == [mock.call(seed=3)] * 2
+    assert simulator.run.call_args_list == [mock.call(0.5)] * 2
+
+    # The parameters changed by the first point should be restored for the
+    # second.
+    assert op_a.set_parameters.call_args_list == [
+        mock.call(simulator.model, bias=1.0),
+        mock.call(simulator.model, bias=None),
+    ]
+    op_b.set_parameters.assert_called_once_with(simulator.model, output=2.0)
+
+
+@pytest.mark.parametrize("obj", ["c", "d"])
+def test_unsweepable(simulator, obj):
+    """Objects without operators, or whose operators do not support changing
+    their parameters, cannot be swept.
+    """
+    runner = SweepRunner(simulator)
+    with pytest.raises(ValueError):
+        runner.run_point({(obj, "bias"): 1.0}, 0.5)
+
+    assert not simulator.reset.called
+    assert not simulator.run.called
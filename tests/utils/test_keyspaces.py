@@ -1,3 +1,4 @@
+import pickle
 import pytest
 from rig.bitfield import BitField
 from nengo_spinnaker.utils import keyspaces
@@ -47,3 +48,23 @@ def test_Keyspaces_and_is_nengo_keyspace():
 
     kss.assign_fields()
     other_ks.get_mask()
+
+
+def test_pickle_keyspaces():
+    """Containers and keyspaces, including the assignment of their fields,
+    should survive being pickled together.
+    """
+    kss = keyspaces.KeyspaceContainer()
+    ks = kss["nengo"](connection_id=3, cluster=1)
+    kss.assign_fields()
+
+    kss, ks = pickle.loads(pickle.dumps((kss, ks)))
+    assert kss.routing_tag == "routing"
+    assert ks.get_value(tag=kss.routing_tag) == \
+        kss["nengo"](connection_id=3, cluster=1).get_value(
+            tag=kss.routing_tag)
+    assert keyspaces.is_nengo_keyspace(ks)
+
+    # New keyspaces are still derived from the same master keyspace
+    assert kss["another"].user == 1
+    kss.assign_fields()
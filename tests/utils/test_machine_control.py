@@ -0,0 +1,96 @@
+import mock
+import pkg_resources
+import pytest
+from rig.machine_control.consts import AppState
+from rig.machine_control import struct_file
+import struct
+
+from nengo_spinnaker.utils import machine_control
+from nengo_spinnaker.utils.machine_control import (get_core_states, poll,
+                                                   wait_for_cores)
+
+
+class FakeClock(object):
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = list()
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, duration):
+        self.sleeps.append(duration)
+        self.now += duration
+
+
+@pytest.fixture
+def fake_clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(machine_control, "clock", clock)
+    monkeypatch.setattr(machine_control.time, "sleep", clock.sleep)
+    return clock
+
+
+def test_poll_backs_off(fake_clock):
+    """Polls should start quickly and back off to the maximum interval."""
+    condition = mock.Mock(side_effect=[False] * 6 + [True])
+    assert poll(condition, 10.0, initial_interval=0.001, max_interval=0.01)
+
+    assert fake_clock.sleeps == pytest.approx(
+        [0.001, 0.002, 0.004, 0.008, 0.01, 0.01])
+
+
+def test_poll_timeout(fake_clock):
+    condition = mock.Mock(return_value=False)
+    assert not poll(condition, 1.0)
+    assert fake_clock.now == pytest.approx(1.0)
+
+
+def test_wait_for_cores(fake_clock):
+    """Waiting should stop once enough cores reach the state."""
+    controller = mock.Mock()
+    counts = [0, 2, 4]
+    controller.count_cores_in_state.side_effect = \
+        lambda s: counts.pop(0) if s is AppState.sync0 else 0
+
+    assert wait_for_cores(controller, AppState.sync0, 4, 5.0) == 4
+    assert fake_clock.now < 0.01
+
+
+def test_wait_for_cores_failure(fake_clock):
+    """Waiting should stop early if a core fails."""
+    controller = mock.Mock()
+    controller.count_cores_in_state.return_value = 1
+
+    assert wait_for_cores(controller, AppState.sync0, 4, 5.0) == 1
+    assert fake_clock.now < 0.01
+
+    # Cores which exit are failures unless waiting for them to exit
+    failed = controller.count_cores_in_state.call_args[0][0]
+    assert AppState.exit in failed and AppState.dead in failed
+
+
+def test_get_core_states():
+    """States should be read with a single read per chip."""
+    structs = struct_file.read_struct_file(
+        pkg_resources.resource_string("rig", "boot/sark.struct"))
+    vcpu = structs[b"vcpu"]
+    field = vcpu[b"cpu_state"]
+
+    # Make the VCPU data of a chip with cores in different states
+    data = bytearray(vcpu.size * 18)
+    for p, state in ((1, AppState.sync0), (3, AppState.dead)):
+        struct.pack_into(b"<" + field.pack_chars, data,
+                         vcpu.size * p + field.offset, state)
+
+    controller = mock.Mock()
+    controller.structs = structs
+    controller.read_struct_field.return_value = 0x1000
+    controller.read.side_effect = \
+        lambda address, n_bytes, x, y: bytes(data[:n_bytes])
+
+    states = get_core_states(controller, [(0, 0, 1), (0, 0, 3), (1, 0, 1)])
+    assert states == {(0, 0, 1): AppState.sync0, (0, 0, 3): AppState.dead,
+                      (1, 0, 1): AppState.sync0}
+    assert controller.read.call_count == 2
+    controller.read.assert_any_call(0x1000, vcpu.size * 4, 0, 0)
@@ -0,0 +1,105 @@
+import mock
+import pytest
+
+from nengo_spinnaker.utils import machine_pool
+from nengo_spinnaker.utils.machine_pool import MachinePool
+from nengo_spinnaker.utils.timings import Timings
+
+
+@pytest.fixture
+def machine_controller(monkeypatch):
+    mc = mock.Mock(name="MachineController",
+                   side_effect=lambda hostname: mock.Mock(hostname=hostname))
+    monkeypatch.setattr(machine_pool, "MachineController", mc)
+    return mc
+
+
+def test_acquire_hostname(machine_controller):
+    """Machines should only be booted and described once."""
+    pool = MachinePool()
+    timings = Timings()
+
+    machine = pool.acquire("spinn-1", timings=timings)
+    assert machine.hostname == "spinn-1"
+    assert machine.job is None
+    machine.controller.boot.assert_called_once_with()
+    assert (machine.system_info is
+            machine.controller.get_system_info.return_value)
+    assert timings.n("boot") == 1 and timings.n("get_system_info") == 1
+
+    # Releasing the machine should allow it to be reused without booting
+    pool.release(machine)
+    assert len(pool) == 1
+    assert pool.acquire("spinn-1") is machine
+    assert machine.controller.boot.call_count == 1
+    assert len(pool) == 0
+
+    # A different machine should not be reused
+    pool.release(machine)
+    other = pool.acquire("spinn-2")
+    assert other is not machine
+    assert len(pool) == 1
+
+
+def test_acquire_job(machine_controller):
+    """The smallest sufficiently large job should be reused."""
+    pool = MachinePool()
+    pool._allocate_job = mock.Mock(side_effect=lambda n: mock.Mock(
+        hostname="board-{}".format(n)))
+
+    small = pool.acquire(n_boards=1)
+    large = pool.acquire(n_boards=3)
+    assert pool._allocate_job.call_count == 2
+    assert large.hostname == "board-3"
+    pool.release(large)
+    pool.release(small)
+
+    assert pool.acquire(n_boards=2) is large
+    assert pool.acquire(n_boards=1) is small
+    assert pool._allocate_job.call_count == 2
+
+    # Closing the pool should destroy the jobs of free machines
+    pool.release(small)
+    job = small.job
+    pool.close()
+    job.destroy.assert_called_once_with()
+    assert small.job is None
+    assert len(pool) == 0
+
+
+def test_acquire_job_any_size(machine_controller):
+    """Jobs of any size should be reused when no number of boards is given,
+    but jobs of unknown size should only be reused when no size is needed.
+    """
+    pool = MachinePool()
+    pool._allocate_job = mock.Mock(side_effect=lambda n: mock.Mock(
+        hostname="board-{}".format(n)))
+
+    unknown = pool.acquire()
+    pool._allocate_job.assert_called_once_with(None)
+    assert unknown.n_boards is None
+    pool.release(unknown)
+
+    # A job of unknown size can't be used when a size is needed
+    sized = pool.acquire(n_boards=2)
+    assert sized is not unknown
+    assert pool._allocate_job.call_count == 2
+    pool.release(sized)
+
+    # But any job may be used when no size is needed
+    assert pool.acquire() in (unknown, sized)
+    assert pool.acquire() in (unknown, sized)
+    assert pool._allocate_job.call_count == 2
+
+
+def test_allocate_job_any_size(monkeypatch):
+    """Jobs of spalloc's default size should be allocated when no number of
+    boards is given.
+    """
+    spalloc = pytest.importorskip("spalloc")
+    job = mock.Mock(boards=[(0, 0, 0)])
+    monkeypatch.setattr(spalloc, "Job", mock.Mock(return_value=job))
+    monkeypatch.setattr(machine_pool.time, "sleep", mock.Mock())
+
+    assert MachinePool()._allocate_job(None) is job
+    spalloc.Job.assert_called_once_with()
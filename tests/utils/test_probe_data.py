@@ -0,0 +1,120 @@
+import mock
+import numpy as np
+import pytest
+
+from nengo_spinnaker.utils.probe_data import (ProbeBuffer, ProbeData,
+                                              ProbeRingBuffer)
+
+
+class TestProbeBuffer(object):
+    @pytest.mark.parametrize("shape", [(3, ), (3, 2)])
+    def test_append(self, shape):
+        """Appended data should be presented as a single array."""
+        buf = ProbeBuffer()
+        chunks = [np.random.uniform(size=(n, ) + shape) for n in (1, 4, 7)]
+
+        for chunk in chunks:
+            buf.append(chunk)
+
+        assert len(buf) == 12
+        assert buf.array.shape == (12, ) + shape
+        assert np.all(buf.array == np.vstack(chunks))
+
+    def test_grows_geometrically(self):
+        """The storage should be reallocated a logarithmic number of times."""
+        buf = ProbeBuffer()
+        storage = set()
+        for _ in range(100):
+            buf.append(np.zeros((1, 2)))
+            storage.add(id(buf._data))
+
+        assert len(buf) == 100
+        assert len(storage) <= 8
+
+    def test_reserve(self):
+        """Reserved storage should not be reallocated when appending."""
+        buf = ProbeBuffer()
+        buf.reserve(10)
+        buf.append(np.zeros((4, 2)))
+        data = buf._data
+        assert data.shape == (10, 2)
+
+        buf.append(np.ones((6, 2)))
+        assert buf._data is data
+
+        # Reserving more space reallocates the storage once, keeping the data
+        buf.reserve(5)
+        assert buf._data.shape == (15, 2)
+        assert np.all(buf.array == np.vstack((np.zeros((4, 2)),
+                                              np.ones((6, 2)))))
+
+
+class TestProbeRingBuffer(object):
+    def test_append(self):
+        """Only the most recent rows should be retained, in order."""
+        buf = ProbeRingBuffer(5)
+        assert len(buf) == 0
+
+        buf.append(np.arange(6).reshape(3, 2))
+        assert len(buf) == 3
+        assert buf.array.tolist() == [[0, 1], [2, 3], [4, 5]]
+
+        buf.append(np.arange(6, 14).reshape(4, 2))
+        assert len(buf) == 5
+        assert buf.array[:, 0].tolist() == [4, 6, 8, 10, 12]
+
+        # Appending more rows than fit keeps only the last rows
+        buf.append(np.arange(20).reshape(10, 2))
+        assert buf.array[:, 0].tolist() == [10, 12, 14, 16, 18]
+
+        buf.clear()
+        assert len(buf) == 0
+
+
+class TestProbeData(object):
+    def test_mapping(self):
+        data = ProbeData(0.001)
+        data["a"] = np.zeros((2, 1))
+        data.append("a", np.ones((1, 1)))
+        data.append("b", np.ones((3, 2)))
+
+        assert set(data) == {"a", "b"}
+        assert len(data) == 2
+        assert np.all(data["a"] == [[0.0], [0.0], [1.0]])
+        assert data["b"].shape == (3, 2)
+
+        del data["a"]
+        assert set(data) == {"b"}
+
+        data.clear()
+        assert len(data) == 0
+
+    @pytest.mark.parametrize("sample_every, n_rows", [(None, 25),
+                                                      (0.002, 13),
+                                                      (0.005, 5)])
+    def test_reserve(self, sample_every, n_rows):
+        """Storage should be reserved for the samples taken in every period."""
+        probe = mock.Mock(sample_every=sample_every)
+        data = ProbeData(0.001)
+        data.reserve([probe], [10, 10, 5])
+
+        data.append(probe, np.zeros((1, 3)))
+        assert data._buffers[probe]._data.shape == (n_rows, 3)
+
+        # Reserving for existing data should expand its storage if necessary
+        data.reserve([probe], [10, 10, 5])
+        assert data._buffers[probe]._data.shape == (n_rows + 1, 3)
+
+    def test_attach(self):
+        """Attached buffers should be emptied, not removed, when cleared."""
+        buf = ProbeRingBuffer(2)
+        data = ProbeData(0.001)
+        data.attach("a", buf)
+        data.reserve(["a"], [10])
+
+        buf.append(np.ones((3, 1)))
+        assert np.all(data["a"] == [[1.0], [1.0]])
+
+        data.clear()
+        assert set(data) == {"a"}
+        assert len(buf) == 0
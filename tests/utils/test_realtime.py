@@ -0,0 +1,136 @@
+import mock
+import pytest
+
+from nengo_spinnaker.utils import realtime
+from nengo_spinnaker.utils.realtime import (RealTimeLoop, StepTimings,
+                                            TimingHistogram)
+
+
+class FakeClock(object):
+    """Clock which only advances when slept on or when steps execute."""
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, duration):
+        self.now += duration
+
+
+@pytest.fixture
+def fake_clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(realtime, "clock", clock)
+    monkeypatch.setattr(realtime.time, "sleep", clock.sleep)
+    return clock
+
+
+def test_histogram():
+    hist = TimingHistogram([0.0, 0.001, 0.01])
+    for duration in (-0.001, 0.0005, 0.002, 0.003, 1.0):
+        hist.record(duration)
+
+    assert list(hist.counts) == [2, 2, 1]
+    assert hist.n == 5
+    assert hist.max == 1.0
+    assert hist.mean == pytest.approx(1.0045 / 5)
+
+    hist.clear()
+    assert list(hist.counts) == [0, 0, 0]
+    assert hist.n == 0 and hist.mean == 0.0
+
+
+def test_invalid_policy():
+    with pytest.raises(ValueError):
+        RealTimeLoop(0.001, policy="hurry")
+
+
+def test_on_time(fake_clock):
+    """Steps which finish in time should start on their deadlines."""
+    starts = list()
+    step = mock.Mock(side_effect=lambda: starts.append(fake_clock.now))
+
+    loop = RealTimeLoop(0.001, spin_time=0.0)
+    assert loop.run(step, 10) == 10
+
+    assert starts == pytest.approx([i * 0.001 for i in range(10)])
+    assert fake_clock.now == pytest.approx(0.01)
+    assert loop.timings.lateness.max == pytest.approx(0.0)
+    assert loop.timings.n_skipped == 0
+
+
+@pytest.mark.parametrize("policy, n_executed, n_skipped",
+                         [("catch_up", 10, 0), ("skip", 8, 2)])
+def test_late(fake_clock, policy, n_executed, n_skipped):
+    """A slow step should either be caught up with or cause the following
+    steps to be skipped, without the loop drifting.
+    """
+    def step():
+        # The third step takes 3.5 timesteps
+        if abs(fake_clock.now - 0.002) < 1e-9:
+            fake_clock.now += 0.0035
+
+    timings = StepTimings()
+    loop = RealTimeLoop(0.001, policy=policy, spin_time=0.0,
+                        timings=timings)
+    assert loop.run(step, 10) == n_executed
+
+    assert timings.n_skipped == n_skipped
+    assert timings.execution_time.n == n_executed
+    assert timings.execution_time.max == pytest.approx(0.0035)
+    assert fake_clock.now == pytest.approx(0.01)
+
+
+def test_run_until_stopped(fake_clock):
+    """With no number of steps the loop should run until stopped."""
+    loop = RealTimeLoop(0.001, spin_time=0.0)
+
+    def step():
+        if fake_clock.now >= 0.0045:
+            loop.stop()
+
+    assert loop.run(step, None) == 6
+    assert loop.steps_elapsed == 6
+    assert fake_clock.now == pytest.approx(0.006)
+
+
+def test_sleep_function(fake_clock):
+    """The function used to sleep while waiting for deadlines may be given."""
+    sleep = mock.Mock(side_effect=fake_clock.sleep)
+    loop = RealTimeLoop(0.001, spin_time=0.0, sleep=sleep)
+    loop.run(lambda: None, 3)
+
+    assert sleep.call_count == 3
+    for (duration, ), _ in sleep.call_args_list:
+        assert duration == pytest.approx(0.001)
+
+
+class TickingClock(FakeClock):
+    """Clock which also advances slightly whenever it is read, so that the
+    loop may spin until a deadline.
+    """
+    def __call__(self):
+        self.now += 1e-6
+        return self.now
+
+
+@pytest.mark.parametrize("spin_time", [None, 1e-4, 0.001])
+def test_sleeps_for_short_timesteps(monkeypatch, spin_time):
+    """The loop should sleep for most of each 1ms timestep, even if the spin
+    time is as long as the timestep.
+    """
+    clock = TickingClock()
+    monkeypatch.setattr(realtime, "clock", clock)
+    sleep = mock.Mock(side_effect=clock.sleep)
+
+    kwargs = {} if spin_time is None else {"spin_time": spin_time}
+    loop = RealTimeLoop(0.001, sleep=sleep, **kwargs)
+    assert loop.spin_time <= 1e-4
+    loop.run(lambda: None, 3)
+
+    # The first step is due immediately, the loop sleeps before the others
+    # and until the end of the final step.
+    assert sleep.call_count == 3
+    for (duration, ), _ in sleep.call_args_list:
+        assert duration > 0.0008
@@ -0,0 +1,61 @@
+import functools
+import json
+import mock
+import pytest
+
+from nengo_spinnaker.utils import timings as timings_module
+from nengo_spinnaker.utils.timings import Timings, function_name
+
+
+def test_timings(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr(timings_module, "clock", lambda: now[0])
+
+    timings = Timings()
+    for duration in (1.0, 2.0):
+        with timings.time("sync"):
+            now[0] += duration
+
+    # Durations are recorded even if the phase fails
+    with pytest.raises(ValueError):
+        with timings.time("build"):
+            now[0] += 0.5
+            raise ValueError
+
+    timings.record("place", 0.25)
+    timings.count("n_cores", 10)
+
+    assert list(timings.phases) == ["sync", "build", "place"]
+    assert timings.n("sync") == 2
+    assert timings.total("sync") == 3.0
+    assert timings.n("route") == 0 and timings.total("route") == 0.0
+
+    # The timings should be exported as JSON
+    data = json.loads(timings.to_json())
+    assert data["phases"]["sync"] == {"n": 2, "total": 3.0,
+                                      "durations": [1.0, 2.0]}
+    assert data["phases"]["build"]["durations"] == [0.5]
+    assert data["counts"] == {"n_cores": 10}
+
+    timings.clear()
+    assert json.loads(timings.to_json()) == {"phases": {}, "counts": {}}
+
+
+class Operator(object):
+    def load_to_machine(self, netlist, controller):
+        pass
+
+
+def load(netlist, controller):
+    pass
+
+
+@pytest.mark.parametrize("fn, name", [
+    (Operator().load_to_machine, "Operator.load_to_machine"),
+    (functools.partial(Operator().load_to_machine, 1),
+     "Operator.load_to_machine"),
+    (load, "load"),
+    (mock.Mock(), "Mock"),
+])
+def test_function_name(fn, name):
+    assert function_name(fn) == name
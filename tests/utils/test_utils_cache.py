@@ -0,0 +1,171 @@
+import mock
+from nengo.utils.compat import configparser
+import os
+import pytest
+import random
+import time
+
+from nengo_spinnaker.utils import cache as cache_utils
+from nengo_spinnaker.utils.cache import (FileCache, UndescribableError,
+                                         describe, get_cache)
+
+
+SCALE = 2.0
+
+
+class Scaler(object):
+    """Picklable callable object."""
+    def __init__(self, scale):
+        self.scale = scale
+
+    def __call__(self, x):
+        return self.scale * x
+
+
+class TestFileCache(object):
+    def test_get_put(self, tmpdir):
+        cache = FileCache(str(tmpdir), 1024, version="1")
+
+        # Missing entries return None
+        assert cache.get("abc") is None
+
+        # Stored entries can be retrieved, even by a new cache
+        cache.put("abc", b"Hello, world")
+        assert cache.get("abc") == b"Hello, world"
+        assert FileCache(str(tmpdir), 1024, "1").get("abc") == b"Hello, world"
+
+        # Entries can be replaced
+        cache.put("abc", b"Goodbye")
+        assert cache.get("abc") == b"Goodbye"
+
+    def test_version_change_invalidates(self, tmpdir):
+        cache = FileCache(str(tmpdir), 1024, version="1")
+        cache.put("abc", b"Hello, world")
+
+        # A different version shouldn't see the entry, and should remove it
+        assert FileCache(str(tmpdir), 1024, version="2").get("abc") is None
+        assert FileCache(str(tmpdir), 1024, version="1").get("abc") is None
+
+    def test_too_large_not_stored(self, tmpdir):
+        cache = FileCache(str(tmpdir), 4, version="1")
+        cache.put("abc", b"Hello, world")
+        assert cache.get("abc") is None
+
+    def test_least_recently_used_evicted(self, tmpdir):
+        cache = FileCache(str(tmpdir), 20, version="1")
+
+        # Store two entries, with the first being older
+        cache.put("a", b"0123456789")
+        cache.put("b", b"0123456789")
+        past = time.time() - 100
+        os.utime(cache._get_filename("a"), (past, past))
+        os.utime(cache._get_filename("b"), (past + 10, past + 10))
+
+        # Using "a" should make "b" the least recently used entry, which
+        # should be evicted when another entry is added.
+        assert cache.get("a") == b"0123456789"
+        cache.put("c", b"0123456789")
+        assert cache.get("a") == b"0123456789"
+        assert cache.get("b") is None
+        assert cache.get("c") == b"0123456789"
+
+    def test_clear(self, tmpdir):
+        cache = FileCache(str(tmpdir), 1024, version="1")
+        cache.put("a", b"Hello")
+        cache.put("b", b"World")
+        cache.clear()
+        assert cache.get("a") is None
+        assert cache.get("b") is None
+
+
+@pytest.mark.parametrize(
+    "options", [{}, {"enabled": "False"}]
+)
+def test_get_cache_disabled(options):
+    rc = configparser.ConfigParser()
+    rc.add_section("cache")
+    for k, v in options.items():
+        rc.set("cache", k, v)
+
+    with mock.patch.object(cache_utils, "rc", rc):
+        assert get_cache("models") is None
+
+
+def test_get_cache(tmpdir):
+    rc = configparser.ConfigParser()
+    rc.add_section("cache")
+    rc.set("cache", "enabled", "True")
+    rc.set("cache", "path", str(tmpdir))
+    rc.set("cache", "size", "2 MB")
+
+    with mock.patch.object(cache_utils, "rc", rc):
+        cache = get_cache("models")
+
+    assert isinstance(cache, FileCache)
+    assert cache.root == os.path.join(str(tmpdir), "models")
+    assert cache.max_size == 2 * 1024 * 1024
+
+
+class TestDescribe(object):
+    def test_modules_and_classes_by_name(self):
+        """Modules, classes and builtins should be described by name."""
+        assert describe(random) == "module(random)"
+        assert describe(FileCache) == "nengo_spinnaker.utils.cache.FileCache"
+        assert describe(len) in ("builtins.len", "__builtin__.len")
+
+    def test_function_defaults_not_walked(self):
+        """Functions referring to modules should not walk the module."""
+        def f(x, rng=random):
+            return x
+
+        assert "module(random)" in describe(f)
+
+    def test_objects_described_by_pickled_state(self):
+        """Objects which aren't Nengo objects should be described by their
+        type and pickled state.
+        """
+        assert describe(Scaler(2.0)) == describe(Scaler(2.0))
+        assert describe(Scaler(2.0)) != describe(Scaler(3.0))
+        assert "Scaler" in describe(Scaler(2.0))
+
+    def test_unpicklable_objects_undescribable(self):
+        """Objects which can't be pickled can't be described faithfully, so
+        describing them (or anything referring to them) should fail.
+        """
+        class Unpicklable(object):
+            def __init__(self):
+                self.module = random
+
+        with pytest.raises(UndescribableError):
+            describe(Unpicklable())
+
+        with pytest.raises(UndescribableError):
+            describe({"f": [Unpicklable()]})
+
+    def test_function_globals(self):
+        """The global variables referred to by a function should be
+        described.
+        """
+        def f(x):
+            return SCALE * x
+
+        before = describe(f)
+        global SCALE
+        SCALE = 3.0
+        try:
+            assert describe(f) != before
+        finally:
+            SCALE = 2.0
+        assert describe(f) == before
+
+    def test_shared_references_described_once(self):
+        """Values referred to many times are only described once, so deeply
+        shared structures are described quickly.
+        """
+        value = [1.0]
+        for _ in range(200):
+            value = [value, value]
+
+        start = time.time()
+        assert describe(value) == describe(value)
+        assert time.time() - start < 5.0
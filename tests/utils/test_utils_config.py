@@ -15,6 +15,9 @@ def test_getconfig():
     assert getconfig(net.config, Simulator, "placer", placer) is placer
     assert not getconfig(net.config, n, "function_of_time", False)
 
+    # Models without a config use the defaults
+    assert getconfig(None, Simulator, "placer", placer) is placer
+
     # Now add the config
     add_spinnaker_params(net.config)
     net.config[n].function_of_time = True